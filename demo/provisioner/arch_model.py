@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+import json
+import pickle
+import re
+
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, List
+
+# custom attribute we will use to specify arch
+ARCH_CUSTOM_ATTRIBUTE = "REQUIRED_ARCH"
+
+# custom attribute listing, comma separated, the arches a job can run on
+ACCEPTABLE_ARCHES_ATTRIBUTE = "ACCEPTABLE_ARCHES"
+
+# custom attribute naming the kind of work a job does, runtimes are tracked
+# per workload and arch
+WORKLOAD_ATTRIBUTE = "WORKLOAD"
+
+# hosts the ffmpeg benchmarks were run on and the arch of each
+FFMPEG_HOST_ARCH = {"mbp": "X86_64", "rpi": "AARCH64"}
+
+# row of ffmpeg-performance/client-server-scripts/parse.py
+Row = namedtuple("Row", ["frame", "fps", "q", "size", "time", "bitrate", "speed"])
+
+class _RowUnpickler(pickle.Unpickler):
+    # parse.py pickles its Row from __main__
+    def find_class(self, module, name):
+        if name == "Row":
+            return Row
+
+        return super().find_class(module, name)
+
+def parse_arches(value: str) -> List[str]:
+    """Arches listed in a comma separated ACCEPTABLE_ARCHES value."""
+    return [a.strip() for a in str(value).split(",") if a.strip()]
+
+def ffmpeg_workload(resolution: str) -> str:
+    """Workload name of an ffmpeg job decoding a video of the given resolution."""
+    return "ffmpeg-{}".format(resolution)
+
+def read_ffmpeg_run(path: str) -> float:
+    """
+    Wall clock seconds taken by a single ffmpeg run, as parsed by
+    parse.py: the media time of the last progress line divided by the
+    speed ffmpeg reported for it.
+
+    :param path: pickle written by parse.py
+    :type path: str
+    :return: seconds taken by the run, None if the run has no progress lines
+    :rtype: float
+    """
+    with open(path, "rb") as f:
+        rows = _RowUnpickler(f).load()
+
+    if len(rows) == 0:
+        return None
+
+    last = rows[-1]
+    h, m, s = last.time.split(":")
+    media_time = int(h) * 3600 + int(m) * 60 + float(s)
+    speed = float(last.speed.rstrip("x"))
+
+    return media_time / speed if speed > 0 else None
+
+class ArchThroughputModel:
+    def __init__(self, alpha: float = 0.3, default_runtime: float = 60):
+        """
+        Expected runtime of a job per workload and arch, tracked as an EWMA
+        of recorded runtimes, used to decide which arch jobs that can run on
+        several arches are placed on.
+
+        :param alpha: weight of the latest recorded runtime in the EWMA, defaults to 0.3
+        :type alpha: float, optional
+        :param default_runtime: runtime, in seconds, assumed for a workload no runtime has been recorded for, defaults to 60
+        :type default_runtime: float, optional
+        """
+        self.alpha = alpha
+        self.default_runtime = default_runtime
+
+        # workload -> arch -> EWMA of runtime in seconds
+        self.runtimes = dict()
+
+    def observe(self, workload: str, arch: str, runtime: float):
+        """Record the runtime, in seconds, of a job of workload that ran on arch."""
+        by_arch = self.runtimes.setdefault(workload, dict())
+        if arch in by_arch:
+            by_arch[arch] = self.alpha * runtime + (1 - self.alpha) * by_arch[arch]
+        else:
+            by_arch[arch] = runtime
+
+    def runtime(self, workload: str, arch: str) -> float:
+        """
+        Expected runtime, in seconds, of a job of workload on arch. An arch
+        nothing has been recorded for is assumed to be as fast as the
+        fastest recorded one, so that it gets tried.
+
+        :return: expected runtime in seconds
+        :rtype: float
+        """
+        by_arch = self.runtimes.get(workload, dict())
+        if arch in by_arch:
+            return by_arch[arch]
+
+        if len(by_arch) > 0:
+            return min(by_arch.values())
+
+        return self.default_runtime
+
+    def choose_arch(self, workload: str, arches: List[str]) -> str:
+        """Arch, of the given ones, on which a job of workload is expected to finish first."""
+        return min(arches, key=lambda arch: self.runtime(workload, arch))
+
+    def assign(
+            self,
+            workload: str,
+            count: int,
+            arches: List[str],
+            slots: Dict[str, int],
+            backlog: Dict[str, float] = None
+        ) -> Dict[str, int]:
+        """
+        Spread count jobs of workload over arches so that the last of them
+        is expected to finish as soon as possible: each job goes, in turn, to
+        the arch where it would finish first given the work already assigned
+        there and the number of slots of that arch.
+
+        :param workload: workload of the jobs
+        :type workload: str
+        :param count: number of jobs
+        :type count: int
+        :param arches: arches the jobs can run on
+        :type arches: List[str]
+        :param slots: number of slots, available or about to be, per arch; arches with none are treated as having one
+        :type slots: Dict[str, int]
+        :param backlog: seconds of work already queued per arch, defaults to None; updated in place when given
+        :type backlog: Dict[str, float], optional
+        :return: number of jobs per arch
+        :rtype: Dict[str, int]
+        """
+        backlog = backlog if backlog is not None else dict()
+        runtimes = {arch: self.runtime(workload, arch) for arch in arches}
+
+        result = {arch: 0 for arch in arches}
+        for _ in range(count):
+            arch = min(
+                arches,
+                key=lambda a: (backlog.get(a, 0.0) + runtimes[a]) / max(1, slots.get(a, 0))
+            )
+            backlog[arch] = backlog.get(arch, 0.0) + runtimes[arch]
+            result[arch] += 1
+
+        return result
+
+    def seed_from_ffmpeg(self, data_dir: str) -> int:
+        """
+        Seed the model with the ffmpeg client runs in data_dir, pickles named
+        <resolution>_client_<host>.pkl as written by parse.py (e.g. extracted
+        from ffmpeg-performance/all_data.tar.gz). Each run is recorded as the
+        runtime of workload ffmpeg-<resolution> on the arch of its host. The
+        x86_64 client ran with -re, so its runtimes are upper bounds.
+
+        :param data_dir: directory searched, recursively, for the pickles
+        :type data_dir: str
+        :return: number of runs recorded
+        :rtype: int
+        """
+        pattern = re.compile(r"^(\d+x\d+)_client_({})\.pkl$".format("|".join(FFMPEG_HOST_ARCH)))
+
+        num_runs = 0
+        for path in sorted(Path(data_dir).rglob("*.pkl")):
+            match = pattern.match(path.name)
+            if not match:
+                continue
+
+            runtime = read_ffmpeg_run(str(path))
+            if runtime is not None:
+                self.observe(ffmpeg_workload(match.group(1)), FFMPEG_HOST_ARCH[match.group(2)], runtime)
+                num_runs += 1
+
+        return num_runs
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.runtimes, f, indent=4, sort_keys=True)
+
+    def load(self, path: str):
+        """Merge runtimes saved by save() into the model, overriding seeded ones."""
+        with open(path, "r") as f:
+            for workload, by_arch in json.load(f).items():
+                self.runtimes.setdefault(workload, dict()).update(by_arch)
+
+    def __str__(self):
+        return "ArchThroughputModel: {}".format(", ".join(
+                "{}=({})".format(workload, ", ".join(
+                    "{}: {:.1f}s".format(arch, runtime) for arch, runtime in sorted(by_arch.items())
+                ))
+                for workload, by_arch in sorted(self.runtimes.items())
+            ))
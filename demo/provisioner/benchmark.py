@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+import argparse
+import gc
+import json
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, List
+
+import htcondor
+
+from provisioner import Arch, JobStatus, Provisioner, ARCH_CUSTOM_ATTRIBUTE
+from scaling_policy import FixedIdleTimeout
+
+# time and peak memory of a single tick of a benchmark at a given size
+BenchResult = namedtuple("BenchResult", ["bench", "size", "seconds", "peak_bytes"])
+
+# default (startd ads, queued jobs) sizes, up to 50k ads and 200k jobs
+DEFAULT_SIZES = [(1000, 4000), (5000, 20000), (10000, 40000), (50000, 200000)]
+
+# a tick is a regression when it is this many times slower, or uses this many
+# times more memory, than its baseline
+DEFAULT_TIME_TOLERANCE = 1.5
+DEFAULT_MEMORY_TOLERANCE = 1.2
+
+def container_id(i: int) -> str:
+    """Full length container id whose first 12 characters are unique."""
+    return "{:012x}".format(i) + "0" * 52
+
+def synthetic_startd_ads(num_ads: int, idle_fraction: float = 0.5, partitionable_fraction: float = 0.1):
+    """
+    Startd ads of demo workers, half of them X86_64 and half AARCH64, named
+    after the truncated id of container i like the ads of real workers. A
+    fraction of the workers have a partitionable slot, the rest a static one.
+
+    :param num_ads: number of ads
+    :type num_ads: int
+    :param idle_fraction: fraction of the workers that are unclaimed and idle, defaults to 0.5
+    :type idle_fraction: float, optional
+    :param partitionable_fraction: fraction of the workers with a partitionable slot, defaults to 0.1
+    :type partitionable_fraction: float, optional
+    :return: generator of startd ads
+    """
+    idle_every = max(1, round(1 / idle_fraction)) if idle_fraction > 0 else None
+    partitionable_every = max(1, round(1 / partitionable_fraction)) if partitionable_fraction > 0 else None
+    for i in range(num_ads):
+        name = container_id(i)[:12]
+        idle = idle_every is not None and i % idle_every == 0
+        ad = {
+            "Name": name,
+            "Machine": name,
+            "Arch": Arch.X86_64.value if i % 2 == 0 else Arch.AARCH64.value,
+            "State": "Unclaimed" if idle else "Claimed",
+            "Activity": "Idle" if idle else "Busy",
+            "DEMO_NODE": True,
+            "Cpus": 1,
+            "Memory": 1024,
+            "Disk": 1024 * 1024
+        }
+        if partitionable_every is not None and i % partitionable_every == 0:
+            ad.update({
+                "PartitionableSlot": True,
+                "State": "Unclaimed",
+                "Activity": "Idle",
+                "Cpus": 4 if idle else 2,
+                "TotalSlotCpus": 4,
+                "TotalSlotMemory": 4096,
+                "TotalSlotDisk": 4 * 1024 * 1024,
+                "ChildCpus": [] if idle else [1, 1]
+            })
+
+        yield ad
+
+def synthetic_job_ads(num_jobs: int, running_fraction: float = 0.2, cluster_size: int = 100):
+    """
+    Job ads of the queue: jobs alternate between X86_64 and AARCH64, and are
+    grouped in clusters of cluster_size procs like those of a DAG layer.
+
+    :param num_jobs: number of jobs
+    :type num_jobs: int
+    :param running_fraction: fraction of the jobs that are running, the rest are idle, defaults to 0.2
+    :type running_fraction: float, optional
+    :param cluster_size: number of procs per cluster, defaults to 100
+    :type cluster_size: int, optional
+    :return: generator of job ads
+    """
+    running_every = max(1, round(1 / running_fraction)) if running_fraction > 0 else None
+    for i in range(num_jobs):
+        running = running_every is not None and i % running_every == 0
+        yield {
+            "ClusterId": 1 + i // cluster_size,
+            "ProcId": i % cluster_size,
+            "JobStatus": JobStatus.RUNNING.value if running else JobStatus.IDLE.value,
+            ARCH_CUSTOM_ATTRIBUTE: Arch.X86_64.value if i % 2 == 0 else Arch.AARCH64.value,
+            "RequestCpus": 1,
+            "RequestMemory": 512,
+            "RequestDisk": 1024
+        }
+
+class FakeCollector:
+    """In-process htcondor.Collector returning a fixed set of startd ads."""
+    def __init__(self, ads: List[dict]):
+        self.ads = ads
+
+    def query(self, ad_type=None, constraint=None, projection=None):
+        return iter(self.ads)
+
+class FakeSchedd:
+    """In-process htcondor.Schedd returning a fixed set of job ads."""
+    def __init__(self, jobs: List[dict]):
+        self.jobs = jobs
+
+    def xquery(self, requirements: str = None, projection: List[str] = None):
+        return iter(self.jobs)
+
+class FakeJobEvent(dict):
+    def __init__(self, event_type: htcondor.JobEventType, job: dict):
+        super().__init__()
+        self.type = event_type
+        self.cluster = job["ClusterId"]
+        self.proc = job["ProcId"]
+        self.timestamp = 0
+
+class FakeEventLog:
+    """
+    In-process htcondor.JobEventLog returning num_events events per read,
+    alternately starting and evicting the same jobs so that the queue does
+    not drift from tick to tick.
+    """
+    def __init__(self, jobs: List[dict], num_events: int):
+        idle = [job for job in jobs if job["JobStatus"] == JobStatus.IDLE.value][:num_events]
+        self.batches = [
+            [FakeJobEvent(htcondor.JobEventType.EXECUTE, job) for job in idle],
+            [FakeJobEvent(htcondor.JobEventType.JOB_EVICTED, job) for job in idle]
+        ]
+        self.reads = 0
+
+    def events(self, stop_after: int = None):
+        batch = self.batches[self.reads % 2]
+        self.reads += 1
+
+        return iter(batch)
+
+class FakeContainer:
+    """In-process docker container that ignores signals."""
+    def __init__(self, _id: str):
+        self.id = _id
+
+    def kill(self, signal=None):
+        pass
+
+def make_provisioner(ads: List[dict], jobs: List[dict], event_log: FakeEventLog = None) -> Provisioner:
+    """
+    Provisioner querying the given ads and jobs on every call, managing one
+    container per startd ad, and with a scale down policy that never stops
+    any, so that every tick does the same work.
+    """
+    provisioner = Provisioner(
+            pool_refresh_interval=0,
+            event_logs=["bench.log"] if event_log is not None else None,
+            scale_down_policy=FixedIdleTimeout(max_idle_dur=math.inf),
+            collector=FakeCollector(ads),
+            schedd=FakeSchedd(jobs),
+            docker_client=object(),
+            event_log_factory=lambda path: event_log
+        )
+
+    now = provisioner.clock()
+    for i, ad in enumerate(ads):
+        _id = container_id(i)
+        value = {"last_idle": now, "started": now, "registered": True, "claimed": True, "warm": False}
+        if ad["Arch"] == Arch.X86_64.value:
+            value["cont"] = FakeContainer(_id)
+        else:
+            value["host"] = "edge-{}".format(i % 16)
+
+        provisioner.containers[ad["Arch"]][_id] = value
+        provisioner.reconciler.add_container(_id, ad["Arch"], now)
+
+    return provisioner
+
+def measure(tick: Callable, repeat: int) -> tuple:
+    """
+    Median seconds of repeat calls to tick, after an untimed warm up call,
+    then the peak memory, in bytes, allocated during one more call traced by
+    tracemalloc.
+    """
+    tick()
+
+    seconds = list()
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        tick()
+        seconds.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tick()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    return statistics.median(seconds), peak
+
+def run_benchmarks(sizes: List[tuple], benches: List[str], repeat: int = 5, event_fraction: float = 0.01) -> List[BenchResult]:
+    """
+    Run each benchmark at each (startd ads, queued jobs) size:
+
+    - queue_state: get_queue_state() scanning the whole queue
+    - queue_tracker: get_queue_state() applying event_fraction * jobs events
+    - pool_state: get_pool_state() on a cache miss
+    - idle_workers: get_idle_workers() on a cache miss
+    - scale_down: one scale_down() reconciling a container per startd ad
+
+    :param sizes: (number of startd ads, number of queued jobs) to run at
+    :type sizes: List[tuple]
+    :param benches: names of the benchmarks to run
+    :type benches: List[str]
+    :param repeat: number of timed ticks per benchmark and size, defaults to 5
+    :type repeat: int, optional
+    :param event_fraction: fraction of the jobs changing state between queue_tracker ticks, defaults to 0.01
+    :type event_fraction: float, optional
+    :return: one result per benchmark and size
+    :rtype: List[BenchResult]
+    """
+    results = list()
+    for num_ads, num_jobs in sizes:
+        ads = list(synthetic_startd_ads(num_ads))
+        jobs = list(synthetic_job_ads(num_jobs))
+        size = "{}x{}".format(num_ads, num_jobs)
+
+        event_log = FakeEventLog(jobs, int(num_jobs * event_fraction)) if "queue_tracker" in benches else None
+        provisioner = make_provisioner(ads, jobs, event_log)
+        if event_log is not None:
+            # the initial full scan is not part of a tick
+            tracker = provisioner.queue_tracker
+            tracker.get()
+            provisioner.queue_tracker = None
+
+        ticks = {
+            "queue_state": provisioner.get_queue_state,
+            "queue_tracker": lambda: tracker.get(),
+            "pool_state": provisioner.get_pool_state,
+            "idle_workers": provisioner.get_idle_workers,
+            "scale_down": provisioner.scale_down
+        }
+        for bench in benches:
+            seconds, peak = measure(ticks[bench], repeat)
+            results.append(BenchResult(bench, size, seconds, peak))
+            print("{:>14} {:>14} {:>10.4f}s {:>10.1f}MB".format(bench, size, seconds, peak / 2**20), file=sys.stderr)
+
+        provisioner.io_executor.shutdown(wait=True)
+        provisioner.launch_executor.shutdown(wait=True)
+        provisioner.ssh_pool.close()
+
+    return results
+
+def save_baseline(results: List[BenchResult], path: str):
+    """Write the results, keyed by benchmark and size, to a json file."""
+    baseline = dict()
+    for r in results:
+        baseline.setdefault(r.bench, dict())[r.size] = {"seconds": r.seconds, "peak_bytes": r.peak_bytes}
+
+    with open(path, "w") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def compare_baseline(
+        results: List[BenchResult],
+        path: str,
+        time_tolerance: float = DEFAULT_TIME_TOLERANCE,
+        memory_tolerance: float = DEFAULT_MEMORY_TOLERANCE
+    ) -> List[str]:
+    """
+    Compare results with the baseline saved in path. Benchmarks and sizes
+    missing from the baseline are skipped.
+
+    :return: one message per regression
+    :rtype: List[str]
+    """
+    with open(path, "r") as f:
+        baseline = json.load(f)
+
+    regressions = list()
+    for r in results:
+        base = baseline.get(r.bench, dict()).get(r.size)
+        if base is None:
+            continue
+
+        if r.seconds > base["seconds"] * time_tolerance:
+            regressions.append("{} at {}: {:.4f}s, baseline {:.4f}s".format(r.bench, r.size, r.seconds, base["seconds"]))
+        if r.peak_bytes > base["peak_bytes"] * memory_tolerance:
+            regressions.append("{} at {}: {:.1f}MB, baseline {:.1f}MB".format(
+                    r.bench, r.size, r.peak_bytes / 2**20, base["peak_bytes"] / 2**20
+                ))
+
+    return regressions
+
+def print_results(results: List[BenchResult]):
+    row = "{0:>14} {1:>14} {2:>14} {3:>14} {4:>14}"
+    print(row.format("bench", "size", "seconds/tick", "peak_MB/tick", "us/item"))
+    for r in results:
+        num_ads, num_jobs = (int(x) for x in r.size.split("x"))
+        items = num_jobs if r.bench.startswith("queue") else num_ads
+        print(row.format(
+            r.bench,
+            r.size,
+            "{:.4f}".format(r.seconds),
+            "{:.1f}".format(r.peak_bytes / 2**20),
+            "{:.2f}".format(r.seconds / items * 1e6)
+        ))
+
+def parse_size(value: str) -> tuple:
+    ads, _, jobs = value.partition(":")
+    if not ads.isdigit() or not jobs.isdigit():
+        raise argparse.ArgumentTypeError("expected ADS:JOBS, e.g. 50000:200000")
+
+    return int(ads), int(jobs)
+
+BENCHMARKS = ["queue_state", "queue_tracker", "pool_state", "idle_workers", "scale_down"]
+
+def parse_args(args=sys.argv[1:]):
+    parser = argparse.ArgumentParser(description="benchmark the provisioner control loop with in-process fakes")
+    parser.add_argument(
+        "--size",
+        dest="sizes",
+        type=parse_size,
+        action="append",
+        default=None,
+        metavar="ADS:JOBS",
+        help="number of startd ads and queued jobs, may be given multiple times (1000:4000 up to 50000:200000 by default)"
+    )
+    parser.add_argument(
+        "--bench",
+        dest="benches",
+        choices=BENCHMARKS,
+        action="append",
+        default=None,
+        help="benchmark to run, may be given multiple times (all by default)"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed ticks per benchmark and size")
+    parser.add_argument("--baseline", default=None, help="json file of results to compare with, exits with 1 on a regression")
+    parser.add_argument("--save-baseline", default=None, help="json file to save the results to")
+    parser.add_argument("--time-tolerance", type=float, default=DEFAULT_TIME_TOLERANCE, help="slowdown allowed over the baseline")
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE, help="memory growth allowed over the baseline")
+
+    return parser.parse_args(args)
+
+if __name__=="__main__":
+    args = parse_args()
+
+    results = run_benchmarks(args.sizes or DEFAULT_SIZES, args.benches or BENCHMARKS, args.repeat)
+    print_results(results)
+
+    if args.save_baseline:
+        save_baseline(results, args.save_baseline)
+        print("saved baseline to {}".format(args.save_baseline))
+
+    if args.baseline and Path(args.baseline).exists():
+        regressions = compare_baseline(results, args.baseline, args.time_tolerance, args.memory_tolerance)
+        for regression in regressions:
+            print("REGRESSION {}".format(regression))
+
+        if len(regressions) > 0:
+            sys.exit(1)
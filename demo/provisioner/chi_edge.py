@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+import argparse
+import concurrent.futures
+import hashlib
+import io
+import shlex
+import sys
+import tarfile
+import threading
+import time
+import uuid
+
+import collections
+
+from collections import namedtuple
+from datetime import datetime
+from typing import Callable, Dict, List
+
+# phases of bringing up a device, in order
+PHASES = ("lease", "create", "active", "floating_ip")
+
+# lease states from which a lease can still be, or is, used
+LEASE_USABLE_STATUSES = ("PENDING", "STARTING", "ACTIVE")
+
+# container states
+CONTAINER_ACTIVE_STATUS = "Running"
+CONTAINER_ERROR_STATUS = "Error"
+
+# a device reservation of one of our leases, with room for count containers
+Reservation = namedtuple("Reservation", ["id", "lease_id", "count", "end"])
+
+# where the condor daemons of the worker images read extra config from
+CONDOR_CONFIG_DIR = "/etc/condor/config.d"
+
+# outcome of pushing config to one container: status is one of "unchanged",
+# "updated" or "failed", seconds the time it took
+ConfigResult = namedtuple("ConfigResult", ["container", "status", "seconds", "error"])
+
+# a container brought up on an edge device, latencies being the seconds
+# spent in each of PHASES, error the reason it could not be brought up
+EdgeDevice = namedtuple("EdgeDevice", ["name", "uuid", "reservation_id", "ip", "latencies", "error"])
+
+def parse_lease_time(value: str) -> datetime:
+    """Blazar lease dates, e.g. 2021-08-28T19:05:00.000000, in UTC."""
+    for fmt in ("%Y-%m-%dT%H:%M:%S.%f", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+
+    raise ValueError("unexpected lease date: {}".format(value))
+
+class ChiBackend:
+    def __init__(self, site: str = "CHI@Edge", project_name: str = None, project_domain_name: str = "chameleon"):
+        """
+        The lease and container calls of python-chi used by LeasePool and
+        EdgeDeviceProvisioner, see provision_chi_edge.ipynb. Credentials
+        come from the environment (source openrc.sh).
+
+        :param site: chameleon site, defaults to "CHI@Edge"
+        :type site: str, optional
+        :param project_name: project to charge leases to, defaults to the one in the environment
+        :type project_name: str, optional
+        :param project_domain_name: domain of the project, defaults to "chameleon"
+        :type project_domain_name: str, optional
+        """
+        # only needed when talking to chameleon, other backends (see
+        # simulator.py) do not require python-chi
+        import chi
+        from chi import container, lease
+
+        chi.use_site(site)
+        if project_name is not None:
+            chi.set("project_name", project_name)
+        chi.set("project_domain_name", project_domain_name)
+
+        self.chi = chi
+        self.lease = lease
+        self.container = container
+
+    def list_leases(self) -> List[dict]:
+        return self.chi.blazar().lease.list()
+
+    def get_lease(self, lease_id: str) -> dict:
+        return self.lease.get_lease(lease_id)
+
+    def create_lease(self, name: str, count: int, device_model: str, days: int) -> dict:
+        start, end = self.lease.lease_duration(days=days)
+        reservations = list()
+        self.lease.add_device_reservation(reservations, count=count, device_model=device_model)
+
+        return self.lease.create_lease(name, reservations, start_date=start, end_date=end)
+
+    def delete_lease(self, lease_id: str):
+        self.lease.delete_lease(lease_id)
+
+    def list_containers(self) -> List[tuple]:
+        """(uuid, reservation id or None) of every container of the project."""
+        return [
+            (c.uuid, (getattr(c, "hints", None) or dict()).get("reservation"))
+            for c in self.container.list_containers()
+        ]
+
+    def create_container(self, name: str, image: str, reservation_id: str, **kwargs) -> str:
+        return self.container.create_container(name, image=image, reservation_id=reservation_id, **kwargs).uuid
+
+    def container_status(self, container_id: str) -> str:
+        return self.container.get_container(container_id).status
+
+    def associate_floating_ip(self, container_id: str) -> str:
+        return self.container.associate_floating_ip(container_id)
+
+    def destroy_container(self, container_id: str):
+        self.container.destroy_container(container_id)
+
+    def execute(self, container_id: str, cmd: str) -> dict:
+        """Run cmd in the container, returns its "output" and "exit_code"."""
+        return self.container.execute(container_id, cmd)
+
+    def put_archive(self, container_id: str, path: str, data: bytes):
+        """Extract the tar archive data into path in the container."""
+        self.chi.zun().containers.put_archive(container_id, path, data)
+
+class LeasePool:
+    def __init__(
+            self,
+            backend,
+            prefix: str = "edge-workers",
+            device_model: str = "4",
+            days: int = 1,
+            min_remaining: float = 3600,
+            poll_interval: float = 5,
+            active_timeout: float = 600,
+            sleep: Callable = time.sleep,
+            clock: Callable = time.monotonic,
+            now: Callable = datetime.utcnow
+        ):
+        """
+        Device reservations of the leases named <prefix>-*, shared by every
+        container brought up through the pool. Reservations of active (or
+        starting) leases with room left are handed out first, and a single
+        lease is created for all the devices still missing, instead of one
+        lease per device. Leases ending within min_remaining seconds are not
+        reused.
+
+        :param backend: ChiBackend or a stand-in with the same methods
+        :param prefix: name prefix of the leases of the pool, defaults to "edge-workers"
+        :type prefix: str, optional
+        :param device_model: model of the devices to reserve, defaults to "4" (raspberry pi 4)
+        :type device_model: str, optional
+        :param days: duration of new leases, defaults to 1
+        :type days: int, optional
+        :param min_remaining: seconds a lease must still have left to be reused, defaults to 3600
+        :type min_remaining: float, optional
+        :param poll_interval: seconds between lease status checks, defaults to 5
+        :type poll_interval: float, optional
+        :param active_timeout: seconds a new lease may take to become active, defaults to 600
+        :type active_timeout: float, optional
+        """
+        self.backend = backend
+        self.prefix = prefix
+        self.device_model = device_model
+        self.days = days
+        self.min_remaining = min_remaining
+        self.poll_interval = poll_interval
+        self.active_timeout = active_timeout
+        self.sleep = sleep
+        self.clock = clock
+        self.now = now
+
+        # reservation id -> Reservation, and number of containers on it
+        self.reservations = dict()
+        self.used = dict()
+        # lease id -> status
+        self.leases = dict()
+
+        self.lock = threading.Lock()
+
+    def _add_lease(self, lease: dict):
+        self.leases[lease["id"]] = lease["status"]
+        end = parse_lease_time(lease["end_date"])
+        for r in lease.get("reservations", list()):
+            if r.get("resource_type", "device") != "device":
+                continue
+
+            self.reservations[r["id"]] = Reservation(r["id"], lease["id"], int(r.get("max") or r.get("min") or 1), end)
+            self.used.setdefault(r["id"], 0)
+
+    def refresh(self):
+        """Load the pool's leases and count the containers already running on their reservations."""
+        leases = [
+            lease for lease in self.backend.list_leases()
+            if lease["name"].startswith(self.prefix + "-") and lease["status"] in LEASE_USABLE_STATUSES
+        ]
+        containers = self.backend.list_containers()
+
+        with self.lock:
+            self.reservations.clear()
+            self.used.clear()
+            self.leases.clear()
+            for lease in leases:
+                self._add_lease(lease)
+
+            for _, reservation_id in containers:
+                if reservation_id in self.used:
+                    self.used[reservation_id] += 1
+
+    def _free(self) -> List[str]:
+        # called with self.lock held, reservations with room, longest lasting first
+        now = self.now()
+        free = list()
+        for r in sorted(self.reservations.values(), key=lambda r: r.end, reverse=True):
+            if (r.end - now).total_seconds() < self.min_remaining:
+                continue
+
+            free.extend([r.id] * (r.count - self.used[r.id]))
+
+        return free
+
+    def _wait_for_active(self, lease_ids: List[str]):
+        """Poll the given leases, all in one loop, until every one is active."""
+        waiting = set(lease_ids)
+        deadline = self.clock() + self.active_timeout
+        while True:
+            for lease_id in list(waiting):
+                status = self.backend.get_lease(lease_id)["status"]
+                with self.lock:
+                    self.leases[lease_id] = status
+
+                if status == "ACTIVE":
+                    waiting.discard(lease_id)
+                elif status not in LEASE_USABLE_STATUSES:
+                    raise RuntimeError("lease {} is {}".format(lease_id, status))
+
+            if len(waiting) == 0:
+                return
+
+            if self.clock() > deadline:
+                raise TimeoutError("leases {} not active after {}s".format(sorted(waiting), self.active_timeout))
+
+            self.sleep(self.poll_interval)
+
+    def _forget_leases(self, lease_ids: List[str]):
+        # called with self.lock held
+        for lease_id in lease_ids:
+            self.leases.pop(lease_id, None)
+        for r in [r for r in self.reservations.values() if r.lease_id in lease_ids]:
+            del self.reservations[r.id]
+            self.used.pop(r.id, None)
+
+    def acquire(self, count: int) -> List[str]:
+        """
+        Reserve room for count containers, creating one lease for the
+        devices the pool's leases cannot hold, and wait for every lease
+        handed out to be active.
+
+        :param count: number of containers
+        :type count: int
+        :raises RuntimeError: a lease failed to start
+        :raises TimeoutError: a lease did not start within active_timeout
+        :return: reservation id per container, the same id repeated for a reservation with room for several
+        :rtype: List[str]
+        """
+        with self.lock:
+            ids = self._free()[:count]
+            for reservation_id in ids:
+                self.used[reservation_id] += 1
+
+        lease = None
+        try:
+            missing = count - len(ids)
+            if missing > 0:
+                lease = self.backend.create_lease(
+                        "{}-{}".format(self.prefix, uuid.uuid4().hex[:8]),
+                        missing,
+                        self.device_model,
+                        self.days
+                    )
+                with self.lock:
+                    self._add_lease(lease)
+                    new = [r for r in self._free() if self.reservations[r].lease_id == lease["id"]][:missing]
+                    for reservation_id in new:
+                        self.used[reservation_id] += 1
+                ids.extend(new)
+
+            with self.lock:
+                pending = {
+                    self.reservations[r].lease_id for r in ids
+                    if self.leases[self.reservations[r].lease_id] != "ACTIVE"
+                }
+
+            self._wait_for_active(sorted(pending))
+        except Exception:
+            for reservation_id in ids:
+                self.release(reservation_id)
+
+            # the lease created for this call is not left behind on Chameleon
+            if lease is not None:
+                try:
+                    self.backend.delete_lease(lease["id"])
+                    with self.lock:
+                        self._forget_leases([lease["id"]])
+                except Exception as e:
+                    # kept in the pool, so delete_idle_leases retries it
+                    print("ERROR could not delete lease {}: {}".format(lease["id"], e))
+            raise
+
+        return ids
+
+    def release(self, reservation_id: str):
+        """Give back the room taken by one container."""
+        with self.lock:
+            if self.used.get(reservation_id, 0) > 0:
+                self.used[reservation_id] -= 1
+
+    def delete_idle_leases(self) -> List[str]:
+        """Delete the pool's leases none of whose reservations are in use."""
+        with self.lock:
+            busy = {self.reservations[r].lease_id for r, used in self.used.items() if used > 0}
+            idle = [lease_id for lease_id in self.leases if lease_id not in busy]
+
+        for lease_id in idle:
+            self.backend.delete_lease(lease_id)
+
+        with self.lock:
+            self._forget_leases(idle)
+
+        return idle
+
+    def __str__(self):
+        with self.lock:
+            return "LeasePool: leases={}, reserved={}, used={}".format(
+                    len(self.leases),
+                    sum(r.count for r in self.reservations.values()),
+                    sum(self.used.values())
+                )
+
+class EdgeDeviceProvisioner:
+    def __init__(
+            self,
+            backend,
+            lease_pool: LeasePool,
+            max_concurrency: int = 20,
+            poll_interval: float = 5,
+            active_timeout: float = 600,
+            floating_ip: bool = False,
+            sleep: Callable = time.sleep,
+            clock: Callable = time.monotonic
+        ):
+        """
+        Brings up containers on CHI@Edge devices concurrently: room for all
+        of them is acquired from the lease pool at once, then each container
+        is created, waited on until running and, optionally, given a
+        floating ip on its own thread. The seconds spent in each of PHASES
+        are recorded per device.
+
+        :param backend: ChiBackend or a stand-in with the same methods
+        :param lease_pool: pool the device reservations are taken from
+        :type lease_pool: LeasePool
+        :param max_concurrency: max number of containers being brought up at the same time, defaults to 20
+        :type max_concurrency: int, optional
+        :param poll_interval: seconds between container status checks, defaults to 5
+        :type poll_interval: float, optional
+        :param active_timeout: seconds a container may take to be running, defaults to 600
+        :type active_timeout: float, optional
+        :param floating_ip: whether to associate a floating ip with each container, defaults to False
+        :type floating_ip: bool, optional
+        """
+        self.backend = backend
+        self.lease_pool = lease_pool
+        self.poll_interval = poll_interval
+        self.active_timeout = active_timeout
+        self.floating_ip = floating_ip
+        self.sleep = sleep
+        self.clock = clock
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_concurrency,
+                thread_name_prefix="chi-edge"
+            )
+
+    def _wait_for_active(self, container_id: str):
+        deadline = self.clock() + self.active_timeout
+        while True:
+            status = self.backend.container_status(container_id)
+            if status == CONTAINER_ACTIVE_STATUS:
+                return
+            if status == CONTAINER_ERROR_STATUS:
+                raise RuntimeError("container {} is in {} state".format(container_id, status))
+            if self.clock() > deadline:
+                raise TimeoutError("container {} not running after {}s".format(container_id, self.active_timeout))
+
+            self.sleep(self.poll_interval)
+
+    def _bring_up(self, name: str, image: str, reservation_id: str, lease_latency: float, kwargs: dict) -> EdgeDevice:
+        latencies = {"lease": lease_latency}
+        container_id = None
+        ip = None
+        try:
+            start = self.clock()
+            container_id = self.backend.create_container(name, image, reservation_id, **kwargs)
+            latencies["create"] = self.clock() - start
+
+            start = self.clock()
+            self._wait_for_active(container_id)
+            latencies["active"] = self.clock() - start
+
+            if self.floating_ip:
+                start = self.clock()
+                ip = self.backend.associate_floating_ip(container_id)
+                latencies["floating_ip"] = self.clock() - start
+        except Exception as e:
+            if container_id is not None:
+                try:
+                    self.backend.destroy_container(container_id)
+                except Exception:
+                    pass
+            self.lease_pool.release(reservation_id)
+
+            return EdgeDevice(name, None, reservation_id, None, latencies, str(e))
+
+        return EdgeDevice(name, container_id, reservation_id, ip, latencies, None)
+
+    def provision(self, count: int, image: str, name_prefix: str = "edge-worker", **kwargs) -> List[EdgeDevice]:
+        """
+        Bring up count containers of the given image, each on its own device.
+
+        :param count: number of containers
+        :type count: int
+        :param image: image of the containers
+        :type image: str
+        :param name_prefix: containers are named <name_prefix>-<i>, defaults to "edge-worker"
+        :type name_prefix: str, optional
+        :return: one EdgeDevice per container, including those that failed to come up
+        :rtype: List[EdgeDevice]
+        """
+        start = self.clock()
+        reservation_ids = self.lease_pool.acquire(count)
+        lease_latency = self.clock() - start
+
+        futures = [
+            self.executor.submit(
+                self._bring_up,
+                "{}-{}".format(name_prefix, uuid.uuid4().hex[:8]),
+                image,
+                reservation_id,
+                lease_latency,
+                kwargs
+            ) for reservation_id in reservation_ids
+        ]
+
+        return [f.result() for f in futures]
+
+    def teardown(self, devices: List[EdgeDevice]):
+        """Destroy the containers of the given devices concurrently and give their room back to the pool."""
+        def destroy(device):
+            if device.uuid is None:
+                return
+
+            try:
+                self.backend.destroy_container(device.uuid)
+            except Exception as e:
+                print("ERROR could not destroy container {}: {}".format(device.uuid, e))
+            self.lease_pool.release(device.reservation_id)
+
+        list(self.executor.map(destroy, devices))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+def render_config(configs: List[str]) -> bytes:
+    """Contents of a condor config file holding the given lines, e.g. "CONDOR_HOST = 1.2.3.4"."""
+    return "".join(config + "\n" for config in configs).encode()
+
+class CondorConfigDistributor:
+    def __init__(
+            self,
+            backend,
+            filename: str = "60-condor.conf",
+            config_dir: str = CONDOR_CONFIG_DIR,
+            max_concurrency: int = 20,
+            clock: Callable = time.monotonic
+        ):
+        """
+        Pushes a condor config file to many containers at once, e.g. when
+        the central manager's ip changes. The file is rendered and archived
+        in memory once, then, on one thread per container, its sha256 is
+        compared with the one of the file already in the container, and only
+        containers where it differs get the archive and a condor_reconfig.
+
+        :param backend: ChiBackend or a stand-in with execute() and put_archive()
+        :param filename: name of the config file, defaults to "60-condor.conf"
+        :type filename: str, optional
+        :param config_dir: directory of the config file in the containers, defaults to CONDOR_CONFIG_DIR
+        :type config_dir: str, optional
+        :param max_concurrency: max number of containers being configured at the same time, defaults to 20
+        :type max_concurrency: int, optional
+        """
+        self.backend = backend
+        self.filename = filename
+        self.config_dir = config_dir
+        self.clock = clock
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_concurrency,
+                thread_name_prefix="condor-config"
+            )
+
+    @property
+    def path(self) -> str:
+        return "{}/{}".format(self.config_dir.rstrip("/"), self.filename)
+
+    def _archive(self, data: bytes) -> bytes:
+        info = tarfile.TarInfo(self.filename)
+        info.size = len(data)
+        info.mode = 0o644
+        info.mtime = int(time.time())
+
+        buf = io.BytesIO()
+        with tarfile.open(fileobj=buf, mode="w") as tar:
+            tar.addfile(info, io.BytesIO(data))
+
+        return buf.getvalue()
+
+    def _current_digest(self, container_id: str) -> str:
+        resp = self.backend.execute(container_id, "sha256sum {}".format(shlex.quote(self.path)))
+        if resp["exit_code"] != 0:
+            return None
+
+        return resp["output"].split()[0] if resp["output"].strip() else None
+
+    def _push_one(self, container_id: str, archive: bytes, digest: str, force: bool) -> ConfigResult:
+        start = self.clock()
+        try:
+            if not force and self._current_digest(container_id) == digest:
+                return ConfigResult(container_id, "unchanged", self.clock() - start, None)
+
+            self.backend.put_archive(container_id, self.config_dir, archive)
+
+            resp = self.backend.execute(container_id, "condor_reconfig")
+            if resp["exit_code"] != 0:
+                raise RuntimeError("condor_reconfig exited with {}: {}".format(resp["exit_code"], resp["output"]))
+        except Exception as e:
+            return ConfigResult(container_id, "failed", self.clock() - start, str(e))
+
+        return ConfigResult(container_id, "updated", self.clock() - start, None)
+
+    def push(self, container_ids: List[str], configs: List[str], force: bool = False) -> Dict[str, ConfigResult]:
+        """
+        Make the config file of every given container hold configs and have
+        its daemons reread it.
+
+        :param container_ids: containers to configure
+        :type container_ids: List[str]
+        :param configs: lines of the config file
+        :type configs: List[str]
+        :param force: upload and reconfig even where the file is already up to date, defaults to False
+        :type force: bool, optional
+        :return: result per container
+        :rtype: Dict[str, ConfigResult]
+        """
+        data = render_config(configs)
+        digest = hashlib.sha256(data).hexdigest()
+        archive = self._archive(data)
+
+        futures = {
+            container_id: self.executor.submit(self._push_one, container_id, archive, digest, force) 
+            for container_id in container_ids
+        }
+
+        return {container_id: f.result() for container_id, f in futures.items()}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+def print_config_results(results: Dict[str, ConfigResult], wall: float):
+    for r in results.values():
+        if r.error is not None:
+            print("FAILED {}: {}".format(r.container, r.error))
+
+    counts = collections.Counter(r.status for r in results.values())
+    print("configured {} containers in {:.1f}s: {}".format(
+            len(results), 
+            wall, 
+            ", ".join("{}={}".format(status, counts[status]) for status in ("updated", "unchanged", "failed"))
+        ))
+
+def summarize(devices: List[EdgeDevice]) -> Dict[str, dict]:
+    """n, mean and max seconds per phase over the devices that were brought up."""
+    summary = dict()
+    for phase in PHASES:
+        latencies = [d.latencies[phase] for d in devices if d.error is None and phase in d.latencies]
+        if len(latencies) > 0:
+            summary[phase] = {"n": len(latencies), "mean": sum(latencies) / len(latencies), "max": max(latencies)}
+
+    return summary
+
+def print_summary(devices: List[EdgeDevice], wall: float):
+    for d in devices:
+        if d.error is not None:
+            print("FAILED {}: {}".format(d.name, d.error))
+
+    print("{} of {} devices up in {:.1f}s".format(sum(1 for d in devices if d.error is None), len(devices), wall))
+    for phase, s in summarize(devices).items():
+        print("{} latency: n={}, mean={:.2f}s, max={:.2f}s".format(phase, s["n"], s["mean"], s["max"]))
+
+def parse_env(value: str) -> tuple:
+    key, sep, val = value.partition("=")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected KEY=VALUE, got {}".format(value))
+
+    return key, val
+
+def parse_args(args=sys.argv[1:]):
+    parser = argparse.ArgumentParser(description="bring up and configure containers on CHI@Edge devices")
+    parser.add_argument("--project-name", default=None, help="project to charge leases to")
+    parser.add_argument("--concurrency", type=int, default=20, help="max number of containers handled at the same time")
+
+    subparsers = parser.add_subparsers(dest="cmd", required=True, help="action to take")
+
+    parser_up = subparsers.add_parser("up", help="bring up containers, each on its own device")
+    parser_up.set_defaults(cmd="up")
+    parser_up.add_argument("count", type=int, help="number of devices to bring up")
+    parser_up.add_argument("--image", default="ryantanaka/condor9-arm64-isi-worker", help="image of the containers")
+    parser_up.add_argument("--name-prefix", default="edge-worker", help="containers are named <prefix>-<random suffix>")
+    parser_up.add_argument("--env", type=parse_env, action="append", default=None, metavar="KEY=VALUE", help="environment variable of the containers, may be given multiple times")
+    parser_up.add_argument("--token-file", default=None, help="file holding the token passed as TOKEN to the containers")
+    parser_up.add_argument("--lease-prefix", default="edge-workers", help="leases named <prefix>-* are reused and new ones are named so")
+    parser_up.add_argument("--device-model", default="4", help="model of the devices to reserve")
+    parser_up.add_argument("--lease-days", type=int, default=1, help="duration of new leases")
+    parser_up.add_argument("--poll-interval", type=float, default=5, help="seconds between lease and container status checks")
+    parser_up.add_argument("--floating-ip", action="store_true", help="associate a floating ip with each container")
+
+    parser_configure = subparsers.add_parser("configure", help="push a condor config file to containers and reconfig them")
+    parser_configure.set_defaults(cmd="configure")
+    parser_configure.add_argument("containers", nargs="+", help="ids of the containers to configure")
+    parser_configure.add_argument(
+        "--config", 
+        dest="configs", 
+        action="append", 
+        required=True, 
+        help="line of the config file, e.g. \"CONDOR_HOST = 1.2.3.4\", may be given multiple times"
+    )
+    parser_configure.add_argument("--filename", default="60-condor.conf", help="name of the config file in {}".format(CONDOR_CONFIG_DIR))
+    parser_configure.add_argument("--force", action="store_true", help="push even to containers whose config is up to date")
+
+    return parser.parse_args(args)
+
+if __name__=="__main__":
+    args = parse_args()
+    backend = ChiBackend(project_name=args.project_name)
+
+    if args.cmd == "up":
+        environment = dict(args.env or [])
+        if args.token_file is not None:
+            with open(args.token_file) as f:
+                environment["TOKEN"] = f.read().strip()
+
+        lease_pool = LeasePool(
+                backend,
+                prefix=args.lease_prefix,
+                device_model=args.device_model,
+                days=args.lease_days,
+                poll_interval=args.poll_interval
+            )
+        lease_pool.refresh()
+        print(lease_pool)
+
+        provisioner = EdgeDeviceProvisioner(
+                backend,
+                lease_pool,
+                max_concurrency=args.concurrency,
+                poll_interval=args.poll_interval,
+                floating_ip=args.floating_ip
+            )
+
+        start = time.monotonic()
+        devices = provisioner.provision(args.count, args.image, args.name_prefix, environment=environment)
+        print_summary(devices, time.monotonic() - start)
+        for d in devices:
+            if d.error is None:
+                print("{} {} {}".format(d.name, d.uuid, d.ip or ""))
+
+        provisioner.close()
+    elif args.cmd == "configure":
+        distributor = CondorConfigDistributor(backend, filename=args.filename, max_concurrency=args.concurrency)
+
+        start = time.monotonic()
+        results = distributor.push(args.containers, args.configs, force=args.force)
+        print_config_results(results, time.monotonic() - start)
+
+        distributor.close()
+    else:
+        raise RuntimeError("unexpected cmd: {}".format(args.cmd))
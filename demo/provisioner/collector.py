@@ -1,18 +1,20 @@
 #!/usr/bin/env python3
-import time
-import os
+import collections
+
 import htcondor
-import classad
+
+from dashboard import Dashboard, Poller
 
 col = htcondor.Collector()
-while True:
+
+def fetch():
     slots = col.query(
                 htcondor.AdTypes.Startd,
                 projection=["Name", "Activity", "State", "Arch"]
             )
 
     # num unclaimed and idle per architecture
-    result = {"X86_64": 0, "aarch64": 0}
+    result = collections.OrderedDict([("X86_64", 0), ("aarch64", 0)])
     num_total_available = 0
     for s in slots:
         arch = s["Arch"]
@@ -20,20 +22,15 @@ while True:
         activity = s["Activity"]
 
         if state == "Unclaimed" and activity == "Idle":
-            result[arch] += 1
+            result[arch] = result.get(arch, 0) + 1
             num_total_available += 1
 
-    for arch, count in result.items():
-        print("{0:>15}: {1} {2}".format(arch, "{} ".format(chr(9605))*count, count))
-
-    print("{0:>15}: {1} {2}".format(
-                    "Unavailable", 
-                    "{} ".format(chr(9605)) * (len(slots) - num_total_available), 
-                    len(slots) - num_total_available
-                )
-            )
-
-    time.sleep(1)
-    os.system("clear")
+    rows = list(result.items())
+    rows.append(("Unavailable", len(slots) - num_total_available))
 
+    return {"SLOTS": rows}
 
+try:
+    Dashboard("unclaimed idle slots per arch").run(Poller(fetch, 1))
+except KeyboardInterrupt:
+    pass
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+import argparse
+import random
+import tempfile
+import time
+
+from collections import namedtuple
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence, Tuple
+
+import htcondor
+
+# node status file written by DAGMan next to the dag file, read by
+# `provision --dag`
+DAG_STATUS_FILE = "dag.status"
+
+DAG_FILE = "dagfile.dag"
+SUBMIT_FILE = "node.sub"
+
+# max number of node names on a single PARENT ... CHILD line; larger sets
+# of edges are split over several lines
+MAX_NAMES_PER_LINE = 1000
+
+# lines buffered before each write
+LINES_PER_WRITE = 10000
+
+# a set of edges, every parent (index in the previous layer) to every child
+# (index in the current layer)
+Edges = Tuple[Sequence[int], Sequence[int]]
+
+DagStats = namedtuple("DagStats", ["dag_file", "nodes", "edges", "bytes", "generate_seconds", "write_seconds"])
+
+class DagShape:
+    """
+    Layered DAG generated one layer at a time, so that a DAG of any size is
+    never held in memory: only the width of the previous layer is needed to
+    produce the edges into the next one.
+    """
+    def layers(self) -> Iterator[Tuple[int, Iterable[Edges]]]:
+        """
+        Width of each layer, with the edges from the previous layer to it
+        (none for the first one). Iterating again yields the same DAG.
+        """
+        raise NotImplementedError
+
+class ForkJoin(DagShape):
+    def __init__(self, num_layers: int, layer_width: int, seed: int = None):
+        """
+        Layers alternating between a single node and layer_width nodes, each
+        layer depending on the whole previous one.
+        """
+        self.num_layers = num_layers
+        self.layer_width = layer_width
+
+    def layers(self) -> Iterator[Tuple[int, Iterable[Edges]]]:
+        prev = None
+        for i in range(self.num_layers):
+            # odd layers are of width layer_width, even ones of width 1
+            width = self.layer_width if i % 2 != 0 else 1
+            yield width, [(range(prev), range(width))] if prev is not None else []
+            prev = width
+
+class RandomLayered(DagShape):
+    def __init__(self, num_layers: int, layer_width: int, seed: int = None, fan_in: int = 2):
+        """
+        Layers of a random width in [1, layer_width], each node depending on
+        up to fan_in random nodes of the previous layer.
+        """
+        self.num_layers = num_layers
+        self.layer_width = layer_width
+        self.seed = seed
+        self.fan_in = fan_in
+
+    def layers(self) -> Iterator[Tuple[int, Iterable[Edges]]]:
+        rng = random.Random(self.seed)
+
+        def edges(prev, width):
+            k = min(self.fan_in, prev)
+            for x in range(width):
+                yield sorted(rng.sample(range(prev), k)), (x,)
+
+        prev = None
+        for _ in range(self.num_layers):
+            width = rng.randint(1, self.layer_width)
+            # the edges into a layer are drawn before the next layer's width
+            yield width, list(edges(prev, width)) if prev is not None else []
+            prev = width
+
+class Diamond(DagShape):
+    def __init__(self, num_layers: int, layer_width: int, seed: int = None):
+        """
+        Layers widening from a single node to layer_width nodes halfway and
+        back to a single node, each node depending on its neighbours in the
+        previous layer, both layers being laid out over the same span.
+        """
+        self.num_layers = num_layers
+        self.layer_width = layer_width
+
+    def width(self, i: int) -> int:
+        if self.num_layers == 1:
+            return 1
+        # distance from the middle layer, 0 in the middle and 1 at both ends
+        distance = abs(2 * i - (self.num_layers - 1)) / (self.num_layers - 1)
+        return 1 + round((self.layer_width - 1) * (1 - distance))
+
+    @staticmethod
+    def neighbours(x: int, width: int, prev: int) -> range:
+        """Nodes of the previous layer adjacent to node x of the current one."""
+        if prev == 1 or width == 1:
+            return range(prev)
+
+        if width >= prev:
+            # every child sits between at most two parents
+            lo = x * (prev - 1) // (width - 1)
+            hi = -(-x * (prev - 1) // (width - 1))
+        else:
+            # every parent sits between at most two children, i.e. in the
+            # open interval (x - 1, x + 1) once scaled to the current layer
+            lo = (x - 1) * (prev - 1) // (width - 1) + 1
+            hi = -(-(x + 1) * (prev - 1) // (width - 1)) - 1
+
+        return range(max(lo, 0), min(hi, prev - 1) + 1)
+
+    def layers(self) -> Iterator[Tuple[int, Iterable[Edges]]]:
+        prev = None
+        for i in range(self.num_layers):
+            width = self.width(i)
+            if prev is None:
+                yield width, []
+            else:
+                yield width, ((self.neighbours(x, width, prev), (x,)) for x in range(width))
+            prev = width
+
+DAG_SHAPES = {
+    "forkjoin": ForkJoin,
+    "random": RandomLayered,
+    "diamond": Diamond
+}
+
+def layer_name(i: int) -> str:
+    return "top" if i == 0 else "layer_{}".format(i)
+
+def make_dag_dir(base: Path, shape: str) -> Path:
+    """New, uniquely named, directory under base for a single DAG."""
+    base.mkdir(parents=True, exist_ok=True)
+
+    return Path(tempfile.mkdtemp(prefix="{:%Y%m%d-%H%M%S}-{}-".format(datetime.now(), shape), dir=base))
+
+def _chunks(seq: Sequence[int], size: int) -> Iterator[Sequence[int]]:
+    for start in range(0, len(seq), size):
+        yield seq[start:start + size]
+
+def write_dag(
+        shape: DagShape,
+        dag_dir: Path,
+        submit_description: htcondor.Submit,
+        assign: Callable = None,
+        status_update_time: int = 5
+    ) -> DagStats:
+    """
+    Stream the JOB, VARS and PARENT/CHILD lines of a DAG to dag_dir as its
+    layers are generated, in the format of htcondor.dags.write_dag. Every
+    node runs the same submit description, with the VARS num ("<layer>_<x>")
+    and, when assign is given, arch.
+
+    :param shape: DAG to write
+    :type shape: DagShape
+    :param dag_dir: existing directory the dag and submit files are written to
+    :type dag_dir: Path
+    :param submit_description: job of every node
+    :type submit_description: htcondor.Submit
+    :param assign: given the width of a layer, returns its number of nodes per arch, defaults to None
+    :type assign: Callable, optional
+    :param status_update_time: seconds between updates of the node status file, defaults to 5
+    :type status_update_time: int, optional
+    :return: path of the dag file, counts and seconds spent generating and writing lines
+    :rtype: DagStats
+    """
+    with (dag_dir / SUBMIT_FILE).open("w") as f:
+        f.write("{}\nqueue\n".format(submit_description))
+
+    dag_file = dag_dir / DAG_FILE
+    nodes = edges = size = 0
+    write_seconds = 0.0
+    start = time.monotonic()
+
+    with dag_file.open("w", buffering=1 << 20) as f:
+        lines = [
+            "# BEGIN META\n",
+            "NODE_STATUS_FILE {} {}\n".format(DAG_STATUS_FILE, status_update_time),
+            "# END META\n",
+            "# BEGIN NODES AND EDGES\n"
+        ]
+
+        def flush():
+            nonlocal lines, size, write_seconds
+            text = "".join(lines)
+            lines = list()
+
+            t = time.monotonic()
+            f.write(text)
+            write_seconds += time.monotonic() - t
+            size += len(text)
+
+        for i, (width, layer_edges) in enumerate(shape.layers()):
+            name = layer_name(i)
+
+            # nodes are given their arch in runs, first come the ones of the
+            # first arch of the placement, etc.
+            placement = assign(width) if assign is not None else {None: width}
+            first = 0
+            for arch, count in placement.items():
+                arch_var = ' arch="{}"'.format(arch) if arch is not None else ""
+                for x in range(first, first + count):
+                    lines.append("JOB {0}:{2} {3}\nVARS {0}:{2} num=\"{1}_{2}\"{4}\n".format(
+                            name, i, x, SUBMIT_FILE, arch_var
+                        ))
+                    if len(lines) >= LINES_PER_WRITE:
+                        flush()
+                first += count
+            nodes += width
+
+            prev_name = layer_name(i - 1)
+            for parents, children in layer_edges:
+                edges += len(parents) * len(children)
+                for parent_chunk in _chunks(parents, MAX_NAMES_PER_LINE):
+                    parent_names = " ".join("{}:{}".format(prev_name, p) for p in parent_chunk)
+                    for child_chunk in _chunks(children, MAX_NAMES_PER_LINE):
+                        lines.append("PARENT {} CHILD {}\n".format(
+                                parent_names,
+                                " ".join("{}:{}".format(name, c) for c in child_chunk)
+                            ))
+                        if len(lines) >= LINES_PER_WRITE:
+                            flush()
+
+        lines.append("# END NODES AND EDGES\n")
+        flush()
+
+        t = time.monotonic()
+    # closing the file writes out what is left in its buffer
+    write_seconds += time.monotonic() - t
+
+    total = time.monotonic() - start
+
+    return DagStats(dag_file, nodes, edges, size, total - write_seconds, write_seconds)
+
+def print_dag_stats(stats: DagStats):
+    total = stats.generate_seconds + stats.write_seconds
+    print("wrote {} nodes and {} edges ({:.1f} MB) to {} in {:.2f} seconds".format(
+            stats.nodes, stats.edges, stats.bytes / 1e6, stats.dag_file, total
+        ))
+    print("generate: {:.2f}s ({:.0f} nodes/s), write: {:.2f}s ({:.1f} MB/s), overall: {:.0f} nodes/s".format(
+            stats.generate_seconds,
+            stats.nodes / stats.generate_seconds if stats.generate_seconds > 0 else float("inf"),
+            stats.write_seconds,
+            stats.bytes / 1e6 / stats.write_seconds if stats.write_seconds > 0 else float("inf"),
+            stats.nodes / total if total > 0 else float("inf")
+        ))
+
+def parse_positive_int(value: str) -> int:
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError("expected a positive integer, got {}".format(value))
+
+    return int(value)
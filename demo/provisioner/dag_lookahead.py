@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+import enum
+import re
+import shlex
+
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+from arch_model import ARCH_CUSTOM_ATTRIBUTE
+
+class NodeStatus(enum.Enum):
+    """Node states as reported in a DAGMan node status file."""
+    NOT_READY = 0
+    READY = 1
+    PRERUN = 2
+    SUBMITTED = 3
+    POSTRUN = 4
+    DONE = 5
+    ERROR = 6
+    FUTILE = 7
+
+# nodes in these states have a job in (or on its way out of) the queue
+ACTIVE_STATUSES = {NodeStatus.PRERUN.value, NodeStatus.SUBMITTED.value, NodeStatus.POSTRUN.value}
+
+# nodes in these states have not been submitted yet
+WAITING_STATUSES = {NodeStatus.NOT_READY.value, NodeStatus.READY.value}
+
+class DagNode:
+    def __init__(self, name: str, arch: str = None, noop: bool = False, key: str = None):
+        """
+        A single node of a DAG.
+
+        :param name: node name
+        :type name: str
+        :param arch: value of REQUIRED_ARCH for the node's job, None if not set
+        :type arch: str, optional
+        :param noop: whether the node is a NOOP node that DAGMan never submits, defaults to False
+        :type noop: bool, optional
+        :param key: nodes with the same key (e.g. the same submit file) share a runtime estimate, defaults to name
+        :type key: str, optional
+        """
+        self.name = name
+        self.arch = arch
+        self.noop = noop
+        self.key = key if key is not None else name
+        self.parents = list()
+        self.children = list()
+
+    def __repr__(self):
+        return "DagNode(name={}, arch={}, noop={})".format(self.name, self.arch, self.noop)
+
+def _read_submit_arch(lines: Iterable[str]) -> str:
+    """Value of +REQUIRED_ARCH (or MY.REQUIRED_ARCH) in a submit description."""
+    pattern = re.compile(r"^\s*(?:\+|MY\.){}\s*=\s*(.+?)\s*$".format(ARCH_CUSTOM_ATTRIBUTE), re.IGNORECASE)
+    for line in lines:
+        match = pattern.match(line)
+        if match:
+            return match.group(1).strip('"')
+
+    return None
+
+def _split_dag_line(line: str) -> List[str]:
+    """
+    Tokens of a DAG file line with any # comment removed. Node names cannot
+    contain whitespace, so only lines with quotes or escapes (e.g. VARS
+    values) need shlex, which is an order of magnitude slower than
+    str.split on the JOB and PARENT/CHILD lines that make up most of a DAG.
+    """
+    if '"' not in line and "'" not in line and "\\" not in line:
+        return line.split("#", 1)[0].split()
+
+    try:
+        return shlex.split(line, comments=True)
+    except ValueError:
+        # unbalanced quotes, e.g. in VARS values we don't care about
+        return line.split()
+
+def parse_dag_file(dag_file: str) -> Dict[str, DagNode]:
+    """
+    Parse the JOB, VARS, PARENT/CHILD and SUBMIT-DESCRIPTION lines of a DAG
+    file (as written by htcondor.dags.write_dag). The arch of each node is
+    read from +REQUIRED_ARCH in its submit description, with a $(macro)
+    value taken from the node's VARS. SPLICE and SUBDAG lines are not
+    followed.
+
+    :param dag_file: path to the .dag file
+    :type dag_file: str
+    :return: nodes by name
+    :rtype: Dict[str, DagNode]
+    """
+    dag_file = Path(dag_file)
+    dag_dir = dag_file.parent
+
+    nodes = dict()
+    # node name -> (submit file or inline description name, node DIR)
+    submit_of = dict()
+    inline = dict()
+    edges = list()
+    # node name -> VARS macros
+    node_vars = dict()
+
+    with dag_file.open("r") as f:
+        lines = iter(f.readlines())
+
+    for line in lines:
+        tokens = _split_dag_line(line)
+        if len(tokens) == 0:
+            continue
+
+        keyword = tokens[0].upper()
+        if keyword == "JOB" and len(tokens) >= 3:
+            name, submit = tokens[1], tokens[2]
+            upper = [t.upper() for t in tokens[3:]]
+            node_dir = tokens[3 + upper.index("DIR") + 1] if "DIR" in upper else "."
+            nodes[name] = DagNode(name, noop="NOOP" in upper, key=submit)
+            submit_of[name] = (submit, node_dir)
+
+        elif keyword == "SUBMIT-DESCRIPTION" and len(tokens) >= 2:
+            body = list()
+            for body_line in lines:
+                if body_line.strip() == "}":
+                    break
+                body.append(body_line)
+            inline[tokens[1]] = body
+
+        elif keyword == "VARS" and len(tokens) >= 2:
+            macros = node_vars.setdefault(tokens[1], dict())
+            for token in tokens[2:]:
+                key, sep, value = token.partition("=")
+                if sep:
+                    macros[key] = value
+
+        elif keyword == "PARENT" and "CHILD" in tokens:
+            split = tokens.index("CHILD")
+            edges.append((tokens[1:split], tokens[split + 1:]))
+
+    # submit files are shared by all nodes of a layer, read each only once
+    arch_of_submit = dict()
+    for name, (submit, node_dir) in submit_of.items():
+        if submit not in arch_of_submit:
+            if submit in inline:
+                arch_of_submit[submit] = _read_submit_arch(inline[submit])
+            else:
+                path = dag_dir / node_dir / submit
+                try:
+                    with path.open("r") as f:
+                        arch_of_submit[submit] = _read_submit_arch(f)
+                except OSError:
+                    arch_of_submit[submit] = None
+
+        arch = arch_of_submit[submit]
+        macro = re.match(r"^\$\((\w+)\)$", arch or "")
+        if macro:
+            arch = node_vars.get(name, dict()).get(macro.group(1))
+
+        nodes[name].arch = arch
+
+    for parents, children in edges:
+        for p in parents:
+            for c in children:
+                if p in nodes and c in nodes:
+                    nodes[p].children.append(nodes[c])
+                    nodes[c].parents.append(nodes[p])
+
+    return nodes
+
+def parse_node_status_file(status_file: str) -> Dict[str, int]:
+    """
+    Read the status of every node from a DAGMan node status file
+    (NODE_STATUS_FILE), which is a sequence of ClassAds, one per node.
+
+    :param status_file: path to the node status file
+    :type status_file: str
+    :return: NodeStatus value per node name
+    :rtype: Dict[str, int]
+    """
+    with open(status_file, "r") as f:
+        text = f.read()
+
+    statuses = dict()
+    for block in re.findall(r"\[(.*?)\]", text, re.DOTALL):
+        if not re.search(r'Type\s*=\s*"NodeStatus"', block):
+            continue
+
+        node = re.search(r'Node\s*=\s*"([^"]*)"', block)
+        status = re.search(r"NodeStatus\s*=\s*(\d+)", block)
+        if node and status:
+            statuses[node.group(1)] = int(status.group(1))
+
+    return statuses
+
+class DagLookahead:
+    def __init__(self, nodes: Dict[str, DagNode], default_runtime: float = None, alpha: float = 0.3):
+        """
+        Predicts, per arch, how many nodes of a DAG will become ready once
+        the currently running nodes finish, so that workers can be started
+        ahead of a layer boundary rather than after the jobs are already
+        idle in the queue.
+
+        The time at which each node is first seen active is recorded, and the
+        runtime of nodes sharing a key (submit file) is tracked with an EWMA,
+        so that a child is only counted once its parents are expected to
+        finish within the lead time given to predict().
+
+        :param nodes: nodes of the DAG by name
+        :type nodes: Dict[str, DagNode]
+        :param default_runtime: runtime, in seconds, assumed before any node has finished, defaults to None (children of active nodes are always counted)
+        :type default_runtime: float, optional
+        :param alpha: weight of the latest observed runtime in the EWMA, defaults to 0.3
+        :type alpha: float, optional
+        """
+        self.nodes = nodes
+        self.default_runtime = default_runtime
+        self.alpha = alpha
+
+        self.statuses = {name: NodeStatus.NOT_READY.value for name in nodes}
+        # node name -> time it was first seen active
+        self.active_since = dict()
+        # node key -> EWMA of observed runtimes
+        self.runtimes = dict()
+
+    @classmethod
+    def from_dag_file(cls, dag_file: str, **kwargs) -> "DagLookahead":
+        return cls(parse_dag_file(dag_file), **kwargs)
+
+    def update(self, statuses: Dict[str, int], now: float):
+        """
+        Apply the latest node statuses.
+
+        :param statuses: NodeStatus value per node name, nodes left out keep their previous status
+        :type statuses: Dict[str, int]
+        :param now: current time, in seconds
+        :type now: float
+        """
+        for name, status in statuses.items():
+            if name not in self.nodes:
+                continue
+
+            prev = self.statuses[name]
+            if status in ACTIVE_STATUSES and name not in self.active_since:
+                self.active_since[name] = now
+            elif status == NodeStatus.DONE.value and prev != NodeStatus.DONE.value and name in self.active_since:
+                key = self.nodes[name].key
+                runtime = now - self.active_since.pop(name)
+                if key in self.runtimes:
+                    self.runtimes[key] = self.alpha * runtime + (1 - self.alpha) * self.runtimes[key]
+                else:
+                    self.runtimes[key] = runtime
+
+            self.statuses[name] = status
+
+    def _finishes_within(self, node: DagNode, now: float, lead_time: float, memo: dict) -> bool:
+        """Whether node is done or is expected to be done within lead_time."""
+        if node.name in memo:
+            return memo[node.name]
+
+        status = self.statuses[node.name]
+        if status == NodeStatus.DONE.value:
+            result = True
+        elif node.noop:
+            # NOOP nodes complete as soon as their parents do
+            result = status in WAITING_STATUSES and all(
+                self._finishes_within(p, now, lead_time, memo) for p in node.parents
+            )
+        elif status in ACTIVE_STATUSES:
+            runtime = self.runtimes.get(node.key, self.default_runtime)
+            if runtime is None:
+                result = True
+            else:
+                remaining = self.active_since.get(node.name, now) + runtime - now
+                result = remaining <= lead_time
+        else:
+            result = False
+
+        memo[node.name] = result
+
+        return result
+
+    def predict(self, now: float, lead_time: float, queued: Set[str] = frozenset()) -> Dict[str, int]:
+        """
+        Count, per arch, nodes that have not been submitted yet but whose
+        parents are all done or expected to be done within lead_time, and
+        that therefore will need a worker within lead_time. Nodes whose
+        parents are all already done are counted too, since DAGMan may not
+        have submitted them yet, unless their job is already in queued: the
+        status file lags the queue, and those jobs are counted as idle jobs.
+
+        :param now: current time, in seconds
+        :type now: float
+        :param lead_time: how far ahead, in seconds, to look (e.g. worker start latency)
+        :type lead_time: float
+        :param queued: names of the nodes whose jobs are in the queue, defaults to frozenset()
+        :type queued: Set[str], optional
+        :return: number of nodes about to become ready per arch
+        :rtype: Dict[str, int]
+        """
+        memo = dict()
+        result = dict()
+        for node in self.imminent_candidates():
+            if node.noop or node.arch is None or node.name in queued:
+                continue
+
+            if all(self._finishes_within(p, now, lead_time, memo) for p in node.parents):
+                result[node.arch] = result.get(node.arch, 0) + 1
+
+        return result
+
+    def imminent_candidates(self) -> List[DagNode]:
+        """
+        Unsubmitted nodes with at least one parent that is active or done,
+        or reachable only through NOOP nodes from such a parent. Unsubmitted
+        nodes further down the DAG cannot become ready within one layer.
+        """
+        seen = set()
+        candidates = list()
+        frontier = [
+            self.nodes[name] for name, status in self.statuses.items()
+            if status in ACTIVE_STATUSES or status == NodeStatus.DONE.value
+        ]
+
+        while len(frontier) > 0:
+            node = frontier.pop()
+            for child in node.children:
+                if child.name in seen or self.statuses[child.name] not in WAITING_STATUSES:
+                    continue
+
+                seen.add(child.name)
+                candidates.append(child)
+                if child.noop:
+                    frontier.append(child)
+
+        # roots that have not been submitted yet are imminent as well
+        for node in self.nodes.values():
+            if len(node.parents) == 0 and node.name not in seen and self.statuses[node.name] in WAITING_STATUSES:
+                candidates.append(node)
+
+        return candidates
+
+class DagStatusWatcher:
+    def __init__(self, dag_file: str, status_file: str, default_runtime: float = None):
+        """
+        DagLookahead fed from the node status file DAGMan writes for a
+        running DAG (see NODE_STATUS_FILE).
+
+        :param dag_file: path to the .dag file
+        :type dag_file: str
+        :param status_file: path to the node status file
+        :type status_file: str
+        :param default_runtime: runtime, in seconds, assumed before any node has finished, defaults to None
+        :type default_runtime: float, optional
+        """
+        self.status_file = Path(status_file)
+        self.lookahead = DagLookahead.from_dag_file(dag_file, default_runtime=default_runtime)
+        self._mtime = None
+
+    def predict(self, now: float, lead_time: float, queued: Set[str] = frozenset()) -> Dict[str, int]:
+        """
+        Re-read the node status file if it has changed and predict the
+        number of nodes about to become ready per arch.
+
+        :param now: current time, in seconds
+        :type now: float
+        :param lead_time: how far ahead, in seconds, to look
+        :type lead_time: float
+        :param queued: names of the nodes whose jobs are in the queue, defaults to frozenset()
+        :type queued: Set[str], optional
+        :return: number of nodes about to become ready per arch
+        :rtype: Dict[str, int]
+        """
+        try:
+            mtime = self.status_file.stat().st_mtime
+        except OSError:
+            # DAGMan has not written the file yet
+            mtime = None
+
+        if mtime is not None and mtime != self._mtime:
+            self._mtime = mtime
+            self.lookahead.update(parse_node_status_file(str(self.status_file)), now)
+
+        return self.lookahead.predict(now, lead_time, queued)
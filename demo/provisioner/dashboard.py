@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+import collections
+import shutil
+import sys
+import threading
+import time
+
+from typing import Callable, Dict, List, Tuple
+
+# rows of a dashboard: (label, value) per section title, in display order
+Sections = Dict[str, List[Tuple[str, float]]]
+
+BAR_CHAR = chr(9605)
+SPARK_CHARS = " " + "".join(chr(c) for c in range(9601, 9609))
+
+class Poller:
+    def __init__(self, fetch: Callable, interval: float):
+        """
+        Calls fetch every interval seconds on a daemon thread and keeps the
+        latest result, so that a slow fetch never blocks whoever reads it.
+
+        :param fetch: callable returning the data to display
+        :type fetch: Callable
+        :param interval: seconds between the start of two fetches
+        :type interval: float
+        """
+        self.fetch = fetch
+        self.interval = interval
+
+        # latest result, time.monotonic() it was fetched at, and number of
+        # results fetched so far
+        self.result = None
+        self.ts = None
+        self.seq = 0
+        # message of the last failed fetch, None after a successful one
+        self.error = None
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="poller", daemon=True)
+        self._lock = threading.Lock()
+
+    def _run(self):
+        deadline = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                result = self.fetch()
+                with self._lock:
+                    self.result = result
+                    self.ts = time.monotonic()
+                    self.seq += 1
+                    self.error = None
+            except Exception as e:
+                with self._lock:
+                    self.error = str(e)
+
+            deadline = max(deadline + self.interval, time.monotonic())
+            self._stop.wait(deadline - time.monotonic())
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout: float = 1.0):
+        """Stop polling, waiting up to timeout seconds for a fetch in progress."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def latest(self) -> tuple:
+        """(result, time fetched, sequence number, error) of the latest fetch"""
+        with self._lock:
+            return self.result, self.ts, self.seq, self.error
+
+def bar(value: float, max_value: float, width: int) -> str:
+    """Bar of value, scaled so that max_value takes width characters."""
+    if value <= 0 or width <= 0:
+        return ""
+
+    scale = min(1.0, width / max_value) if max_value > 0 else 1.0
+
+    return BAR_CHAR * max(1, int(round(value * scale)))
+
+def sparkline(values: List[float], width: int) -> str:
+    """The last width values, each as a block scaled to the max of them."""
+    values = list(values)[-width:] if width > 0 else list()
+    top = max(values) if len(values) > 0 else 0
+    if top <= 0:
+        return " " * len(values)
+
+    return "".join(SPARK_CHARS[int(round(v / top * (len(SPARK_CHARS) - 1)))] for v in values)
+
+class Dashboard:
+    def __init__(self, title: str, history: int = 60, out=sys.stdout):
+        """
+        Terminal dashboard of labelled values grouped in sections. Each value
+        is drawn as a bar scaled to the terminal width, followed by a
+        sparkline of its last history values. Only rows whose text changed
+        since the last frame are rewritten, using ANSI cursor addressing,
+        so nothing is cleared and the terminal does not flicker. When out is
+        not a terminal, a plain frame is printed for every new result.
+
+        :param title: first row of the dashboard
+        :type title: str
+        :param history: max number of past values kept, and shown, per row, defaults to 60
+        :type history: int, optional
+        :param out: stream to draw to, defaults to sys.stdout
+        """
+        self.title = title
+        self.history = history
+        self.out = out
+        self.tty = hasattr(out, "isatty") and out.isatty()
+
+        # (section, label) -> past values
+        self.values = collections.defaultdict(lambda: collections.deque(maxlen=self.history))
+
+        self._rows = list()
+        self._size = None
+        self._seq = None
+
+    def _build(self, sections: Sections, status: str, width: int) -> List[str]:
+        label_width = max([len(label) for rows in sections.values() for label, _ in rows] + [8])
+        value_width = 6
+        spark_width = min(self.history, max(0, (width - label_width - value_width - 3) // 3))
+        bar_width = width - label_width - value_width - spark_width - 3
+
+        max_value = max([v for rows in sections.values() for _, v in rows] + [0])
+
+        rows = [self.title[:width], status[:width]]
+        for section, section_rows in sections.items():
+            rows.append("**** {} ".format(section).ljust(width, "*")[:width])
+            for label, value in section_rows:
+                history = self.values[(section, label)]
+                rows.append("{0:>{lw}} {1:>{vw}} {2:<{bw}} {3}".format(
+                        label[:label_width],
+                        "{:g}".format(value),
+                        bar(value, max_value, bar_width),
+                        sparkline(history, spark_width),
+                        lw=label_width,
+                        vw=value_width,
+                        bw=max(0, bar_width)
+                    )[:width])
+
+        return rows
+
+    def update(self, sections: Sections, seq: int):
+        """Record the values of a new result, once per result."""
+        if seq == self._seq:
+            return
+
+        self._seq = seq
+        for section, rows in sections.items():
+            for label, value in rows:
+                self.values[(section, label)].append(value)
+
+    def render(self, sections: Sections, status: str):
+        """Draw a frame, rewriting only the rows that changed since the last one."""
+        size = shutil.get_terminal_size()
+        rows = self._build(sections, status, size.columns)
+
+        if not self.tty:
+            self.out.write("\n".join(rows) + "\n\n")
+            self.out.flush()
+            return
+
+        buf = list()
+        if size != self._size:
+            # everything moved, start from a blank screen once
+            buf.append("\033[2J")
+            self._rows = list()
+            self._size = size
+
+        for i, row in enumerate(rows[:size.lines - 1]):
+            if i >= len(self._rows) or self._rows[i] != row:
+                buf.append("\033[{};1H{}\033[K".format(i + 1, row))
+
+        for i in range(len(rows), len(self._rows)):
+            buf.append("\033[{};1H\033[K".format(i + 1))
+
+        self._rows = rows
+        if len(buf) > 0:
+            self.out.write("".join(buf))
+            self.out.flush()
+
+    def run(self, poller: Poller, refresh: float = 0.25):
+        """
+        Start poller and draw its latest result every refresh seconds until
+        interrupted. Rendering and fetching run independently: a slow fetch
+        only makes the "updated ... ago" status grow.
+
+        :param poller: poller fetching Sections
+        :type poller: Poller
+        :param refresh: seconds between frames, defaults to 0.25
+        :type refresh: float, optional
+        """
+        if self.tty:
+            # hide the cursor while drawing
+            self.out.write("\033[?25l")
+
+        poller.start()
+        try:
+            last_seq = None
+            while True:
+                result, ts, seq, error = poller.latest()
+                if result is None:
+                    status = "waiting for first update" + (" ({})".format(error) if error else "")
+                else:
+                    status = "updated {:.0f}s ago".format(time.monotonic() - ts)
+                    if error:
+                        status += ", last update FAILED: {}".format(error)
+
+                if result is not None:
+                    self.update(result, seq)
+
+                # without a terminal, only draw new results
+                if self.tty or (result is not None and seq != last_seq):
+                    self.render(result or dict(), status)
+                    last_seq = seq
+
+                time.sleep(refresh)
+        finally:
+            poller.stop()
+            if self.tty:
+                self.out.write("\033[{};1H\033[?25h\n".format(len(self._rows) + 1))
+                self.out.flush()
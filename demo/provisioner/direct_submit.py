@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+import time
+
+from collections import namedtuple
+from typing import Callable, Iterable, List
+
+import htcondor
+
+from dag_gen import DagShape
+
+# job event log of a direct run, in the run's directory
+DIRECT_EVENT_LOG = "jobs.log"
+
+# a layer submitted as a single cluster: the time at which its parents were
+# all seen to finish and the time its jobs were in the queue, per the
+# submitter's clock, and the seconds taken by the submit transaction
+LayerResult = namedtuple("LayerResult", ["layer", "cluster", "jobs", "ready", "queued", "submit_seconds", "done", "failed"])
+
+# jobs submitted per burst of submit events, a burst being the submit
+# events between two terminate events, see submit_rate()
+SubmitRate = namedtuple("SubmitRate", ["jobs", "bursts", "seconds"])
+
+def layer_items(i: int, width: int, assign: Callable = None) -> List[dict]:
+    """
+    Itemdata of the jobs of a layer, with the same num and arch macros as
+    the VARS written by dag_gen.write_dag().
+    """
+    placement = assign(width) if assign is not None else {None: width}
+
+    items = list()
+    for arch, count in placement.items():
+        for _ in range(count):
+            item = {"num": "{}_{}".format(i, len(items))}
+            if arch is not None:
+                item["arch"] = arch
+            items.append(item)
+
+    return items
+
+class DirectSubmitter:
+    def __init__(
+            self,
+            schedd: htcondor.Schedd,
+            submit_description: htcondor.Submit,
+            event_log: str,
+            poll_interval: float = 1.0,
+            event_log_factory: Callable = htcondor.JobEventLog,
+            clock: Callable = time.monotonic,
+            sleep: Callable = time.sleep
+        ):
+        """
+        Runs a layered DAG without DAGMan: each layer is submitted as a
+        single cluster, one job per node with the node's macros as its
+        itemdata, in one schedd transaction, as soon as every job of the
+        previous layer has terminated. Terminations are read from the event
+        log all jobs are submitted with, every poll_interval seconds.
+
+        A layer waits for the whole previous one, which are exactly the
+        dependencies of a fork-join DAG and a superset of those of the other
+        dag_gen shapes. Like DAGMan, nothing more is submitted once a job
+        failed or was removed.
+
+        :param schedd: schedd the jobs are submitted to
+        :type schedd: htcondor.Schedd
+        :param submit_description: job of every node, its log is set to event_log
+        :type submit_description: htcondor.Submit
+        :param event_log: path of the job event log
+        :type event_log: str
+        :param poll_interval: seconds between reads of the event log while a layer runs, defaults to 1.0
+        :type poll_interval: float, optional
+        :param event_log_factory: callable returning an object with an events(stop_after) method, defaults to htcondor.JobEventLog
+        :type event_log_factory: Callable, optional
+        """
+        self.schedd = schedd
+        self.submit_description = submit_description
+        self.submit_description["log"] = str(event_log)
+        self.event_log = str(event_log)
+        self.poll_interval = poll_interval
+        self.event_log_factory = event_log_factory
+        self.clock = clock
+        self.sleep = sleep
+
+        # opened once the first job is submitted, which creates the file
+        self.log = None
+
+    def submit_layer(self, items: List[dict]) -> tuple:
+        """
+        Submit one job per item as a single cluster.
+
+        :return: cluster id, first proc id and number of jobs
+        :rtype: tuple
+        """
+        with self.schedd.transaction() as txn:
+            result = self.submit_description.queue_with_itemdata(txn, 1, iter(items))
+
+        return result.cluster(), result.first_proc(), result.num_procs()
+
+    def wait(self, cluster: int, procs: set) -> tuple:
+        """
+        Wait for the given jobs of cluster to terminate or be removed.
+
+        :return: number of jobs that succeeded and number that failed
+        :rtype: tuple
+        """
+        if self.log is None:
+            self.log = self.event_log_factory(self.event_log)
+
+        done = failed = 0
+        remaining = set(procs)
+        while True:
+            for event in self.log.events(stop_after=0):
+                if event.cluster != cluster or event.proc not in remaining:
+                    continue
+
+                if event.type == htcondor.JobEventType.JOB_TERMINATED:
+                    remaining.discard(event.proc)
+                    if event.get("TerminatedNormally", True) and event.get("ReturnValue", 0) == 0:
+                        done += 1
+                    else:
+                        failed += 1
+                elif event.type == htcondor.JobEventType.JOB_ABORTED:
+                    remaining.discard(event.proc)
+                    failed += 1
+
+            if len(remaining) == 0:
+                return done, failed
+
+            self.sleep(self.poll_interval)
+
+    def run(self, shape: DagShape, assign: Callable = None) -> List[LayerResult]:
+        """
+        Submit the layers of shape one after the other.
+
+        :param shape: DAG to run
+        :type shape: DagShape
+        :param assign: given the width of a layer, returns its number of nodes per arch, defaults to None
+        :type assign: Callable, optional
+        :return: result per layer submitted, stopping at the first one with failed jobs
+        :rtype: List[LayerResult]
+        """
+        results = list()
+        ready = self.clock()
+        for i, (width, _) in enumerate(shape.layers()):
+            items = layer_items(i, width, assign)
+
+            start = self.clock()
+            cluster, first_proc, num_procs = self.submit_layer(items)
+            queued = self.clock()
+            print("SUBMITTED layer {} as cluster {} ({} jobs) in {:.2f} seconds".format(
+                    i, cluster, num_procs, queued - start
+                ))
+
+            done, failed = self.wait(cluster, set(range(first_proc, first_proc + num_procs)))
+            results.append(LayerResult(i, cluster, num_procs, ready, queued, queued - start, done, failed))
+            if failed > 0:
+                print("ERROR {} jobs of layer {} failed, not submitting the rest".format(failed, i))
+                break
+
+            ready = self.clock()
+
+        return results
+
+def submit_rate(events: Iterable) -> SubmitRate:
+    """
+    Submission throughput recorded in a job event log, e.g. the nodes.log
+    of a DAG or the log of a DirectSubmitter, so that both paths are
+    measured the same way. Submit events are grouped in bursts, separated by
+    terminate events; each burst is timed from the terminate event before it
+    (from its first submit for the first burst) to its last submit. Event
+    timestamps have a resolution of one second.
+
+    :param events: job events, in the order they were written
+    :type events: Iterable
+    :return: number of jobs and bursts, and seconds spent submitting
+    :rtype: SubmitRate
+    """
+    jobs = bursts = 0
+    seconds = 0.0
+    ready = None
+    first = last = None
+    burst_jobs = 0
+
+    def close_burst():
+        nonlocal bursts, seconds
+        if burst_jobs > 0:
+            bursts += 1
+            seconds += last - first
+
+    for event in events:
+        if event.type == htcondor.JobEventType.SUBMIT:
+            if burst_jobs == 0:
+                first = ready if ready is not None else event.timestamp
+            last = event.timestamp
+            burst_jobs += 1
+            jobs += 1
+        elif event.type in (htcondor.JobEventType.JOB_TERMINATED, htcondor.JobEventType.JOB_ABORTED):
+            close_burst()
+            burst_jobs = 0
+            ready = event.timestamp
+
+    close_burst()
+
+    return SubmitRate(jobs, bursts, seconds)
+
+def read_submit_rate(event_log: str) -> SubmitRate:
+    """submit_rate() of every event written so far to the given event log."""
+    return submit_rate(htcondor.JobEventLog(event_log).events(stop_after=0))
+
+def print_submit_rate(name: str, rate: SubmitRate):
+    print("{}: {} jobs in {} bursts, {:.1f} seconds submitting, {} jobs/s".format(
+            name,
+            rate.jobs,
+            rate.bursts,
+            rate.seconds,
+            "{:.1f}".format(rate.jobs / rate.seconds) if rate.seconds > 0 else "n/a"
+        ))
+
+def print_layer_results(results: List[LayerResult]):
+    jobs = sum(r.jobs for r in results)
+    submit_seconds = sum(r.submit_seconds for r in results)
+    print("submitted {} jobs in {} clusters, {:.2f} seconds in transactions ({} jobs/s)".format(
+            jobs,
+            len(results),
+            submit_seconds,
+            "{:.0f}".format(jobs / submit_seconds) if submit_seconds > 0 else "n/a"
+        ))
+    if len(results) > 0:
+        print("mean seconds from a layer being ready to its jobs being queued: {:.2f}".format(
+                sum(r.queued - r.ready for r in results) / len(results)
+            ))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+import collections
+import concurrent.futures
+import threading
+import time
+
+from typing import Callable, Dict, List
+
+import docker
+
+import metrics
+
+def split_image(image: str) -> tuple:
+    """Repository and tag of an image reference, the tag defaulting to latest."""
+    repository, sep, tag = image.rpartition(":")
+    if not sep or "/" in tag:
+        return image, "latest"
+
+    return repository, tag
+
+def normalize_image(image: str) -> str:
+    return "{}:{}".format(*split_image(image))
+
+class ImageCache:
+    def __init__(
+            self,
+            docker_clients: Dict[str, docker.DockerClient],
+            ssh_pool,
+            images: Dict[str, str],
+            max_pulls: int = 2,
+            max_bandwidth: float = None,
+            clock: Callable = time.monotonic,
+            sleep: Callable = time.sleep
+        ):
+        """
+        Tracks which worker images are present, by image id, on each docker
+        daemon and edge host, and pulls missing ones in the background so
+        that starting a worker does not wait on a multi GB pull.
+
+        Pulls run at most max_pulls at a time, one at a time per host. The
+        docker daemon does not let a client throttle a pull, so
+        max_bandwidth (bytes per second) is enforced on average instead: a
+        pull of an image of size S that took d seconds holds its slot for
+        another S / max_bandwidth - d seconds.
+
+        Every new (not standby) worker counts as a hit when its image was
+        already on its host and as a miss otherwise. Each hit saves the mean
+        time pulls of that image took.
+
+        :param docker_clients: docker client per endpoint name, x86_64 images are kept on these
+        :type docker_clients: Dict[str, docker.DockerClient]
+        :param ssh_pool: pool of connections to the edge hosts, AARCH64 images are kept on these
+        :type ssh_pool: SSHConnectionPool
+        :param images: image per kind of host, "docker" and "edge"
+        :type images: Dict[str, str]
+        :param max_pulls: max number of pulls running at the same time, defaults to 2
+        :type max_pulls: int, optional
+        :param max_bandwidth: average bytes per second pulls may use, unlimited by default
+        :type max_bandwidth: float, optional
+        :param clock: callable returning the current time in seconds, defaults to time.monotonic
+        :type clock: Callable, optional
+        :param sleep: callable pulls hold their slot with, defaults to time.sleep
+        :type sleep: Callable, optional
+        """
+        self.docker_clients = docker_clients
+        self.ssh_pool = ssh_pool
+        self.images = {kind: normalize_image(image) for kind, image in images.items()}
+        self.max_bandwidth = max_bandwidth
+        self.clock = clock
+        self.sleep = sleep
+
+        # host -> image -> image id, for the images of interest found there
+        self.present = collections.defaultdict(dict)
+        # hosts with a pull in flight
+        self.pulling = set()
+        # image -> seconds taken by each of its pulls
+        self.pull_latencies = collections.defaultdict(list)
+
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_pulls,
+                thread_name_prefix="pull"
+            )
+        self.lock = threading.Lock()
+
+    def image_for(self, host: str) -> str:
+        return self.images["docker"] if host in self.docker_clients else self.images["edge"]
+
+    @property
+    def hosts(self) -> List[str]:
+        return [*self.docker_clients, *self.ssh_pool.hosts]
+
+    def _inspect(self, host: str) -> Dict[str, str]:
+        image = self.image_for(host)
+        if host in self.docker_clients:
+            try:
+                return {image: self.docker_clients[host].images.get(image).id}
+            except docker.errors.ImageNotFound:
+                return dict()
+
+        result = self.ssh_pool.execute(host, "docker images --no-trunc --format '{{.Repository}}:{{.Tag}} {{.ID}}'")
+        if result["exit_code"] != 0:
+            raise RuntimeError("docker images failed: {}".format("\n".join(result["stderr"])))
+
+        found = dict()
+        for line in result["stdout"]:
+            parts = line.split()
+            if len(parts) == 2 and parts[0] == image:
+                found[image] = parts[1]
+
+        return found
+
+    def refresh(self):
+        """Inspect the images present on every host, all hosts concurrently."""
+        hosts = self.hosts
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(hosts))) as executor:
+            futures = {host: executor.submit(self._inspect, host) for host in hosts}
+
+        for host, f in futures.items():
+            try:
+                found = f.result()
+            except Exception as e:
+                print("ERROR could not list images on {}: {}".format(host, e))
+                continue
+
+            with self.lock:
+                self.present[host] = found
+
+    def has(self, host: str, image: str = None) -> bool:
+        """Whether the image (by default the worker image of host) is known to be on host."""
+        with self.lock:
+            return (image or self.image_for(host)) in self.present.get(host, ())
+
+    def hosts_with(self, hosts: List[str]) -> set:
+        """The given hosts that have their worker image."""
+        return {host for host in hosts if self.has(host)}
+
+    def mark_present(self, host: str, image: str = None):
+        """Record that an image is on host, e.g. when a worker running it is adopted."""
+        with self.lock:
+            self.present[host].setdefault(image or self.image_for(host), None)
+
+    def record_start(self, host: str):
+        """Count a new worker started on host as a cache hit or miss."""
+        image = self.image_for(host)
+        hit = self.has(host, image)
+        with self.lock:
+            if hit:
+                self.hits += 1
+                latencies = self.pull_latencies.get(image)
+                saved = sum(latencies) / len(latencies) if latencies else 0.0
+                self.time_saved += saved
+            else:
+                self.misses += 1
+            self.present[host].setdefault(image, None)
+
+        if hit:
+            metrics.IMAGE_CACHE_HITS.inc()
+            metrics.IMAGE_PULL_SECONDS_SAVED.inc(saved)
+        else:
+            metrics.IMAGE_CACHE_MISSES.inc()
+
+    def _pull(self, host: str, image: str):
+        start = self.clock()
+        try:
+            if host in self.docker_clients:
+                client = self.docker_clients[host]
+                client.images.pull(*split_image(image))
+                pulled = client.images.get(image)
+                image_id, size = pulled.id, pulled.attrs.get("Size", 0)
+            else:
+                result = self.ssh_pool.execute(
+                        host,
+                        "docker pull -q {0} && docker image inspect --format '{{{{.Id}}}} {{{{.Size}}}}' {0}".format(image)
+                    )
+                if result["exit_code"] != 0:
+                    raise RuntimeError("\n".join(result["stderr"]) or "exit_code {}".format(result["exit_code"]))
+
+                image_id, size = result["stdout"][-1].split()
+                size = int(size)
+
+            latency = self.clock() - start
+            with self.lock:
+                self.present[host][image] = image_id
+                self.pull_latencies[image].append(latency)
+
+            print("PULLED {} on {} in {:.1f} seconds".format(image, host, latency))
+
+            # hold the slot long enough to stay under max_bandwidth on average
+            if self.max_bandwidth:
+                self.sleep(max(0.0, size / self.max_bandwidth - latency))
+        except Exception as e:
+            print("ERROR could not pull {} on {}: {}".format(image, host, e))
+        finally:
+            with self.lock:
+                self.pulling.discard(host)
+
+    def prefetch(self) -> List[str]:
+        """
+        Start pulling the worker image on every host that does not have it
+        and is not already pulling.
+
+        :return: hosts a pull was started on
+        :rtype: List[str]
+        """
+        started = list()
+        for host in self.hosts:
+            image = self.image_for(host)
+            with self.lock:
+                if image in self.present.get(host, ()) or host in self.pulling:
+                    continue
+                self.pulling.add(host)
+
+            self.executor.submit(self._pull, host, image)
+            started.append(host)
+
+        return started
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+    def __str__(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return "ImageCache: hosts with image={}/{}, hits={}, misses={}, hit rate={:.2f}, time saved={:.1f}s".format(
+                    sum(1 for host in self.hosts if self.image_for(host) in self.present.get(host, ())),
+                    len(self.hosts),
+                    self.hits,
+                    self.misses,
+                    self.hits / total if total > 0 else 0.0,
+                    self.time_saved
+                )
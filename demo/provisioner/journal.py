@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import sqlite3
+import threading
+import time
+
+from collections import namedtuple
+from typing import Callable, List, Tuple
+
+# states of a journaled container: launching from before it is created until
+# it runs, standby once created for the warm pool, and running
+LAUNCHING = "launching"
+STANDBY = "standby"
+RUNNING = "running"
+
+# a container the journal believes to exist, cont_id is None until its create
+# call returned, times are per the journal's clock
+JournalEntry = namedtuple("JournalEntry", ["name", "cont_id", "arch", "host", "state", "warm", "started", "last_idle"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS containers (
+    name TEXT PRIMARY KEY,
+    cont_id TEXT,
+    arch TEXT NOT NULL,
+    host TEXT,
+    state TEXT NOT NULL,
+    warm INTEGER NOT NULL,
+    started REAL NOT NULL,
+    last_idle REAL NOT NULL,
+    stopped REAL
+);
+CREATE INDEX IF NOT EXISTS containers_cont_id ON containers (cont_id);
+"""
+
+class ContainerJournal:
+    def __init__(self, path: str, clock: Callable = time.monotonic):
+        """
+        Write-ahead journal of the containers started and stopped by the
+        provisioner, kept in a SQLite database in WAL mode so that every
+        write is a single append to the log and survives the process being
+        killed. A restarted provisioner replays running() to adopt the
+        containers it left behind instead of starting from zero.
+
+        Containers are journaled by name before they are created, and their
+        id is filled in once the create call returns, so that a crash in
+        between still leaves a row the restarted provisioner can match the
+        container by.
+
+        Times are given and returned per clock, which need not survive a
+        restart (e.g. time.monotonic), and are stored as seconds since the
+        epoch.
+
+        :param path: database file, created if it does not exist
+        :type path: str
+        :param clock: clock the given and returned times are per, defaults to time.monotonic
+        :type clock: Callable, optional
+        """
+        self.path = path
+        self.clock = clock
+
+        # writes come from the launch and io executors, serialized by lock
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        # in WAL mode, a commit survives the process crashing without
+        # waiting for an fsync
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self.conn.executescript(SCHEMA)
+
+        self.lock = threading.Lock()
+
+    def _migrate(self):
+        # journals written before containers were keyed by name hold running
+        # containers only, their id doubles as their name
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(containers)")]
+        if len(columns) == 0 or "name" in columns:
+            return
+
+        self.conn.executescript("""
+            BEGIN;
+            ALTER TABLE containers RENAME TO containers_old;
+            {}
+            INSERT INTO containers
+                SELECT cont_id, cont_id, arch, host, '{}', warm, started, last_idle, stopped FROM containers_old;
+            DROP TABLE containers_old;
+            COMMIT;
+        """.format(SCHEMA, RUNNING))
+
+    def _to_epoch(self, t: float) -> float:
+        return time.time() - (self.clock() - t)
+
+    def _from_epoch(self, t: float) -> float:
+        return self.clock() - (time.time() - t)
+
+    def _write(self, sql: str, rows: List[tuple]):
+        if len(rows) == 0:
+            return
+
+        with self.lock:
+            with self.conn:
+                self.conn.execute("BEGIN")
+                self.conn.executemany(sql, rows)
+
+    def record_launch(self, names: List[str], arch: str, host: str, requested: float, standby: bool = False):
+        """
+        Record that containers are about to be created, before the call that
+        creates them.
+
+        :param names: names the containers are created with
+        :type names: List[str]
+        :param arch: arch of the containers
+        :type arch: str
+        :param host: docker endpoint or edge host they are created on
+        :type host: str
+        :param requested: time at which they were requested
+        :type requested: float
+        :param standby: whether they are created for the warm pool, defaults to False
+        :type standby: bool, optional
+        """
+        now = self._to_epoch(self.clock())
+        self._write(
+            "INSERT OR REPLACE INTO containers VALUES (?, NULL, ?, ?, ?, ?, ?, ?, NULL)",
+            [(name, arch, host, LAUNCHING, int(standby), self._to_epoch(requested), now) for name in names]
+        )
+
+    def record_created(self, name: str, cont_id: str):
+        """
+        Record the id of a standby container once it has been created.
+
+        :param name: name it was journaled with by record_launch()
+        :type name: str
+        :param cont_id: full id of the container
+        :type cont_id: str
+        """
+        self._write("UPDATE containers SET cont_id = ?, state = ? WHERE name = ?", [(cont_id, STANDBY, name)])
+
+    def record_start(self, cont_id: str, started: float, name: str = None):
+        """
+        Record that a container is running, a new one by the name it was
+        journaled with or a standby one by its id.
+
+        :param cont_id: full id of the container
+        :type cont_id: str
+        :param started: time at which it was requested
+        :type started: float
+        :param name: name it was journaled with by record_launch(), defaults to None
+        :type name: str, optional
+        """
+        self._write(
+            "UPDATE containers SET cont_id = ?, state = ?, started = ?, last_idle = ? WHERE name = ? OR cont_id = ?",
+            [(cont_id, RUNNING, self._to_epoch(started), self._to_epoch(self.clock()), name, cont_id)]
+        )
+
+    def record_idle(self, idle: List[Tuple[str, float]]):
+        """
+        Record the time containers last became idle, in one transaction.
+
+        :param idle: (id, time it became idle) per container
+        :type idle: List[Tuple[str, float]]
+        """
+        self._write(
+            "UPDATE containers SET last_idle = ? WHERE cont_id = ?",
+            [(self._to_epoch(t), cont_id) for cont_id, t in idle]
+        )
+
+    def record_stop(self, cont_ids: List[str]):
+        """
+        Record that containers were stopped or went away, in one transaction.
+
+        :param cont_ids: full ids of the containers
+        :type cont_ids: List[str]
+        """
+        stopped = time.time()
+        self._write(
+            "UPDATE containers SET stopped = ? WHERE cont_id = ? AND stopped IS NULL",
+            [(stopped, cont_id) for cont_id in cont_ids]
+        )
+
+    def record_abandoned(self, names: List[str]):
+        """
+        Record that containers journaled by record_launch() do not exist
+        (anymore), e.g. because their create call failed, in one transaction.
+
+        :param names: names they were journaled with
+        :type names: List[str]
+        """
+        stopped = time.time()
+        self._write(
+            "UPDATE containers SET stopped = ? WHERE name = ? AND stopped IS NULL",
+            [(stopped, name) for name in names]
+        )
+
+    def running(self) -> List[JournalEntry]:
+        """Containers launching, on standby or running and not yet stopped, oldest first."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT name, cont_id, arch, host, state, warm, started, last_idle FROM containers "
+                "WHERE stopped IS NULL ORDER BY started"
+            ).fetchall()
+
+        return [
+            JournalEntry(
+                name, cont_id, arch, host, state, bool(warm), self._from_epoch(started), self._from_epoch(last_idle)
+            )
+            for name, cont_id, arch, host, state, warm, started, last_idle in rows
+        ]
+
+    def compact(self):
+        """Drop stopped containers and checkpoint the log into the database."""
+        with self.lock:
+            self.conn.execute("DELETE FROM containers WHERE stopped IS NOT NULL")
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
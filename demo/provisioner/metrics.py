@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+# Metrics exposed by the provisioner on /metrics. Labelled children used in
+# the hot paths are resolved once here so that recording a value is only a
+# locked add, and the endpoint is served from prometheus_client's own daemon
+# thread, outside of the control loop.
+
+# seconds, from a fast collector query to a slow container start over ssh
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+QUEUE_JOBS = Gauge(
+    "provisioner_queue_jobs",
+    "Jobs in the queue per arch and status",
+    ["arch", "status"]
+)
+
+POOL_AVAILABLE_SLOTS = Gauge(
+    "provisioner_pool_available_slots",
+    "Unclaimed demo slots per arch",
+    ["arch"]
+)
+
+POOL_FREE_CPUS = Gauge(
+    "provisioner_pool_free_cpus",
+    "Unclaimed cores of demo slots per arch",
+    ["arch"]
+)
+
+MANAGED_CONTAINERS = Gauge(
+    "provisioner_containers",
+    "Worker containers managed by the provisioner per arch",
+    ["arch"]
+)
+
+CONTAINERS_STARTED = Counter(
+    "provisioner_containers_started",
+    "Worker containers started per arch",
+    ["arch"]
+)
+
+CONTAINERS_STOPPED = Counter(
+    "provisioner_containers_stopped",
+    "Worker containers stopped per arch",
+    ["arch"]
+)
+
+CONTAINERS_EXITED = Counter(
+    "provisioner_containers_exited",
+    "Worker containers that exited without being stopped by the provisioner, per arch",
+    ["arch"]
+)
+
+CALL_LATENCY = Histogram(
+    "provisioner_call_duration_seconds",
+    "Latency of calls to htcondor, docker and ssh",
+    ["call"],
+    buckets=LATENCY_BUCKETS
+)
+
+IMAGE_CACHE_HITS = Counter(
+    "provisioner_image_cache_hits",
+    "New worker containers started on a host that already had their image"
+)
+
+IMAGE_CACHE_MISSES = Counter(
+    "provisioner_image_cache_misses",
+    "New worker containers started on a host that had to pull their image"
+)
+
+IMAGE_PULL_SECONDS_SAVED = Counter(
+    "provisioner_image_pull_seconds_saved",
+    "Estimated seconds of image pulls avoided by image cache hits"
+)
+
+TICK_LATENCY = Histogram(
+    "provisioner_tick_duration_seconds",
+    "Latency of a full tick of each control loop",
+    ["loop"],
+    buckets=LATENCY_BUCKETS
+)
+
+COLLECTOR_QUERY_LATENCY = CALL_LATENCY.labels(call="collector.query")
+SCHEDD_XQUERY_LATENCY = CALL_LATENCY.labels(call="schedd.xquery")
+DOCKER_RUN_LATENCY = CALL_LATENCY.labels(call="docker.containers.run")
+DOCKER_CREATE_LATENCY = CALL_LATENCY.labels(call="docker.containers.create")
+SSH_COMMAND_LATENCY = CALL_LATENCY.labels(call="ssh")
+
+def serve(port: int, addr: str = "127.0.0.1"):
+    """Serve /metrics on addr:port from a background daemon thread."""
+    start_http_server(port, addr=addr)
@@ -2,18 +2,25 @@
 import os
 import time
 import sys
-import shutil
 import enum
 import signal
 import argparse
+import asyncio
 import threading
-import pickle
+import concurrent.futures
+import math
+import select
+import json
+import shlex
 import uuid
+import heapq
+
+import collections
 
 from collections import namedtuple
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Set
+from typing import Callable, Dict, Iterator, List, Set
 
 import docker
 import paramiko
@@ -21,10 +28,17 @@ import paramiko
 import htcondor
 import classad
 
-from htcondor import dags 
-
-# custom attribute we will use to specify arch 
-ARCH_CUSTOM_ATTRIBUTE = "REQUIRED_ARCH"
+from arch_model import ACCEPTABLE_ARCHES_ATTRIBUTE, ARCH_CUSTOM_ATTRIBUTE, WORKLOAD_ATTRIBUTE, ArchThroughputModel, parse_arches
+from dag_gen import DAG_SHAPES, DAG_STATUS_FILE, make_dag_dir, parse_positive_int, print_dag_stats, write_dag
+from dag_lookahead import DagStatusWatcher
+from direct_submit import DIRECT_EVENT_LOG, DirectSubmitter, print_layer_results, print_submit_rate, read_submit_rate
+from dashboard import Dashboard, Poller
+from image_cache import ImageCache, normalize_image
+from journal import RUNNING, ContainerJournal
+from timeseries import TimeSeriesWriter
+from reconciler import ContainerState, Reconciler, SlotInfo, container_machine
+import metrics
+from scaling_policy import FixedIdleTimeout, ScaleDownPolicy, SCALE_DOWN_POLICIES
 
 def print_red(s): 
     print("\033[91m {}\033[00m" .format(s))
@@ -33,6 +47,15 @@ def print_green(s):
 def print_cyan(s): 
     print("\033[96m {}\033[00m" .format(s))
 
+def print_latency_summary(name: str, latencies: List[float]):
+    if len(latencies) > 0:
+        print("{} latency: n={}, mean={:.2f}s, max={:.2f}s".format(
+                name,
+                len(latencies),
+                sum(latencies) / len(latencies),
+                max(latencies)
+            ))
+
 class JobStatus(enum.Enum):
     UNEXPANDED = 0
     IDLE = 1
@@ -46,6 +69,19 @@ class Arch(enum.Enum):
     X86_64 = "X86_64"
     AARCH64 = "AARCH64"
 
+# seconds a container that died before it was recorded is remembered
+DIED_CONTAINER_TTL = 300
+
+# image worker containers are run from, per arch
+WORKER_IMAGES = {
+    Arch.X86_64.value: "ryantanaka/condor9-x86_64-isi-demo-worker",
+    Arch.AARCH64.value: "ryantanaka/condor9-arm64-isi-worker"
+}
+
+# an edge host that already has the worker image is preferred as long as it
+# runs at most this many more of our containers than the least loaded host
+EDGE_IMAGE_PREFERENCE = 2
+
 def get_available_slots(col: htcondor.Collector) -> Dict:
     """
     A a dict of available slots per architecture in the format:
@@ -95,21 +131,198 @@ def get_available_slots(col: htcondor.Collector) -> Dict:
     
     return result
 
+# amounts of slot resources, in the units HTCondor uses: cores, MB of memory
+# and KB of disk
+Resources = namedtuple("Resources", ["cpus", "memory", "disk"])
+
+NO_RESOURCES = Resources(0, 0, 0)
+
+# request assumed for jobs whose RequestCpus/RequestMemory/RequestDisk are unknown
+DEFAULT_JOB_REQUEST = Resources(1, 0, 0)
+
+# size assumed for a worker of an arch until one has shown up in the pool;
+# a single core means one worker per idle job
+DEFAULT_WORKER_SIZE = Resources(1, 0, 0)
+
+# job attributes the resource demand of the queue is computed from
+JOB_REQUEST_ATTRIBUTES = ["RequestCpus", "RequestMemory", "RequestDisk"]
+
+def add_resources(a: Resources, b: Resources, scale: float = 1) -> Resources:
+    """a + scale * b, per resource"""
+    return Resources(*(x + scale * y for x, y in zip(a, b)))
+
+# job attributes needed to tell which arch, or arches, a job can run on
+JOB_ARCH_ATTRIBUTES = [ARCH_CUSTOM_ATTRIBUTE, ACCEPTABLE_ARCHES_ATTRIBUTE, WORKLOAD_ATTRIBUTE]
+
+# set by DAGMan on the jobs of a DAG, and logged as "DAG Node: <name>" in
+# the notes of their submit events
+DAG_NODE_ATTRIBUTE = "DAGNodeName"
+DAG_NODE_NOTES_PREFIX = "DAG Node: "
+
+def job_arch(ad) -> str:
+    """
+    REQUIRED_ARCH of a job or, for a job that can run on several arches and
+    has not been pinned to one, its comma separated ACCEPTABLE_ARCHES.
+    """
+    arch = ad.get(ARCH_CUSTOM_ATTRIBUTE)
+    if arch is None:
+        arch = ad.get(ACCEPTABLE_ARCHES_ATTRIBUTE)
+
+    return str(arch)
+
+def job_dag_node(ad) -> str:
+    """
+    Name of the DAG node a job belongs to, from its DAGNodeName or, for a
+    submit event, its log notes. None for jobs outside of a DAG.
+    """
+    node = ad.get(DAG_NODE_ATTRIBUTE)
+    if node is None:
+        notes = ad.get("LogNotes")
+        if isinstance(notes, str) and notes.startswith(DAG_NODE_NOTES_PREFIX):
+            node = notes[len(DAG_NODE_NOTES_PREFIX):].strip()
+
+    return node
+
+def job_request(ad) -> Resources:
+    """
+    Resources requested by a job. Request attributes that are expressions
+    (e.g. the default RequestMemory) are evaluated against the ad; missing or
+    undefined ones fall back to DEFAULT_JOB_REQUEST.
+
+    :param ad: job ad or job event
+    :return: requested cpus, memory and disk
+    :rtype: Resources
+    """
+    values = list()
+    for attr, default in zip(JOB_REQUEST_ATTRIBUTES, DEFAULT_JOB_REQUEST):
+        value = ad.get(attr, default)
+        if isinstance(value, classad.ExprTree):
+            try:
+                value = ad.eval(attr)
+            except Exception:
+                value = default
+
+        values.append(value if isinstance(value, (int, float)) and not isinstance(value, bool) else default)
+
+    return Resources(*values)
+
 class QueueState:
     class Count:
         def __init__(self):
             self.idle = 0
             self.running = 0
+            # total resources requested by the idle jobs
+            self.demand = NO_RESOURCES
 
         def __repr__(self):
-            return "Count(idle={}, running={})".format(self.idle, self.running)
+            return "Count(idle={}, running={}, demand={})".format(self.idle, self.running, tuple(self.demand))
 
     def __init__(self):
         self.X86_64 = self.Count()
         self.AARCH64 = self.Count()
 
+        # jobs that can run on several arches, counted per 
+        # (tuple of acceptable arches, workload)
+        self.flexible = dict()
+
+        # names of the DAG nodes whose jobs are in the queue, so that the
+        # lookahead does not count them a second time
+        self.dag_nodes = set()
+
     def __str__(self):
-        return "QueueState: X86_64={}, AARCH64={}".format(self.X86_64, self.AARCH64)
+        s = "QueueState: X86_64={}, AARCH64={}".format(self.X86_64, self.AARCH64)
+        if len(self.flexible) > 0:
+            s += ", flexible={}".format(self.flexible)
+
+        return s
+
+    def copy(self) -> "QueueState":
+        result = QueueState()
+        for src, dst in [(self.X86_64, result.X86_64), (self.AARCH64, result.AARCH64)]:
+            dst.idle, dst.running, dst.demand = src.idle, src.running, src.demand
+
+        for key, src in self.flexible.items():
+            dst = result.flexible[key] = self.Count()
+            dst.idle, dst.running, dst.demand = src.idle, src.running, src.demand
+
+        result.dag_nodes = set(self.dag_nodes)
+
+        return result
+
+    def update(
+            self, 
+            arch: str, 
+            job_status: int, 
+            delta: int = 1, 
+            request: Resources = None, 
+            workload: str = None
+        ):
+        """
+        Add delta to the idle or running count of the given arch, and delta
+        times the job's request to the demand of idle jobs. Jobs of an
+        unknown arch or in any other state are not counted.
+
+        :param arch: value of REQUIRED_ARCH for the job, or comma separated ACCEPTABLE_ARCHES for a job that can run on several
+        :type arch: str
+        :param job_status: JobStatus value of the job
+        :type job_status: int
+        :param delta: amount to add to the count, defaults to 1
+        :type delta: int, optional
+        :param request: resources requested by the job, defaults to DEFAULT_JOB_REQUEST
+        :type request: Resources, optional
+        :param workload: value of WORKLOAD for the job, defaults to None
+        :type workload: str, optional
+        """
+        if arch == Arch.X86_64.value:
+            count = self.X86_64
+        elif arch == Arch.AARCH64.value:
+            count = self.AARCH64
+        else:
+            arches = tuple(sorted(a for a in parse_arches(arch or "") if a in (x.value for x in Arch)))
+            if len(arches) == 0:
+                return
+            elif len(arches) == 1:
+                count = getattr(self, arches[0])
+            else:
+                count = self.flexible.setdefault((arches, workload), self.Count())
+
+        if job_status == JobStatus.IDLE.value:
+            count.idle += delta
+            count.demand = add_resources(count.demand, request or DEFAULT_JOB_REQUEST, delta)
+        elif job_status == JobStatus.RUNNING.value:
+            count.running += delta
+
+def query_queue_state(schedd: htcondor.Schedd) -> QueueState:
+    """
+    Count idle and running jobs, and the resources requested by the idle
+    ones, per arch with a full scan of the queue.
+
+    :param schedd: schedd to query
+    :type schedd: htcondor.Schedd
+    :return: number of idle and running jobs
+    :rtype: QueueState
+    """
+
+    # this doesn't account for for all jobs, only the ones for which we have
+    # set the custom attribute: REQUIRED_ARCH or ACCEPTABLE_ARCHES
+    result = QueueState()
+
+    with metrics.SCHEDD_XQUERY_LATENCY.time():
+        jobs = list(schedd.xquery(projection=["ClusterId", "ProcId", "JobStatus", DAG_NODE_ATTRIBUTE] + JOB_ARCH_ATTRIBUTES + JOB_REQUEST_ATTRIBUTES))
+
+    for job in jobs:
+        result.update(
+            job_arch(job), 
+            job["JobStatus"], 
+            request=job_request(job), 
+            workload=job.get(WORKLOAD_ATTRIBUTE)
+        )
+
+        node = job_dag_node(job)
+        if node is not None:
+            result.dag_nodes.add(node)
+
+    return result
 
 class PoolState:
     def __init__(self):
@@ -120,501 +333,2957 @@ class PoolState:
         # total number of unavailable slots
         self.unavailable = 0
 
+        # unclaimed resources per arch: all of an unclaimed static slot, and
+        # what is left of a partitionable slot after its dynamic slots
+        self.free = {arch.value: NO_RESOURCES for arch in Arch}
+        # resources of the largest whole worker seen per arch, not set for
+        # arches without workers
+        self.worker_size = dict()
+
     def __str__(self):
-        return "PoolState: X86_64={}, AARCH64={}, unavailable={}".format(
+        return "PoolState: X86_64={}, AARCH64={}, unavailable={}, free={}".format(
                 self.X86_64,
                 self.AARCH64,
-                self.unavailable
+                self.unavailable,
+                {arch: tuple(free) for arch, free in self.free.items()}
             )
 
 EstimatedLoad = namedtuple("EstimatedLoad", [Arch.X86_64.value, Arch.AARCH64.value])
 
-class SSHClient:
-    def __init__(self):
-        self.client = paramiko.SSHClient()
-        self.client.load_system_host_keys()
+# attributes of startd ads needed by every consumer of the pool snapshot
+STARTD_PROJECTION = [
+    "Name", "Machine", "Activity", "State", "Arch", "DEMO_NODE",
+    "Cpus", "Memory", "Disk", "TotalSlotCpus", "TotalSlotMemory", "TotalSlotDisk",
+    "PartitionableSlot", "DynamicSlot", "ChildCpus"
+]
 
-    def execute(self, cmd: str) -> dict:
-        try:
-            client.connect(
-                        hostname="scitech-rpi-1.ads.isi.edu",
-                        username="scitech",
-                        key_filename="/Users/ryantanaka/.ssh/edge-no-pw"
-                    )
+def estimate_load(queue_state: QueueState, pool_state: PoolState) -> EstimatedLoad:
+    """
+    Compute estimated load, calculated as 
+    (num idle jobs of a given architechture / num unclaimed idle workers of the same arch)
+
+    :param queue_state: current state of the queue
+    :type queue_state: QueueState
+    :param pool_state: current state of the pool
+    :type pool_state: PoolState
+    :return: load for x86_64 and aarch64
+    :rtype: EstimatedLoad
+    """
+    load = dict()
+    for arch in Arch:
+        idle_jobs = getattr(queue_state, arch.value).idle
+        available = getattr(pool_state, arch.value)
+
+        if idle_jobs == 0 and available == 0:
+            load[arch.value] = 0
+        elif idle_jobs > 0 and available == 0:
+            load[arch.value] = float("inf")
+        else:
+            load[arch.value] = idle_jobs / available
 
-            stdin, stdout, stderr = client.exec_command(cmd)
-            exit_code = stdout.channel.recv_exit_status()
-            if exit_code != 0:
-                raise RuntimeError
-
-            for line in stdout:
-                print(line)
-
-        except paramiko.SSHException as e:
-            print(e)
-        except RuntimeError:
-            print("SSH command: {} FAILED with exit_code: {}".format(cmd, exit_code))
-            print("stder:")
-            for line in stderr:
-                print(line.strip())
-        finally:
-            client.close()
+    return EstimatedLoad(**load)
 
-        return {
-                    "exit_code": exit_code,
-                    "stdin": stdin,
-                    "stdout": stdout,
-                    "stderr": stderr,
-                }
+def compute_resource_deficit(
+        demand: Resources,
+        free: Resources,
+        pending: Resources,
+        load_threshold: float
+    ) -> Resources:
+    """
+    Resources to add so that, for each of cpus, memory and disk,
+    demand / (free + pending + deficit) <= load_threshold. Fragmentation is
+    not accounted for: free cores spread over several slots are assumed to
+    be usable by a job requesting more than one of them.
+
+    :param demand: resources requested by idle jobs of a given arch
+    :type demand: Resources
+    :param free: unclaimed resources of the same arch
+    :type free: Resources
+    :param pending: resources of started workers not yet in the pool
+    :type pending: Resources
+    :param load_threshold: threshold of requested per available resources
+    :type load_threshold: float
+    :return: missing resources
+    :rtype: Resources
+    """
+    return Resources(*(
+        max(0, d / load_threshold - f - p) for d, f, p in zip(demand, free, pending)
+    ))
 
-class Provisioner:
-    def __init__(self, condor_host: str = None, token_dir: str = None):
-        self.condor_host = condor_host
-        self.token_dir = token_dir
-        
-        self.docker = docker.from_env()
-        self.ssh_client = SSHClient()
-        
-        '''
-        {
-            "<id>": {
-                "cont": <cont obj>,
-                "last_idle": <datetime>
-            },
-            ...
-        }
-        '''
-        self.containers = dict()
-        self.containers[Arch.X86_64.value] = dict()
-        self.containers[Arch.AARCH64.value] = dict()
+def workers_for_deficit(deficit: Resources, worker_size: Resources, max_per_tick: int) -> int:
+    """
+    Number of workers of worker_size needed to cover deficit in every
+    resource, capped at max_per_tick. Resources the worker size does not
+    specify (zero) are ignored.
+
+    :param deficit: missing resources
+    :type deficit: Resources
+    :param worker_size: resources of a single worker
+    :type worker_size: Resources
+    :param max_per_tick: max number of workers to start at once
+    :type max_per_tick: int
+    :return: number of workers to start
+    :rtype: int
+    """
+    needed = 0
+    for d, size in zip(deficit, worker_size):
+        if d > 0 and size > 0:
+            # rounded so that float noise does not cost a whole worker
+            needed = max(needed, math.ceil(round(d / size, 6)))
+
+    return min(max_per_tick, needed)
+
+# columns recorded by monitor(), fixed width so that records can be appended
+# and mmapped
+MONITOR_COLUMNS = [("ts", "<f8"), ("unavailable", "<u4")] + [
+    (column.format(arch.value), dtype)
+    for arch in Arch
+    for column, dtype in [
+        ("{}_idle_workers", "<u4"),
+        ("{}_free_cpus", "<f4"),
+        ("{}_idle_jobs", "<u4"),
+        ("{}_running_jobs", "<u4")
+    ]
+]
+
+class PoolSnapshot:
+    def __init__(self, slots: list, ts: float):
+        """
+        A single pass over the startd ads returned by one collector query.
+        Everything derived from the ads (per arch counts, idle worker names,
+        demo node ads) is built here so that consumers never need to query
+        the collector themselves.
+
+        :param slots: startd ads returned by the collector
+        :type slots: list
+        :param ts: time, per the cache's clock, at which the ads were fetched
+        :type ts: float
+        :raises RuntimeError: encountered unexpected arch
+        """
+        self.ts = ts
+        self.pool_state = PoolState()
+        self.idle_workers = set()
+        self.demo_nodes = list()
+        # SlotInfo per startd Name, machine being the short hostname, which 
+        # for containers is the truncated container id
+        self.slots = dict()
 
+        for s in slots:
+            # only care about workers in the pool that are part of this demo
+            if not s.get("DEMO_NODE"):
+                continue
 
-        self.collector = htcondor.Collector()
-        self.schedd_ad = self.collector.locate(htcondor.DaemonTypes.Schedd)
-        self.schedd = htcondor.Schedd(self.schedd_ad)
+            self.demo_nodes.append(s)
+            host = s.get("Machine", s["Name"]).split("@")[-1].split(".")[0]
 
-        self.lock = threading.Lock()
+            arch = s["Arch"]
+            if arch not in self.pool_state.free:
+                raise RuntimeError("did not expect arch: {}".format(arch))
+
+            # dynamic slots are carved out of a partitionable slot by a
+            # claim, their resources are no longer in the partitionable slot
+            if s.get("DynamicSlot"):
+                self.pool_state.unavailable += 1
+                self.slots[s["Name"]] = SlotInfo(host, arch, False)
+                continue
+
+            size = Resources(
+                    s.get("TotalSlotCpus", s.get("Cpus", 0)),
+                    s.get("TotalSlotMemory", s.get("Memory", 0)),
+                    s.get("TotalSlotDisk", s.get("Disk", 0))
+                )
+            if arch not in self.pool_state.worker_size or size.cpus > self.pool_state.worker_size[arch].cpus:
+                self.pool_state.worker_size[arch] = size
+
+            unclaimed = s["State"] == "Unclaimed" and s["Activity"] == "Idle"
+            if s.get("PartitionableSlot"):
+                # a partitionable slot stays Unclaimed/Idle while it has 
+                # resources left, the worker is only idle without children
+                free = Resources(s.get("Cpus", 0), s.get("Memory", 0), s.get("Disk", 0))
+                idle = unclaimed and len(s.get("ChildCpus") or []) == 0
+                unclaimed = unclaimed and free.cpus > 0
+            else:
+                free = size
+                idle = unclaimed
 
-        self.stop_event = threading.Event()
+            if unclaimed:
+                setattr(self.pool_state, arch, getattr(self.pool_state, arch) + 1)
+                self.pool_state.free[arch] = add_resources(self.pool_state.free[arch], free)
+            else:
+                self.pool_state.unavailable += 1
 
-    ### Workload/Pool State ####################################################
-    def get_queue_state(self) -> QueueState:
+            if idle:
+                self.idle_workers.add(s["Name"])
+
+            self.slots[s["Name"]] = SlotInfo(host, arch, idle)
+
+class PoolSnapshotCache:
+    def __init__(
+            self, 
+            collector: htcondor.Collector, 
+            refresh_interval: float = 1.0, 
+            clock: Callable = time.monotonic
+        ):
         """
-        Current state of the queue. Returns number of idle and running jobs for
-        x86_64 and ARM
+        Thread safe, TTL cached view of the startd ads in the pool. The
+        collector is queried at most once per refresh_interval regardless of
+        how many threads ask for the pool state.
+
+        :param collector: collector to query
+        :type collector: htcondor.Collector
+        :param refresh_interval: max age, in seconds, of a snapshot before the collector is queried again
+        :type refresh_interval: float
+        :param clock: callable returning the current time in seconds, defaults to time.monotonic
+        :type clock: Callable, optional
+        """
+        self.collector = collector
+        self.refresh_interval = refresh_interval
+        self.clock = clock
 
-        :return: number of idle and running jobs 
-        :rtype: Provisioner.QueueState
+        # number of calls to get() served from the cached snapshot
+        self.hits = 0
+        # number of calls to get() that required a collector query
+        self.misses = 0
+
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def get(self) -> PoolSnapshot:
         """
+        Return the current snapshot, querying the collector only if the cached
+        one is older than refresh_interval. The lock is held for the duration
+        of the query so that concurrent callers share a single query.
 
-        # this doesn't account for for all jobs, only the ones for which we have
-        # set the custom attribute: REQUIRED_ARCH
-        result = QueueState()
+        :return: current snapshot of the pool
+        :rtype: PoolSnapshot
+        """
+        with self._lock:
+            now = self.clock()
+            if self._snapshot is not None and now - self._snapshot.ts < self.refresh_interval:
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            with metrics.COLLECTOR_QUERY_LATENCY.time():
+                slots = self.collector.query(
+                    htcondor.AdTypes.Startd,
+                    projection=STARTD_PROJECTION
+                )
+            self._snapshot = PoolSnapshot(slots, now)
 
-        for job in self.schedd.xquery(projection=["ClusterId", "ProcId", "JobStatus", ARCH_CUSTOM_ATTRIBUTE]):
-            required_arch = str(job.get(ARCH_CUSTOM_ATTRIBUTE))
-            job_status = job["JobStatus"]
+            return self._snapshot
 
-            if required_arch == Arch.X86_64.value:
-                if job_status == JobStatus.IDLE.value: 
-                    result.X86_64.idle += 1
-                elif job_status == JobStatus.RUNNING.value:
-                    result.X86_64.running += 1
+    def invalidate(self):
+        """Force the next call to get() to query the collector."""
+        with self._lock:
+            self._snapshot = None
 
-            elif required_arch == Arch.AARCH64.value:
-                if job_status == JobStatus.IDLE.value:
-                    result.AARCH64.idle += 1
-                elif job_status == JobStatus.RUNNING.value:
-                    result.AARCH64.running += 1
+    def __str__(self):
+        total = self.hits + self.misses
+        return "PoolSnapshotCache: hits={}, misses={}, hit_rate={:.2f}".format(
+                self.hits,
+                self.misses,
+                self.hits / total if total > 0 else 0.0
+            )
 
-        return result
+EdgeHost = namedtuple("EdgeHost", ["hostname", "username", "key_filename"])
 
-    
-    def get_pool_state(self) -> PoolState:
+# edge hosts used when none are given on the command line
+DEFAULT_EDGE_HOSTS = [
+    EdgeHost(
+        hostname="scitech-rpi-1.ads.isi.edu",
+        username="scitech",
+        key_filename="/Users/ryantanaka/.ssh/edge-no-pw"
+    )
+]
+
+# max bytes read from a channel at a time
+SSH_READ_SIZE = 32768
+
+class SSHConnectionPool:
+    def __init__(
+            self, 
+            hosts: List[EdgeHost], 
+            max_retries: int = 3, 
+            backoff: float = 1.0,
+            max_workers: int = 16,
+            client_factory: Callable = paramiko.SSHClient
+        ):
         """
-        Get the count of available and unvailable slots per architecture.
-
-        :raises RuntimeError: encountered unexpected arch
-        :return: current state of the pool 
-        :rtype: Provisioner.PoolState
+        Pool of authenticated ssh connections, one per edge host. Connections
+        are opened on first use and kept alive, and every command runs on its
+        own channel so that concurrent commands to the same host share a
+        single transport (and a single handshake).
+
+        :param hosts: edge hosts that commands can be run on
+        :type hosts: List[EdgeHost]
+        :param max_retries: number of times a failed command is retried on a new connection, defaults to 3
+        :type max_retries: int, optional
+        :param backoff: seconds to wait before the first retry, doubled on each subsequent one, defaults to 1.0
+        :type backoff: float, optional
+        :param max_workers: max number of commands run concurrently by execute_many, defaults to 16
+        :type max_workers: int, optional
+        :param client_factory: callable returning a paramiko.SSHClient like object, defaults to paramiko.SSHClient
+        :type client_factory: Callable, optional
         """
+        self.hosts = {h.hostname: h for h in hosts}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.client_factory = client_factory
+
+        # hostname -> connected paramiko.SSHClient
+        self.clients = dict()
+        # serializes (re)connecting to each host
+        self.host_locks = {hostname: threading.Lock() for hostname in self.hosts}
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="ssh"
+            )
 
-        # THIS DOESN"T ACCOUNT FOR DYNAMIC SLOTS>........
-        result = PoolState()
-        
-        slots = self.collector.query(
-            htcondor.AdTypes.Startd,
-            projection=["Name", "Activity", "State", "Arch", "DEMO_NODE"]
-        )
+        # number of connections made, for diagnostics
+        self.num_connects = 0
 
-        for s in slots:
-            arch = s["Arch"]
-            state = s["State"]
-            activity = s["Activity"]
-            is_demo_node = s.get("DEMO_NODE")
+    def _get_transport(self, hostname: str) -> paramiko.Transport:
+        with self.host_locks[hostname]:
+            client = self.clients.get(hostname)
+            if client is not None:
+                transport = client.get_transport()
+                if transport is not None and transport.is_active():
+                    return transport
 
-            # only care about workers in the pool that are part of this demo
-            if is_demo_node:
-                if state == "Unclaimed" and activity == "Idle":
-                    if arch == Arch.X86_64.value:
-                        result.X86_64 += 1
-                    elif arch == Arch.AARCH64.value:
-                        result.AARCH64 += 1
-                    else:
-                        raise RuntimeError("did not expect arch: {}".format(arch))
-                else:
-                    result.unavailable += 1
-        
-        return result
+                client.close()
 
-    def get_idle_workers(self) -> Set[str]:
-        """Return names of all the unclaimed idle workers
+            host = self.hosts[hostname]
+            client = self.client_factory()
+            client.load_system_host_keys()
+            client.connect(
+                        hostname=host.hostname,
+                        username=host.username,
+                        key_filename=host.key_filename
+                    )
+            client.get_transport().set_keepalive(30)
 
-        :return: names of all unclaimed idle workers
-        :rtype: Set[str]
-        """
-        idle_workers = set()
-        
-        slots = self.collector.query(
-            htcondor.AdTypes.Startd,
-            projection=["Name", "Activity", "State", "Arch", "DEMO_NODE"]
-        )
+            self.clients[hostname] = client
+            self.num_connects += 1
 
-        for s in slots:
-            name = s["Name"]
-            state = s["State"]
-            activity = s["Activity"]
-            is_demo_node = s.get("DEMO_NODE")
+            return client.get_transport()
 
-            if is_demo_node:
-                if state == "Unclaimed" and activity == "Idle":
-                    idle_workers.add(name)       
+    def _invalidate(self, hostname: str):
+        with self.host_locks[hostname]:
+            client = self.clients.pop(hostname, None)
+            if client is not None:
+                client.close()
 
-        return idle_workers
+    def execute(self, hostname: str, cmd: str) -> dict:
+        """
+        Run cmd on the given host over a pooled connection. Connection errors
+        cause a reconnect and retry with exponential backoff.
+
+        :param hostname: edge host to run the command on
+        :type hostname: str
+        :param cmd: command to run
+        :type cmd: str
+        :return: dict with exit_code, and stdout and stderr as lists of lines; exit_code is -1 if the command could not be run
+        :rtype: dict
+        """
+        with metrics.SSH_COMMAND_LATENCY.time():
+            return self._execute(hostname, cmd)
+
+    def _execute(self, hostname: str, cmd: str) -> dict:
+        delay = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                channel = self._get_transport(hostname).open_session()
+                try:
+                    channel.exec_command(cmd)
+                    stdout, stderr = self._drain(channel)
+                    exit_code = channel.recv_exit_status()
+                finally:
+                    channel.close()
+
+                break
+
+            except (paramiko.SSHException, OSError) as e:
+                print_red("SSH command: {} on {} FAILED (attempt {}): {}".format(cmd, hostname, attempt + 1, e))
+                self._invalidate(hostname)
+
+                if attempt == self.max_retries:
+                    return {
+                        "exit_code": -1,
+                        "stdout": list(),
+                        "stderr": [str(e)]
+                    }
 
+                time.sleep(delay)
+                delay *= 2
 
-    def compute_load(self) -> EstimatedLoad:
-        """
-        Compute estimated load, calculated as 
-        (num idle jobs of a given architechture / num unclaimed idle workers of the same arch)
+        if exit_code != 0:
+            print("SSH command: {} on {} FAILED with exit_code: {}".format(cmd, hostname, exit_code))
+            print("stderr:")
+            print(stderr.strip())
 
-        :return: load for x86_64 and aarch64
-        :rtype: EstimatedLoad
+        return {
+                    "exit_code": exit_code,
+                    "stdout": stdout.splitlines(),
+                    "stderr": stderr.splitlines()
+                }
+
+    @staticmethod
+    def _drain(channel: paramiko.Channel) -> tuple:
         """
-        queue_state = self.get_queue_state()
-        pool_state = self.get_pool_state()
+        Read stdout and stderr of a command as either receives data, until
+        the remote side sends EOF. Both share the channel's window, so
+        reading one to the end before the other would let a command that
+        writes a lot to the other (e.g. docker pull progress) fill the
+        window and block forever.
+        """
+        stdout, stderr = list(), list()
+        while True:
+            if channel.recv_stderr_ready():
+                stderr.append(channel.recv_stderr(SSH_READ_SIZE))
+            elif channel.recv_ready():
+                stdout.append(channel.recv(SSH_READ_SIZE))
+            elif channel.eof_received or channel.closed:
+                break
+            else:
+                # the channel's fileno is readable once either stream has data
+                select.select([channel], [], [], 1.0)
 
-        print(queue_state)
-        print(pool_state)
+        return b"".join(stdout).decode(), b"".join(stderr).decode()
 
-        if queue_state.X86_64.idle == 0 and pool_state.X86_64 == 0:
-            x86_64_est_load = 0
-        elif queue_state.X86_64.idle > 0 and pool_state.X86_64 == 0:
-            x86_64_est_load = float("inf")
-        else:
-            x86_64_est_load = queue_state.X86_64.idle / pool_state.X86_64
-        
-        if queue_state.AARCH64.idle == 0 and pool_state.AARCH64 == 0:
-            arm_est_load = 0
-        elif queue_state.AARCH64.idle > 0 and pool_state.AARCH64 == 0:
-            arm_est_load = float("inf")
-        else:
-            arm_est_load = queue_state.AARCH64.idle / pool_state.AARCH64
+    def stream(self, hostname: str, cmd: str, on_channel: Callable = None) -> Iterator[str]:
+        """
+        Run a long running cmd on the given host over a pooled connection and
+        yield its stdout line by line as it is written. The command is not
+        retried: the caller decides whether to run it again once the stream
+        ends.
+
+        :param hostname: edge host to run the command on
+        :type hostname: str
+        :param cmd: command to run
+        :type cmd: str
+        :param on_channel: called with the channel before the first line, so that another thread can close it to end the stream, defaults to None
+        :type on_channel: Callable, optional
+        :return: generator of stdout lines, without line endings
+        :rtype: Iterator[str]
+        """
+        try:
+            channel = self._get_transport(hostname).open_session()
+        except (paramiko.SSHException, OSError):
+            self._invalidate(hostname)
+            raise
 
-        return EstimatedLoad(
-            X86_64=x86_64_est_load,
-            AARCH64=arm_est_load
-        )
+        if on_channel is not None:
+            on_channel(channel)
 
-    ### Container Management ###################################################
-    def stop_containers(self):
+        try:
+            channel.exec_command(cmd)
+            for line in channel.makefile("r"):
+                yield (line.decode() if isinstance(line, bytes) else line).rstrip("\n")
+        finally:
+            channel.close()
+
+    def execute_many(self, hostnames: List[str], cmd: str) -> Dict[str, dict]:
         """
-        To be run as a thread, stop_containers will check the pool state and
-        currently managed containers to see if they have been sitting idle for
-        too long. If they have been sitting idle for more than MAX_IDLE_DUR, the
-        container will be killed via SIGINT.
+        Run the same command on many hosts in parallel.
+
+        :param hostnames: edge hosts to run the command on
+        :type hostnames: List[str]
+        :param cmd: command to run
+        :type cmd: str
+        :return: result of execute() per host
+        :rtype: Dict[str, dict]
         """
+        futures = {h: self.executor.submit(self.execute, h, cmd) for h in hostnames}
 
-        print("stop_containers thread started")
+        return {h: f.result() for h, f in futures.items()}
 
-        # if this is increased, calculated idle duration can start to become
-        # inaccurate due race conditions from polling the queue
-        POLLING_RATE = 1
+    def close(self):
+        """Close all pooled connections."""
+        self.executor.shutdown(wait=True)
+        for hostname in list(self.clients):
+            self._invalidate(hostname)
 
-        # if a worker has sat idle for longer than MAX_IDLE_DUR seconds, 
-        # we will kill that container
-        MAX_IDLE_DUR = 30
+class EdgeDocker:
+    def __init__(self, ssh_pool: SSHConnectionPool):
+        """
+        Docker operations on edge hosts. Operations on many containers of the
+        same host are sent as a single remote invocation, and operations on
+        different hosts run in parallel, so the number of round trips depends
+        on the number of hosts rather than the number of containers. Results
+        are still reported per container.
+
+        :param ssh_pool: pool of connections to the edge hosts
+        :type ssh_pool: SSHConnectionPool
+        """
+        self.ssh_pool = ssh_pool
+
+    @staticmethod
+    def _per_container(ids: List[str], result: dict) -> Dict[str, str]:
+        # docker kill/start/rm print each container they succeeded on and
+        # one error line per container they failed on
+        done = set(line.strip() for line in result["stdout"])
+        errors = dict()
+        for _id in ids:
+            if _id in done:
+                errors[_id] = None
+            else:
+                errors[_id] = next(
+                    (line for line in result["stderr"] if _id in line), 
+                    "\n".join(result["stderr"]) or "exit_code {}".format(result["exit_code"])
+                )
 
+        return errors
 
-        while not self.stop_event.is_set():
-            idle_workers = self.get_idle_workers()
-
-            to_delete = list()
-            for _id, value in self.containers[Arch.X86_64].items():
-                # need to truncate id to be the same length as slot name
-                # .... not great, but it will work for now so we can use fast
-                # access of the set 
-                if _id[:12] in idle_workers:
-                    # if now - last_idle > MAX_IDLE_DUR then we kill
-                    idle_dur = (datetime.now() - value["last_idle"]).total_seconds()                   
-
-                    if idle_dur > MAX_IDLE_DUR:
-                        print_red("STOPPING X86_64 cont {} (idle for {} seconds) sending SIGINT".format(_id, idle_dur))
-                        with self.lock:
-                            value["cont"].kill(signal=signal.SIGINT)
-                        
-                        to_delete.append(_id)
-                            
-                else:
-                    # reset last_idle to now
-                    with self.lock:
-                        value["last_idle"] = datetime.now()
+    def _on_hosts(self, fn: Callable, args_by_host: Dict[str, object]) -> Dict[str, object]:
+        futures = {
+            host: self.ssh_pool.executor.submit(fn, host, args) 
+            for host, args in args_by_host.items()
+        }
 
-            for _id, last_idle in self.containers[Arch.AARCH64].items():
-                if _id in idle_workers:
-                    idle_dur = (datetime.now() - last_idle).total_seconds()
+        return {host: f.result() for host, f in futures.items()}
 
-                    if idle_dur > MAX_IDLE_DUR:
-                        print_red("STOPPING AARCH64 cont {} (idle for {} seconds) sending SIGINT".format(_id, idle_dur))
-                        
-                        result = self.ssh_client.execute("docker kill --signal=SIGINT {}".format(cont_id))
-                        if result["exit_code"] != 0:
-                            raise RuntimeError("ERROR SSH docker could not kill AARCH64 cont {}".format(cont_id))
-                       
-                        to_delete.append(cont_id)
+    def kill(self, host: str, ids: List[str], sig: str = "SIGINT") -> Dict[str, str]:
+        """
+        Send sig to all the given containers with a single `docker kill`.
+
+        :param host: edge host running the containers
+        :type host: str
+        :param ids: ids of the containers
+        :type ids: List[str]
+        :param sig: signal to send, defaults to "SIGINT"
+        :type sig: str, optional
+        :return: error message per container id, None for containers that were signalled
+        :rtype: Dict[str, str]
+        """
+        if len(ids) == 0:
+            return dict()
 
-            for _id in to_delete:
-                del self.containers[_id]
+        result = self.ssh_pool.execute(host, "docker kill --signal={} {}".format(sig, " ".join(ids)))
 
-            time.sleep(POLLING_RATE)
+        return self._per_container(ids, result)
 
-        print("stop_containers exiting")        
+    def kill_many(self, ids_by_host: Dict[str, List[str]], sig: str = "SIGINT") -> Dict[str, Dict[str, str]]:
+        """Like kill(), for containers on many hosts, one invocation per host in parallel."""
+        return self._on_hosts(lambda host, ids: self.kill(host, ids, sig), ids_by_host)
 
-    def shutdown_all_containers(self):
-        """Shutdown all running containers."""
+    def start(self, host: str, ids: List[str]) -> Dict[str, str]:
+        """
+        Start all the given created containers with a single `docker start`.
 
-        for _id, value in self.containers[Arch.X86_64.value].items():
-            print("shutting down container {}".format(_id))
-            value["cont"].kill(signal=signal.SIGINT)
+        :return: error message per container id, None for containers that were started
+        :rtype: Dict[str, str]
+        """
+        if len(ids) == 0:
+            return dict()
 
-        for cont_id in self.containers[Arch.AARCH64.value]:
-            result = self.ssh_client.execute("docker kill --signal=SIGINT {}".format(cont_id))
-            print("shutting down container {}".format(cont_id))
-            if result["exit_code"] != 0:
-                print("ERROR SSH docker could not kill {}".format(cont_id))
+        result = self.ssh_pool.execute(host, "docker start {}".format(" ".join(ids)))
 
-    def start_containers(self, rate: int, load_threshold: float):
+        return self._per_container(ids, result)
+
+    def remove(self, host: str, ids: List[str]) -> Dict[str, str]:
         """
-        Start containers to meet expected demand for workers based on 
-        idle jobs in the queue.
+        Force remove all the given containers with a single `docker rm -f`.
 
-        :param rate: polling rate
-        :type rate: int
-        :param load_threshold: threshold, which if exceeded, will cause a container to be created
-        :type load_threshold: float
-        :raises NotImplementedError: AARCH64 worker supported not added yet 
+        :return: error message per container id, None for containers that were removed
+        :rtype: Dict[str, str]
         """
-        print("start_containers thread started")
-        while not self.stop_event.is_set():
-            load = self.compute_load()
-            print_cyan("CURRENT LOAD: {}".format(load))
+        if len(ids) == 0:
+            return dict()
 
+        result = self.ssh_pool.execute(host, "docker rm -f {}".format(" ".join(ids)))
 
-            if load.X86_64 > load_threshold:
-                # start cont
-                cont = self.docker.containers.run(
-                    image="ryantanaka/condor9-x86_64-isi-demo-worker",
-                    volumes=["/local-scratch/tanaka/condorexec/secrets:/root/secrets:ro"],
-                    environment={"CONDOR_HOST":"workflow.isi.edu",},
-                    remove=True,
-                    detach=True  
-                )
+        return self._per_container(ids, result)
 
-                print_green("STARTED {}".format(cont.id))
-                with self.lock:
-                    self.containers[Arch.X86_64.value][cont.id] = {
-                        "cont": cont,
-                        "last_idle": datetime.now()
-                    }
+    def remove_many(self, ids_by_host: Dict[str, List[str]]) -> Dict[str, Dict[str, str]]:
+        """Like remove(), for containers on many hosts, one invocation per host in parallel."""
+        return self._on_hosts(self.remove, ids_by_host)
 
-            if load.AARCH64 > load_threshold:
-                # start cont
-                cont_name = str(uuid.uuid1())
-                cmd = " ".join((
-                        "abc",
-                        "234"
-                    ))
-
-                result = self.ssh_client.execute(cmd)
-                if result["exit_code"] == 0:
-                    cmd = " ".join((
-                            "docker",
-                            "ps",
-                            "-aqf",
-                            "name={}".format(cont_name)
-                        ))
-                    result = self.ssh_client.execute(cmd)
-                    cont_id = None
-                    if result["exit_code"] == 0:
-                        stdout = list(result["stdout"])
-                        if len(stdout) > 0:
-                            cont_id = stdout[0].strip()
-                        else:
-                            raise RuntimeError("SSH docker ps command could not get container id")
-                    else:
-                        raise RuntimeError("SSH docker ps command failed")
+    def run(self, host: str, specs: Dict[str, List[str]], create_only: bool = False) -> Dict[str, tuple]:
+        """
+        Run (or only create) one container per spec with a single remote
+        shell script. Each container reports its own outcome on one line so
+        that a failure does not hide the ids of the containers that started.
+
+        :param host: edge host to start the containers on
+        :type host: str
+        :param specs: `docker run` arguments (including --name) per container name
+        :type specs: Dict[str, List[str]]
+        :param create_only: use `docker create` instead of `docker run -d`, defaults to False
+        :type create_only: bool, optional
+        :return: (container id, error message) per container name, one of which is None
+        :rtype: Dict[str, tuple]
+        """
+        if len(specs) == 0:
+            return dict()
+
+        docker_cmd = "docker create" if create_only else "docker run -d"
+        script = "; ".join(
+            'if out=$({cmd} {args} 2>&1); then echo "{name} ok $(echo "$out" | tail -n 1)"; '
+            'else echo "{name} err" $out; fi'.format(cmd=docker_cmd, args=" ".join(args), name=name)
+            for name, args in specs.items()
+        )
 
-                    print_green("STARTED {}".format(cont_id))
-                    with self.lock:
-                        self.container[Arch.AARCH64][cont_id] = {
-                                    "last_idle": datetime.now()
-                                }
-                else:
-                    raise RuntimeError("SSH Docker command failed")
-                
+        result = self.ssh_pool.execute(host, script)
 
-                raise NotImplementedError("still need to add AARCH64 worker")
+        outcome = dict()
+        for line in result["stdout"]:
+            name, _, rest = line.partition(" ")
+            status, _, value = rest.partition(" ")
+            if name in specs:
+                outcome[name] = (value.strip(), None) if status == "ok" else (None, value.strip())
 
-            time.sleep(rate)
-        
-        print("start_containers exiting")
+        for name in specs:
+            if name not in outcome:
+                outcome[name] = (None, "\n".join(result["stderr"]) or "exit_code {}".format(result["exit_code"]))
 
-    def provision(self, rate: int, load_threshold: float):
-        """
-        Main provisioning function
+        return outcome
 
-        :param rate: rate (in seconds), at which to check if new containers need to be started
-        :type rate: int
-        :param load_threshold: threshold, which if exceeded, will cause a container to be created
-        :type load_threshold: float
+    def ps(self, hosts: List[str]) -> Dict[str, Dict[str, dict]]:
         """
-        starter = threading.Thread(target=self.start_containers, args=(rate, load_threshold,))
-        stopper = threading.Thread(target=self.stop_containers)
+        Inventory of all containers on each host, one `docker ps` per host in
+        parallel. Hosts that could not be reached are left out.
 
-        starter.start()
-        stopper.start()
+        :param hosts: edge hosts to list containers on
+        :type hosts: List[str]
+        :return: {"name": <name>, "state": <state>} per full container id per host
+        :rtype: Dict[str, Dict[str, dict]]
+        """
+        def _ps(host, _):
+            return self.ssh_pool.execute(
+                host, 
+                "docker ps -a --no-trunc --format '{{.ID}} {{.Names}} {{.State}}'"
+            )
 
-        starter.join()
-        stopper.join()
+        inventory = dict()
+        for host, result in self._on_hosts(_ps, {h: None for h in hosts}).items():
+            if result["exit_code"] != 0:
+                continue
+
+            inventory[host] = dict()
+            for line in result["stdout"]:
+                parts = line.split()
+                if len(parts) == 3:
+                    inventory[host][parts[0]] = {"name": parts[1], "state": parts[2]}
+
+        return inventory
+
+DockerEndpoint = namedtuple("DockerEndpoint", ["url", "capacity"])
+
+# name of the docker endpoint reached through the environment (DOCKER_HOST
+# or the local socket)
+LOCAL_DOCKER = "local"
+
+def parse_docker_endpoint(value: str) -> DockerEndpoint:
+    """Parse URL[=CAPACITY], e.g. tcp://rack-2:2376=16, "local" for the local daemon."""
+    url, sep, capacity = value.rpartition("=")
+    if not sep or not capacity.isdigit():
+        url, capacity = value, None
+
+    return DockerEndpoint(url, int(capacity) if capacity is not None else None)
+
+class DockerHostPool:
+    def __init__(
+            self, 
+            clients: Dict[str, docker.DockerClient], 
+            capacity: Dict[str, int] = None,
+            refresh_interval: float = 5.0,
+            clock: Callable = time.monotonic
+        ):
+        """
+        Docker daemons x86_64 workers are placed on. New workers go to the
+        least loaded daemon, by containers running per core, among those
+        with cores left for one more worker and, when a capacity is given
+        for them, fewer of our containers than that. Each daemon's core and
+        running container counts are refreshed with one `info` call per
+        daemon, all of them concurrently, at most once per refresh_interval.
+
+        :param clients: docker client per endpoint name
+        :type clients: Dict[str, docker.DockerClient]
+        :param capacity: max number of our containers per endpoint name, unlimited when missing
+        :type capacity: Dict[str, int], optional
+        :param refresh_interval: max age, in seconds, of the daemons' stats, defaults to 5.0
+        :type refresh_interval: float, optional
+        :param clock: clock refresh_interval is measured with, defaults to time.monotonic
+        :type clock: Callable, optional
+        """
+        self.clients = clients
+        self.capacity = capacity or dict()
+        self.refresh_interval = refresh_interval
+        self.clock = clock
+
+        # endpoint name -> (cores, running containers), left out when the
+        # daemon could not be reached
+        self.stats = dict()
+        self.refreshed = None
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, len(clients)),
+                thread_name_prefix="docker"
+            )
+        self.lock = threading.Lock()
 
-    ### Monitoring #############################################################
-    def monitor(self, rate: int):
-        slots_str = "{0:>20} {1} {2}"
-        bar = "{} ".format(chr(9605))
-        data = {
-            "ts": list(),
-            "unavailable": list(),
-            "idle_worker": list(),
-            "idle_job": list(),
-            "running_job": list()
+    @classmethod
+    def from_endpoints(cls, endpoints: List[DockerEndpoint], **kwargs) -> "DockerHostPool":
+        """Connect to each endpoint, LOCAL_DOCKER through the environment."""
+        clients = {
+            e.url: docker.from_env() if e.url == LOCAL_DOCKER else docker.DockerClient(base_url=e.url) 
+            for e in endpoints
         }
 
-        while True:
-            pool = self.get_pool_state()
-            queue = self.get_queue_state()
-            
-            # print pool status information
-            print("**** POOL *****************************")
-            print(slots_str.format(Arch.X86_64.value, bar*pool.X86_64, pool.X86_64))
-            print(slots_str.format(Arch.AARCH64.value, bar*pool.AARCH64, pool.AARCH64))
-            print(slots_str.format("Unavailable", bar*pool.unavailable , pool.unavailable))
-
-            # print queue status information
-            print("**** JOBS *****************************")
-            print(Arch.X86_64.value)
-            print(slots_str.format("running", bar*queue.X86_64.running, queue.X86_64.running))
-            print(slots_str.format("idle", bar*queue.X86_64.idle, queue.X86_64.idle))
-            print(Arch.AARCH64.value)
-            print(slots_str.format("running", bar*queue.AARCH64.running, queue.AARCH64.running))
-            print(slots_str.format("idle", bar*queue.AARCH64.idle, queue.AARCH64.idle))
-
-
-            data["ts"].append(datetime.now().timestamp())
-            data["unavailable"].append(pool.unavailable)
-            data["idle_worker"].append(pool.X86_64)
-            data["idle_job"].append(queue.X86_64.idle)
-            data["running_job"].append(queue.X86_64.running)
-
-            with open("data.pkl", "wb") as f:
-                pickle.dump(data, f)
-            
-            print(data)
+        return cls(clients, {e.url: e.capacity for e in endpoints if e.capacity is not None}, **kwargs)
 
-            time.sleep(rate)
-            os.system("clear")
+    def client(self, host: str) -> docker.DockerClient:
+        """Client of the given endpoint, containers journaled without one ran on LOCAL_DOCKER."""
+        return self.clients.get(host or LOCAL_DOCKER)
 
-################################################################################
-### Workflow Creation/Submission ###############################################
-################################################################################
-def build_and_submit_dag(num_layers, layer_width, job_duration):
-    # TODO: support multiple different architectures (right now we just set
-    # to x86_64
-    dag = dags.DAG()
+    def map(self, fn: Callable, hosts: List[str]) -> Dict[str, object]:
+        """
+        Call fn(host, client) for each of the given endpoints concurrently.
 
-    sub = htcondor.Submit(
-        executable="/bin/sleep",
-        arguments=job_duration,
-        requirements="DEMO_NODE == true",
-        **{"+{}".format(ARCH_CUSTOM_ATTRIBUTE): Arch.AARCH64.value}
-    )
+        :return: result, or the exception raised, per endpoint name
+        :rtype: Dict[str, object]
+        """
+        futures = {host: self.executor.submit(fn, host, self.clients[host]) for host in hosts}
 
-    prev_layer = dag.layer(
-                name="top",
-                submit_description=sub
-            )
-    for i in range(1, num_layers):
-        # odd layer is of width layer_width
-        if i % 2 != 0:
-            l = prev_layer.child_layer(
-                        name="layer_{}".format(i),
-                        submit_description=sub,
-                        vars=[{"num":"{}_{}".format(i,x)} for x in range(layer_width)]
-                    )
-            prev_layer = l
+        results = dict()
+        for host, f in futures.items():
+            try:
+                results[host] = f.result()
+            except Exception as e:
+                results[host] = e
 
-        # even layer is of width 1
-        else:
-            l = prev_layer.child_layer(
-                        name="layer_{}".format(i),
-                        submit_description=sub,
-                        vars=[{"num":"{}_{}".format(i,x)} for x in range(1)]
-                    )
-            prev_layer = l
+        return results
 
-    print(dag.describe())
+    def refresh(self, force: bool = False):
+        """Fetch the cores and running containers of every daemon if the last ones are too old."""
+        with self.lock:
+            now = self.clock()
+            if not force and self.refreshed is not None and now - self.refreshed < self.refresh_interval:
+                return
 
-    dag_path = Path.home() / "htcondor_dag"
+            stats = dict()
+            for host, info in self.map(lambda host, client: client.info(), list(self.clients)).items():
+                if isinstance(info, Exception):
+                    print_red("ERROR docker info on {} FAILED: {}".format(host, info))
+                    continue
 
-    # blow away old files
-    shutil.rmtree(dag_path, ignore_errors=True)
+                stats[host] = (info.get("NCPU", 0), info.get("ContainersRunning", 0))
 
-    dag_file = dags.write_dag(dag, dag_path)
+            self.stats = stats
+            self.refreshed = now
 
-    dag_submit = htcondor.Submit.from_dag(str(dag_file), {"force":True})
-    print(dag_submit)
+    def place(self, count: int, cpus: float, managed: Dict[str, int], preferred: Set[str] = frozenset()) -> List[str]:
+        """
+        Endpoints for count new workers, each one placed on the least loaded
+        daemon that can take it, daemons in preferred (e.g. those that
+        already have the worker image) first. Fewer are returned when the
+        daemons are full.
+
+        :param count: number of workers to place
+        :type count: int
+        :param cpus: cores of a single worker
+        :type cpus: float
+        :param managed: number of our containers per endpoint name
+        :type managed: Dict[str, int]
+        :param preferred: endpoint names to place workers on before any other, defaults to none
+        :type preferred: Set[str], optional
+        :return: endpoint name per placed worker
+        :rtype: List[str]
+        """
+        if count <= 0:
+            return list()
+
+        self.refresh()
+        with self.lock:
+            stats = dict(self.stats)
+
+        def fits(host, running, placed):
+            ncpu = stats[host][0]
+            capacity = self.capacity.get(host)
+            return (
+                (running + 1) * cpus <= ncpu
+                and (capacity is None or managed.get(host, 0) + placed < capacity)
+            )
 
-    coll = htcondor.Collector()
-    schedd_ad = coll.locate(htcondor.DaemonTypes.Schedd)
-    print(schedd_ad)
+        # (not preferred, containers per core, host, running, placed) of
+        # daemons with room
+        heap = [
+            (host not in preferred, running / ncpu, host, running, 0) 
+            for host, (ncpu, running) in stats.items() if ncpu > 0 and fits(host, running, 0)
+        ]
+        heapq.heapify(heap)
+
+        hosts = list()
+        while len(hosts) < count and len(heap) > 0:
+            _, _, host, running, placed = heapq.heappop(heap)
+            hosts.append(host)
+            running, placed = running + 1, placed + 1
+            if fits(host, running, placed):
+                heapq.heappush(heap, (host not in preferred, running / stats[host][0], host, running, placed))
+
+        # until the next refresh, placed containers count as running
+        with self.lock:
+            for host in hosts:
+                if host in self.stats:
+                    ncpu, running = self.stats[host]
+                    self.stats[host] = (ncpu, running + 1)
+
+        return hosts
+
+    def close(self):
+        self.executor.shutdown(wait=False)
 
-    schedd = htcondor.Schedd(schedd_ad)
+    def __str__(self):
+        with self.lock:
+            return "DockerHostPool: {}".format(
+                    ", ".join("{}={}/{} cores".format(host, running, ncpu) 
+                            for host, (ncpu, running) in sorted(self.stats.items()))
+                )
 
-    os.chdir(dag_path)
-    with schedd.transaction() as txn:
-        cluster_id = dag_submit.queue(txn)
-    print("DAGMan job cluster is {}".format(cluster_id))
-    os.chdir("..")
+class ContainerEventWatcher:
+    # container lifecycle events the provisioner reacts to
+    ACTIONS = ("start", "die", "destroy")
+
+    def __init__(
+            self, 
+            docker_clients: Dict[str, docker.DockerClient], 
+            ssh_pool: SSHConnectionPool, 
+            on_event: Callable,
+            max_backoff: float = 60
+        ):
+        """
+        Follows the container events of the x86_64 docker daemons and, with
+        a long running `docker events` over ssh, of every edge host, each on
+        its own daemon thread. Every event is handed to on_event as soon as
+        it is read. A stream that ends or fails is reopened with exponential
+        backoff from the time of the last event it delivered, so events
+        emitted in between are replayed rather than lost.
+
+        :param docker_clients: docker client per endpoint name, empty to only follow the edge hosts
+        :type docker_clients: Dict[str, docker.DockerClient]
+        :param ssh_pool: pool of connections to the edge hosts
+        :type ssh_pool: SSHConnectionPool
+        :param on_event: called with (endpoint name or edge host, container id, action, attributes) per event, attributes holding the container's image and name
+        :type on_event: Callable
+        :param max_backoff: max seconds to wait before reopening a stream, defaults to 60
+        :type max_backoff: float, optional
+        """
+        self.docker_clients = docker_clients
+        self.ssh_pool = ssh_pool
+        self.on_event = on_event
+        self.max_backoff = max_backoff
 
-def parse_args(args=sys.argv[1:]):
-    parser = argparse.ArgumentParser(description="demo tools")
+        self.stop_event = threading.Event()
+        self.threads = list()
 
-    subparsers = parser.add_subparsers(help="demo command to run")
+        # open docker streams and ssh channels, closed to unblock their readers
+        self.streams = dict()
+        self.lock = threading.Lock()
 
-    ### Monitor ##############################################################
-    parser_monitor = subparsers.add_parser("monitor", help="monitor pool and queue")
-    parser_monitor.set_defaults(cmd="monitor")
-    parser_monitor.add_argument(
-        "monitor_rate",
+        # number of events dispatched, for diagnostics
+        self.num_events = 0
+
+    def start(self):
+        """Start following every docker daemon and edge host."""
+        for host in [*self.docker_clients, *self.ssh_pool.hosts]:
+            t = threading.Thread(
+                    target=self._follow, 
+                    args=(host,), 
+                    name="events-{}".format(host), 
+                    daemon=True
+                )
+            t.start()
+            self.threads.append(t)
+
+    def close(self):
+        """Stop following events and close all open streams."""
+        self.stop_event.set()
+        with self.lock:
+            streams = list(self.streams.values())
+
+        for stream in streams:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def _set_stream(self, host: str, stream):
+        with self.lock:
+            self.streams[host] = stream
+
+        # close() may have run before the stream was registered
+        if self.stop_event.is_set():
+            stream.close()
+
+    def _events(self, host: str, since: int) -> Iterator[dict]:
+        if host in self.docker_clients:
+            filters = {"type": "container", "event": list(self.ACTIONS)}
+            stream = self.docker_clients[host].events(since=since, filters=filters, decode=True)
+            self._set_stream(host, stream)
+            yield from stream
+        else:
+            args = ["--format '{{json .}}'"]
+            if since is not None:
+                args.append("--since {}".format(since))
+            args.append("--filter type=container")
+            args.extend("--filter event={}".format(action) for action in self.ACTIONS)
+
+            cmd = "docker events {}".format(" ".join(args))
+            for line in self.ssh_pool.stream(host, cmd, lambda channel: self._set_stream(host, channel)):
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    print_red("unexpected docker event on {}: {}".format(host, line))
+
+    def _follow(self, host: str):
+        since = None
+        delay = 1
+        while not self.stop_event.is_set():
+            try:
+                for event in self._events(host, since):
+                    delay = 1
+                    since = event.get("time", since)
+                    action = event.get("Action", event.get("status"))
+                    actor = event.get("Actor", dict())
+                    cont_id = event.get("id") or actor.get("ID")
+                    if action in self.ACTIONS and cont_id:
+                        self.num_events += 1
+                        self.on_event(host, cont_id, action, actor.get("Attributes", dict()))
+            except Exception as e:
+                if not self.stop_event.is_set():
+                    print_red("docker events on {} FAILED: {}".format(host, e))
+
+            if self.stop_event.wait(delay):
+                break
+            delay = min(delay * 2, self.max_backoff)
+
+class QueueTracker:
+    # job status a job moves to after each event type, None meaning the job
+    # has left the queue
+    EVENT_TRANSITIONS = {
+        htcondor.JobEventType.SUBMIT: JobStatus.IDLE.value,
+        htcondor.JobEventType.EXECUTE: JobStatus.RUNNING.value,
+        htcondor.JobEventType.JOB_EVICTED: JobStatus.IDLE.value,
+        htcondor.JobEventType.SHADOW_EXCEPTION: JobStatus.IDLE.value,
+        htcondor.JobEventType.JOB_HELD: JobStatus.HELD.value,
+        htcondor.JobEventType.JOB_RELEASED: JobStatus.IDLE.value,
+        htcondor.JobEventType.JOB_TERMINATED: None,
+        htcondor.JobEventType.JOB_ABORTED: None,
+    }
+
+    def __init__(
+            self,
+            schedd: htcondor.Schedd,
+            event_logs: List[str],
+            resync_interval: float = 300,
+            event_log_factory: Callable = htcondor.JobEventLog,
+            runtime_observer: Callable = None,
+            clock: Callable = time.monotonic
+        ):
+        """
+        Incrementally maintained QueueState. The queue is scanned once with
+        schedd.xquery and from then on kept up to date by tailing the given
+        job event logs (e.g. the DAGMan nodes.log), so that each call to get()
+        costs O(new events) instead of O(queue). Every resync_interval seconds
+        the queue is scanned again to correct any drift.
+
+        The arch and resource requests of a job are not part of its submit
+        event, so they are taken from REQUIRED_ARCH and RequestCpus etc. when
+        present in the event (e.g. when the job sets
+        job_ad_information_attrs) and otherwise looked up with a single
+        constrained query for all newly submitted clusters.
+
+        :param schedd: schedd that owns the jobs writing to event_logs
+        :type schedd: htcondor.Schedd
+        :param event_logs: paths of the job event logs to tail
+        :type event_logs: List[str]
+        :param resync_interval: seconds between full scans of the queue, defaults to 300
+        :type resync_interval: float, optional
+        :param event_log_factory: callable returning an object with an events(stop_after) method, defaults to htcondor.JobEventLog
+        :type event_log_factory: Callable, optional
+        :param runtime_observer: called with (workload, arch, seconds) for each job with a WORKLOAD and a single arch that terminates, defaults to None
+        :type runtime_observer: Callable, optional
+        :param clock: callable returning the current time in seconds, defaults to time.monotonic
+        :type clock: Callable, optional
+        """
+        self.schedd = schedd
+        self.resync_interval = resync_interval
+        self.clock = clock
+
+        self.event_logs = [event_log_factory(str(p)) for p in event_logs]
+
+        # (cluster, proc) -> [arch, job_status, request, workload, dag_node]
+        self.jobs = dict()
+        # (cluster, proc) -> timestamp of the job's last execute event
+        self.execute_times = dict()
+        self.runtime_observer = runtime_observer
+        self.state = QueueState()
+
+        # number of events applied and full scans done, for diagnostics
+        self.num_events = 0
+        self.num_resyncs = 0
+
+        self.last_resync = None
+        self.lock = threading.Lock()
+
+    def _set_status(
+            self, 
+            job_id: tuple, 
+            arch: str, 
+            job_status: int, 
+            request: Resources = None, 
+            workload: str = None,
+            dag_node: str = None
+        ):
+        prev = self.jobs.get(job_id)
+        if prev is not None:
+            self.state.update(prev[0], prev[1], -1, prev[2], prev[3])
+            self.state.dag_nodes.discard(prev[4])
+
+        if job_status is None:
+            self.jobs.pop(job_id, None)
+            self.execute_times.pop(job_id, None)
+        else:
+            self.jobs[job_id] = [arch, job_status, request, workload, dag_node]
+            self.state.update(arch, job_status, 1, request, workload)
+            if dag_node is not None:
+                self.state.dag_nodes.add(dag_node)
+
+    def _record_runtime(self, job_id: tuple, event):
+        started = self.execute_times.get(job_id)
+        job = self.jobs.get(job_id)
+        if self.runtime_observer is None or started is None or job is None:
+            return
+
+        arch, _, _, workload, _ = job
+        if workload is not None and arch in (a.value for a in Arch):
+            self.runtime_observer(workload, arch, event.timestamp - started)
+
+    def _drain(self) -> list:
+        events = list()
+        for log in self.event_logs:
+            events.extend(log.events(stop_after=0))
+
+        return events
+
+    def resync(self):
+        """
+        Discard pending events and rebuild the job table with a full scan of
+        the queue. Events written after this point are applied on top of the
+        scan by poll(), which converges because each event sets the status of
+        its job rather than adjusting a count.
+        """
+        self._drain()
+
+        self.jobs = dict()
+        self.state = QueueState()
+        with metrics.SCHEDD_XQUERY_LATENCY.time():
+            jobs = list(self.schedd.xquery(projection=["ClusterId", "ProcId", "JobStatus", DAG_NODE_ATTRIBUTE] + JOB_ARCH_ATTRIBUTES + JOB_REQUEST_ATTRIBUTES))
+
+        for job in jobs:
+            self._set_status(
+                (job["ClusterId"], job["ProcId"]), 
+                job_arch(job), 
+                job["JobStatus"],
+                job_request(job),
+                job.get(WORKLOAD_ATTRIBUTE),
+                job_dag_node(job)
+            )
+
+        self.last_resync = self.clock()
+        self.num_resyncs += 1
+
+    def poll(self):
+        """Apply all events written to the event logs since the last poll."""
+        unresolved = set()
+        for event in self._drain():
+            if event.type not in self.EVENT_TRANSITIONS:
+                continue
+
+            self.num_events += 1
+            job_id = (event.cluster, event.proc)
+            job_status = self.EVENT_TRANSITIONS[event.type]
+
+            prev = self.jobs.get(job_id)
+            if prev is not None:
+                arch, request, workload, dag_node = prev[0], prev[2], prev[3], prev[4]
+            elif event.type == htcondor.JobEventType.SUBMIT:
+                arch = event.get(ARCH_CUSTOM_ATTRIBUTE, event.get(ACCEPTABLE_ARCHES_ATTRIBUTE))
+                request = job_request(event)
+                workload = event.get(WORKLOAD_ATTRIBUTE)
+                dag_node = job_dag_node(event)
+                if arch is None or event.get(JOB_REQUEST_ATTRIBUTES[0]) is None:
+                    unresolved.add(job_id)
+            else:
+                # job was not submitted after the last scan, nothing to track
+                continue
+
+            if event.type == htcondor.JobEventType.EXECUTE:
+                self.execute_times[job_id] = event.timestamp
+            elif event.type == htcondor.JobEventType.JOB_TERMINATED:
+                self._record_runtime(job_id, event)
+
+            self._set_status(job_id, arch, job_status, request, workload, dag_node)
+
+        # jobs that have already left the queue no longer need their arch
+        unresolved = {j for j in unresolved if j in self.jobs}
+        if len(unresolved) > 0:
+            self._resolve_arch(unresolved)
+
+    def _resolve_arch(self, job_ids: set):
+        clusters = {cluster for cluster, _ in job_ids}
+        requirements = " || ".join("ClusterId == {}".format(c) for c in sorted(clusters))
+
+        with metrics.SCHEDD_XQUERY_LATENCY.time():
+            jobs = list(self.schedd.xquery(
+                    requirements=requirements,
+                    projection=["ClusterId", "ProcId"] + JOB_ARCH_ATTRIBUTES + JOB_REQUEST_ATTRIBUTES
+                ))
+
+        found = dict()
+        for job in jobs:
+            found[(job["ClusterId"], job["ProcId"])] = (job_arch(job), job_request(job), job.get(WORKLOAD_ATTRIBUTE))
+
+        for job_id in job_ids:
+            job_status, dag_node = self.jobs[job_id][1], self.jobs[job_id][4]
+            if job_id in found:
+                self._set_status(job_id, found[job_id][0], job_status, *found[job_id][1:], dag_node)
+            else:
+                # left the queue between the event and the lookup
+                self._set_status(job_id, None, None)
+
+    def get(self) -> QueueState:
+        """
+        Current state of the queue, resyncing first if resync_interval has
+        elapsed since the last full scan.
+
+        :return: number of idle and running jobs
+        :rtype: QueueState
+        """
+        with self.lock:
+            if self.last_resync is None or self.clock() - self.last_resync >= self.resync_interval:
+                self.resync()
+            else:
+                self.poll()
+
+            return self.state.copy()
+
+class WarmPool:
+    def __init__(
+            self, 
+            sizes: Dict[str, int], 
+            create: Dict[str, Callable], 
+            executor: concurrent.futures.Executor
+        ):
+        """
+        Standby pool of worker containers that have been created (image
+        pulled, filesystem and network set up) but not started, so that
+        scaling up only costs a container start. Containers are not started
+        ahead of time because a started worker would advertise to the
+        collector and be matched before it is handed out.
+
+        :param sizes: number of standby containers to keep per arch
+        :type sizes: Dict[str, int]
+        :param create: callable per arch that creates a single standby container and returns a handle for it
+        :type create: Dict[str, Callable]
+        :param executor: executor used to refill the pool in the background
+        :type executor: concurrent.futures.Executor
+        """
+        self.sizes = sizes
+        self.create = create
+        self.executor = executor
+
+        self.pool = {arch: collections.deque() for arch in sizes}
+        # number of creations in flight per arch
+        self.refilling = {arch: 0 for arch in sizes}
+
+        self.lock = threading.Lock()
+
+    def take(self, arch: str):
+        """
+        Take a standby container of the given arch out of the pool and start
+        refilling the pool in the background.
+
+        :param arch: arch of the container
+        :type arch: str
+        :return: handle returned by the create callable, or None if the pool is empty
+        """
+        with self.lock:
+            pool = self.pool.get(arch)
+            handle = pool.popleft() if pool else None
+
+        self.refill()
+
+        return handle
+
+    def _create(self, arch: str):
+        try:
+            handle = self.create[arch]()
+            with self.lock:
+                self.pool[arch].append(handle)
+        except Exception as e:
+            print_red("FAILED to create standby {} cont: {}".format(arch, e))
+        finally:
+            with self.lock:
+                self.refilling[arch] -= 1
+
+    def refill(self):
+        """Create standby containers until each arch has its configured size."""
+        with self.lock:
+            for arch, size in self.sizes.items():
+                missing = size - len(self.pool[arch]) - self.refilling[arch]
+                for _ in range(missing):
+                    self.refilling[arch] += 1
+                    self.executor.submit(self._create, arch)
+
+    def discard(self, arch: str, cont_id: str):
+        """
+        Drop the standby container with the given id, e.g. because it was
+        removed behind the pool's back, and refill the pool.
+
+        :param arch: arch of the container
+        :type arch: str
+        :param cont_id: full id of the container
+        :type cont_id: str
+        """
+        def handle_id(handle):
+            # handles are (host, container) for x86_64, (host, id) for AARCH64
+            return getattr(handle[1], "id", handle[1])
+
+        with self.lock:
+            pool = self.pool.get(arch)
+            if pool is None:
+                return
+
+            kept = [h for h in pool if handle_id(h) != cont_id]
+            if len(kept) == len(pool):
+                return
+
+            pool.clear()
+            pool.extend(kept)
+
+        self.refill()
+
+    def drain(self) -> Dict[str, list]:
+        """
+        Remove and return all standby containers so that they can be
+        destroyed, and stop refilling.
+
+        :return: handles of all standby containers per arch
+        :rtype: Dict[str, list]
+        """
+        with self.lock:
+            self.sizes = {arch: 0 for arch in self.sizes}
+            drained = {arch: list(pool) for arch, pool in self.pool.items()}
+            for pool in self.pool.values():
+                pool.clear()
+
+        return drained
+
+    def __str__(self):
+        with self.lock:
+            return "WarmPool: {}".format(
+                    ", ".join("{}={}/{}".format(arch, len(self.pool[arch]), size) 
+                            for arch, size in self.sizes.items())
+                )
+
+class Provisioner:
+    def __init__(
+            self, 
+            condor_host: str = None, 
+            token_dir: str = None,
+            edge_hosts: List[EdgeHost] = None,
+            pool_refresh_interval: float = 1.0,
+            event_logs: List[str] = None,
+            queue_resync_interval: float = 300,
+            max_per_tick: int = 10,
+            launch_concurrency: int = 8,
+            io_concurrency: int = 16,
+            registration_timeout: float = 300,
+            warm_pool_sizes: Dict[str, int] = None,
+            dag_watcher: DagStatusWatcher = None,
+            lookahead_lead_time: float = 30,
+            scale_down_policy: ScaleDownPolicy = None,
+            worker_sizes: Dict[str, Resources] = None,
+            throughput_model: ArchThroughputModel = None,
+            metrics_port: int = None,
+            journal: ContainerJournal = None,
+            prefetch_images: bool = False,
+            max_pulls: int = 2,
+            pull_bandwidth: float = None,
+            collector: htcondor.Collector = None,
+            schedd: htcondor.Schedd = None,
+            docker_client: docker.DockerClient = None,
+            docker_endpoints: List[DockerEndpoint] = None,
+            ssh_client_factory: Callable = paramiko.SSHClient,
+            event_log_factory: Callable = htcondor.JobEventLog,
+            clock: Callable = time.monotonic
+        ):
+        self.condor_host = condor_host
+        self.token_dir = token_dir
+
+        # collector, schedd, docker and ssh clients and the clock can be 
+        # replaced by stand-ins with the same interfaces (see simulator.py)
+        self.clock = clock
+        
+        # x86_64 workers are placed on the given docker endpoints, or else
+        # on the one docker_client (or the environment) points to
+        if docker_endpoints:
+            self.docker_hosts = DockerHostPool.from_endpoints(docker_endpoints, clock=clock)
+        else:
+            self.docker_hosts = DockerHostPool({LOCAL_DOCKER: docker_client or docker.from_env()}, clock=clock)
+        self.ssh_pool = SSHConnectionPool(edge_hosts or DEFAULT_EDGE_HOSTS, client_factory=ssh_client_factory)
+        self.edge_docker = EdgeDocker(self.ssh_pool)
+        
+        '''
+        {
+            "<id>": {
+                "cont": <cont obj>,    # X86_64 only
+                "host": <docker endpoint for X86_64, edge host for AARCH64>,
+                "last_idle": <clock time>
+            },
+            ...
+        }
+        '''
+        self.containers = dict()
+        self.containers[Arch.X86_64.value] = dict()
+        self.containers[Arch.AARCH64.value] = dict()
+
+        # names of containers being created by us and ids of standby ones,
+        # whose start events are not theirs to adopt
+        self.launching = set()
+        # containers that died before they were recorded -> time of the
+        # event, so that they are not recorded afterwards
+        self.died = dict()
+
+        self.collector = collector or htcondor.Collector()
+        if schedd is None:
+            self.schedd_ad = self.collector.locate(htcondor.DaemonTypes.Schedd)
+            schedd = htcondor.Schedd(self.schedd_ad)
+        self.schedd = schedd
+
+        # shared by the starter, stopper and monitor so that the collector is
+        # queried at most once per pool_refresh_interval
+        self.pool_snapshot = PoolSnapshotCache(self.collector, pool_refresh_interval, clock)
+
+        # when event logs are given, the queue is tracked incrementally from
+        # them instead of scanned on every call to get_queue_state()
+        self.queue_tracker = None
+        if event_logs:
+            self.queue_tracker = QueueTracker(
+                    self.schedd, 
+                    event_logs, 
+                    queue_resync_interval, 
+                    event_log_factory=event_log_factory,
+                    clock=clock
+                )
+
+        # decides which arch jobs that can run on several arches are counted
+        # against; fed with the runtimes of terminated jobs when event logs
+        # are tailed
+        self.throughput_model = throughput_model or ArchThroughputModel()
+        if self.queue_tracker is not None:
+            self.queue_tracker.runtime_observer = self.throughput_model.observe
+
+        self.lock = threading.Lock()
+
+        # port on localhost /metrics is served on while provisioning, not
+        # served when None
+        self.metrics_port = metrics_port
+
+        # containers started and stopped are recorded to it when given, so
+        # that a restarted provisioner can adopt the ones still running
+        self.journal = journal
+
+        # worker images present on each docker endpoint and edge host, and
+        # pulled in the background during idle periods, when prefetching
+        self.image_cache = None
+        if prefetch_images:
+            self.image_cache = ImageCache(
+                    self.docker_hosts.clients,
+                    self.ssh_pool,
+                    {"docker": WORKER_IMAGES[Arch.X86_64.value], "edge": WORKER_IMAGES[Arch.AARCH64.value]},
+                    max_pulls=max_pulls,
+                    max_bandwidth=pull_bandwidth,
+                    clock=clock
+                )
+
+        # images are only pulled once no worker has been started for
+        # prefetch_idle_period seconds, so that pulls do not compete with
+        # the ones of workers being started
+        self.prefetch_rate = 30
+        self.prefetch_idle_period = 60
+        self.last_launch = None
+
+        # set to stop the control loop, created by provision()
+        self.stop_event = None
+
+        # keeps self.containers in sync with containers that exit on their
+        # own while provisioning, started by provision()
+        self.event_watcher = None
+
+        # rate, in seconds, at which idle containers are looked for; if this
+        # is increased, calculated idle duration can start to become
+        # inaccurate due race conditions from polling the queue
+        self.scale_down_rate = 1
+
+        # decides which idle workers are stopped and bounds the pool size per
+        # arch; by default a worker that has sat idle for longer than 30
+        # seconds is stopped
+        self.scale_down_policy = scale_down_policy or FixedIdleTimeout(max_idle_dur=30)
+
+        # resources of a single worker per arch, used until a worker of that
+        # arch has shown up in the pool and its actual size is known
+        self.worker_sizes = worker_sizes or dict()
+
+        # blocking collector, schedd, docker and ssh calls made by the
+        # control loop run here
+        self.io_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=io_concurrency,
+                thread_name_prefix="io"
+            )
+
+        # when watching a DAG, workers are also started for nodes expected to
+        # become ready within lookahead_lead_time seconds
+        self.dag_watcher = dag_watcher
+        self.lookahead_lead_time = lookahead_lead_time
+
+        # seconds taken by each tick of the control loop
+        self.tick_latencies = {"scale_up": list(), "scale_down": list(), "prefetch": list()}
+
+        # max number of containers started per arch per tick, and max number
+        # of those that are started concurrently
+        self.max_per_tick = max_per_tick
+        self.launch_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=launch_concurrency,
+                thread_name_prefix="launch"
+            )
+
+        # seconds a started container may take to show up in the pool before
+        # it is no longer considered pending
+        self.registration_timeout = registration_timeout
+
+        # indexes between managed containers and their startd ads, updated
+        # once per pool snapshot
+        self.reconciler = Reconciler()
+        self._reconciled_snapshot = None
+
+        # seconds the ads of a container that went away may stay in the
+        # collector before they are invalidated
+        self.orphan_ad_grace = 60
+
+        # seconds taken by each call that started a container, per arch
+        self.launch_latencies = {arch.value: list() for arch in Arch}
+
+        # seconds from the decision to start a container until its slot was
+        # claimed by a job, per arch, for standby (warm) and new (cold) ones
+        self.claim_latencies = {arch.value: {"warm": list(), "cold": list()} for arch in Arch}
+
+        # standby containers, only created for arches with a non zero size
+        self.warm_pool = None
+        if warm_pool_sizes:
+            self.warm_pool = WarmPool(
+                    sizes=warm_pool_sizes,
+                    create={
+                        Arch.X86_64.value: self._create_x86_64_container,
+                        Arch.AARCH64.value: self._create_aarch64_container
+                    },
+                    executor=self.launch_executor
+                )
+
+    ### Workload/Pool State ####################################################
+    def get_queue_state(self) -> QueueState:
+        """
+        Current state of the queue. Returns number of idle and running jobs for
+        x86_64 and ARM
+
+        :return: number of idle and running jobs 
+        :rtype: Provisioner.QueueState
+        """
+        if self.queue_tracker is not None:
+            return self.queue_tracker.get()
+
+        return query_queue_state(self.schedd)
+
+    def get_pool_state(self) -> PoolState:
+        """
+        Get the count of available and unvailable slots, and the unclaimed
+        resources, per architecture. Partitionable slots count as available
+        while they have cores left.
+
+        :raises RuntimeError: encountered unexpected arch
+        :return: current state of the pool 
+        :rtype: Provisioner.PoolState
+        """
+        return self.pool_snapshot.get().pool_state
+
+    def get_idle_workers(self) -> Set[str]:
+        """Return names of all the unclaimed idle workers
+
+        :return: names of all unclaimed idle workers
+        :rtype: Set[str]
+        """
+        return self.pool_snapshot.get().idle_workers
+
+
+    def worker_size(self, arch: Arch, pool_state: PoolState) -> Resources:
+        """
+        Resources a new worker of the given arch adds to the pool: the size
+        of the workers of that arch already in the pool, or else the
+        configured one.
+
+        :param arch: arch of the worker
+        :type arch: Arch
+        :param pool_state: current state of the pool
+        :type pool_state: PoolState
+        :return: resources of a single worker
+        :rtype: Resources
+        """
+        return pool_state.worker_size.get(arch.value) or self.worker_sizes.get(arch.value, DEFAULT_WORKER_SIZE)
+
+    def resource_deficit(
+            self,
+            arch: Arch,
+            queue_state: QueueState,
+            snapshot: PoolSnapshot,
+            load_threshold: float,
+            predicted: int = 0
+        ) -> Resources:
+        """
+        Resources of the given arch missing from the pool for the resources
+        requested by idle jobs to be under load_threshold, counting workers
+        that have been started but are not in the pool yet. Predicted jobs
+        are assumed to request as much as the average idle job.
+
+        :param arch: arch to compute the deficit for
+        :type arch: Arch
+        :param queue_state: current state of the queue
+        :type queue_state: QueueState
+        :param snapshot: current snapshot of the pool
+        :type snapshot: PoolSnapshot
+        :param load_threshold: threshold of requested per available resources
+        :type load_threshold: float
+        :param predicted: number of jobs about to become idle, defaults to 0
+        :type predicted: int, optional
+        :return: missing cpus, memory and disk
+        :rtype: Resources
+        """
+        count = getattr(queue_state, arch.value)
+        demand = count.demand
+        if predicted > 0:
+            per_job = Resources(*(d / count.idle for d in demand)) if count.idle > 0 else DEFAULT_JOB_REQUEST
+            demand = add_resources(demand, per_job, predicted)
+
+        size = self.worker_size(arch, snapshot.pool_state)
+        pending = Resources(*(x * self.count_pending_workers(arch, snapshot) for x in size))
+
+        return compute_resource_deficit(demand, snapshot.pool_state.free[arch.value], pending, load_threshold)
+
+    def compute_load(
+            self,
+            queue_state: QueueState,
+            snapshot: PoolSnapshot,
+            load_threshold: float,
+            predicted: Dict[str, int] = None
+        ) -> Dict[str, Resources]:
+        """
+        Compute the resource deficit per arch: cpus, memory and disk that
+        would have to be added to the pool for the resources requested by
+        idle jobs of a given arch, divided by the unclaimed resources of the
+        same arch (including workers on their way), to be under
+        load_threshold (see resource_deficit()).
+
+        :param queue_state: current state of the queue, flexible jobs already placed
+        :type queue_state: QueueState
+        :param snapshot: current snapshot of the pool
+        :type snapshot: PoolSnapshot
+        :param load_threshold: threshold of requested per available resources
+        :type load_threshold: float
+        :param predicted: number of jobs per arch about to become idle, defaults to None
+        :type predicted: Dict[str, int], optional
+        :return: missing resources for x86_64 and aarch64
+        :rtype: Dict[str, Resources]
+        """
+        predicted = predicted or dict()
+
+        return {
+            arch.value: self.resource_deficit(arch, queue_state, snapshot, load_threshold, predicted.get(arch.value, 0))
+            for arch in Arch
+        }
+
+    ### Container Management ###################################################
+    def on_container_event(self, host: str, cont_id: str, action: str, attributes: dict = None):
+        """
+        Apply a docker event to the container table. A worker container that
+        starts without being launched by the provisioner (e.g. by hand, or
+        left by a previous run) is adopted. A managed container that dies or
+        is destroyed without the provisioner stopping it (e.g. a crashed
+        worker, removed because it was started with --rm) is forgotten right
+        away, so that it is neither counted as pending or against max
+        workers nor killed later, and one that dies before its launch was
+        recorded is not recorded at all. Standby containers that go away
+        are dropped from the warm pool.
+
+        :param host: docker endpoint or edge host the event comes from
+        :type host: str
+        :param cont_id: full id of the container
+        :type cont_id: str
+        :param action: one of ContainerEventWatcher.ACTIONS
+        :type action: str
+        :param attributes: attributes of the container, its image and name, defaults to None
+        :type attributes: dict, optional
+        """
+        attributes = attributes or dict()
+        arch = Arch.X86_64 if host in self.docker_hosts.clients else Arch.AARCH64
+        if action == "start":
+            self._adopt_container(arch, host, cont_id, attributes)
+            return
+
+        if action not in ("die", "destroy"):
+            return
+
+        value = self._forget_container(arch, cont_id)
+        if value is None:
+            now = self.clock()
+            with self.lock:
+                self.launching.discard(cont_id)
+                self.died = {_id: t for _id, t in self.died.items() if now - t < DIED_CONTAINER_TTL}
+                self.died[cont_id] = now
+
+        # containers being stopped by the provisioner die as well
+        if value is not None and not value.get("stopping"):
+            metrics.CONTAINERS_EXITED.labels(arch=arch.value).inc()
+            print_red("{} cont {} exited on its own".format(arch.value, cont_id))
+
+        if self.warm_pool is not None:
+            self.warm_pool.discard(arch.value, cont_id)
+
+        # a standby container is journaled without being managed
+        if value is None and self.journal is not None:
+            self.journal.record_stop([cont_id])
+
+    def _adopt_container(self, arch: Arch, host: str, cont_id: str, attributes: dict):
+        image = attributes.get("image")
+        if image is None or normalize_image(image) != normalize_image(WORKER_IMAGES[arch.value]):
+            return
+
+        def known():
+            # called with self.lock held
+            return (
+                cont_id in self.containers[arch.value]
+                or cont_id in self.launching
+                or attributes.get("name") in self.launching
+                or cont_id in self.died
+            )
+
+        with self.lock:
+            if known():
+                return
+
+        entry = {"host": host, "warm": False}
+        if arch == Arch.X86_64:
+            try:
+                entry["cont"] = self.docker_hosts.client(host).containers.get(cont_id)
+            except docker.errors.NotFound:
+                return
+
+        now = self.clock()
+        with self.lock:
+            if known():
+                return
+
+            self.containers[arch.value][cont_id] = {
+                "last_idle": now,
+                "started": now,
+                "registered": False,
+                "claimed": False,
+                **entry
+            }
+            transition = self.reconciler.add_container(cont_id, arch.value, now)
+            if transition is not None:
+                self._apply_transition(transition, now)
+
+        if self.journal is not None:
+            name = attributes.get("name") or cont_id
+            self.journal.record_launch([name], arch.value, host, now)
+            self.journal.record_start(cont_id, now, name)
+
+        # the container runs the worker image, so the image is on its host
+        if self.image_cache is not None:
+            self.image_cache.mark_present(host)
+
+        print_green("ADOPTED {} cont {} on {}".format(arch.value, cont_id, host))
+
+    def _forget_container(self, arch: Arch, cont_id: str) -> dict:
+        with self.lock:
+            value = self.containers[arch.value].pop(cont_id, None)
+            self.reconciler.remove_container(cont_id, self.clock())
+
+        if value is not None and self.journal is not None:
+            self.journal.record_stop([cont_id])
+
+        return value
+
+    def _kill_x86_64_container(self, _id: str, value: dict) -> bool:
+        value["stopping"] = True
+        killed = False
+        try:
+            value["cont"].kill(signal=signal.SIGINT)
+            metrics.CONTAINERS_STOPPED.labels(arch=Arch.X86_64.value).inc()
+            killed = True
+        except docker.errors.APIError as e:
+            # 404: already removed, 409: not running, either way it is gone
+            if e.status_code not in (404, 409):
+                raise
+
+        self._forget_container(Arch.X86_64, _id)
+
+        return killed
+
+    def scale_down(self):
+        """
+        Let the scale down policy pick which of the idle containers, as
+        tracked by the reconciler, to stop. Those are killed via SIGINT,
+        x86_64 ones concurrently and AARCH64 ones with one command per edge
+        host. Containers whose startd never showed up or went away are
+        stopped as well, and the ads left behind by containers that are gone
+        are invalidated.
+        """
+        self.reconcile(self.pool_snapshot.get())
+        now = self.clock()
+
+        x86_64_to_stop = list()
+        aarch64_to_stop = collections.defaultdict(list)
+        orphans = set(self.reconciler.orphan_containers(now, self.registration_timeout))
+        # arch -> containers picked by the policy, reported back once killed
+        selected = dict()
+        for arch in Arch:
+            idle = [
+                (_id, now - since) for _id, since in self.reconciler.idle_containers(arch.value).items()
+            ]
+
+            with self.lock:
+                stop = set(self.scale_down_policy.select(arch.value, idle, len(self.containers[arch.value]), now))
+                selected[arch] = stop
+                to_stop = [
+                    (_id, self.containers[arch.value][_id]) for _id in stop | orphans
+                    if _id in self.containers[arch.value]
+                ]
+
+            for _id, value in to_stop:
+                if _id in stop:
+                    idle_dur = now - value["last_idle"]
+                    print_red("STOPPING {} cont {} (idle for {} seconds) sending SIGINT".format(arch.value, _id, idle_dur))
+                else:
+                    print_red("STOPPING {} cont {} (no startd in the pool) sending SIGINT".format(arch.value, _id))
+
+                if arch == Arch.X86_64:
+                    x86_64_to_stop.append((_id, value))
+                else:
+                    aarch64_to_stop[value["host"]].append(_id)
+
+        futures = {
+            self.io_executor.submit(self._kill_x86_64_container, _id, value): _id 
+            for _id, value in x86_64_to_stop
+        }
+        killed = {Arch.AARCH64: self.kill_aarch64_containers(aarch64_to_stop), Arch.X86_64: set()}
+
+        self.invalidate_orphan_ads(self.reconciler.orphan_machines(now, self.orphan_ad_grace))
+
+        for f in concurrent.futures.as_completed(futures):
+            try:
+                if f.result():
+                    killed[Arch.X86_64].add(futures[f])
+            except Exception as e:
+                print_red("ERROR docker could not kill X86_64 cont: {}".format(e))
+
+        with self.lock:
+            for arch, ids in killed.items():
+                for _id in ids & selected[arch]:
+                    self.scale_down_policy.observe_stop(arch.value, _id)
+
+    def invalidate_orphan_ads(self, machines: Set[str]):
+        """
+        Remove the startd ads of machines whose container is gone from the
+        collector, so that they no longer count as available slots. A startd
+        that is killed rather than shut down leaves its ads behind until they
+        expire.
+
+        :param machines: short hostnames of the startds
+        :type machines: Set[str]
+        """
+        for machine in machines:
+            names = self.reconciler.names(machine)
+            if len(names) > 0:
+                ad = classad.ClassAd()
+                ad["MyType"] = "Query"
+                ad["TargetType"] = "Machine"
+                ad["Requirements"] = classad.ExprTree(
+                        " || ".join("Name == {}".format(classad.quote(name)) for name in sorted(names))
+                    )
+                try:
+                    self.collector.advertise([ad], "INVALIDATE_STARTD_ADS")
+                    print_red("INVALIDATED {} orphan ads of {}".format(len(names), machine))
+                except Exception as e:
+                    print_red("ERROR could not invalidate ads of {}: {}".format(machine, e))
+
+            self.reconciler.forget_machine(machine)
+
+    def shutdown_all_containers(self):
+        """Shutdown all running containers."""
+        # the kills remove containers from the table while we go through it
+        with self.lock:
+            x86_64_containers = list(self.containers[Arch.X86_64.value].items())
+            aarch64_containers = list(self.containers[Arch.AARCH64.value].items())
+
+        futures = list()
+        for _id, value in x86_64_containers:
+            print("shutting down container {}".format(_id))
+            futures.append(self.io_executor.submit(self._kill_x86_64_container, _id, value))
+
+        to_stop = collections.defaultdict(list)
+        for cont_id, value in aarch64_containers:
+            print("shutting down container {}".format(cont_id))
+            to_stop[value["host"]].append(cont_id)
+
+        self.kill_aarch64_containers(to_stop)
+
+        for f in concurrent.futures.as_completed(futures):
+            try:
+                f.result()
+            except Exception as e:
+                print("ERROR docker could not kill container: {}".format(e))
+
+        if self.warm_pool is not None:
+            standby = self.warm_pool.drain()
+            removed = list()
+            for host, cont in standby.get(Arch.X86_64.value, list()):
+                print("removing standby container {} on {}".format(cont.id, host))
+                cont.remove(force=True)
+                removed.append(cont.id)
+
+            to_remove = collections.defaultdict(list)
+            for host, cont_id in standby.get(Arch.AARCH64.value, list()):
+                print("removing standby container {}".format(cont_id))
+                to_remove[host].append(cont_id)
+
+            for host, errors in self.edge_docker.remove_many(to_remove).items():
+                for cont_id, error in errors.items():
+                    if error is not None:
+                        print("ERROR SSH docker could not remove {} on {}: {}".format(cont_id, host, error))
+                    else:
+                        removed.append(cont_id)
+
+            if self.journal is not None:
+                self.journal.record_stop(removed)
+
+        # anything of ours still running on the edge hosts has leaked
+        for host, containers in self.edge_docker.ps(list(self.ssh_pool.hosts)).items():
+            for cont_id, info in containers.items():
+                if cont_id in self.containers[Arch.AARCH64.value] and info["state"] == "running":
+                    print("ERROR container {} on {} is still running".format(cont_id, host))
+
+        self.ssh_pool.close()
+        self.docker_hosts.close()
+
+    def kill_aarch64_containers(self, ids_by_host: Dict[str, List[str]]):
+        """
+        Send SIGINT to AARCH64 containers, one `docker kill` per edge host, 
+        and forget the ones that were signalled or no longer exist.
+
+        :param ids_by_host: container ids to kill per edge host
+        :type ids_by_host: Dict[str, List[str]]
+        :return: ids of the containers that were signalled
+        :rtype: Set[str]
+        """
+        killed = set()
+        if len(ids_by_host) == 0:
+            return killed
+
+        with self.lock:
+            for ids in ids_by_host.values():
+                for cont_id in ids:
+                    if cont_id in self.containers[Arch.AARCH64.value]:
+                        self.containers[Arch.AARCH64.value][cont_id]["stopping"] = True
+
+        for host, errors in self.edge_docker.kill_many(ids_by_host).items():
+            for cont_id, error in errors.items():
+                if error is not None:
+                    print_red("ERROR SSH docker could not kill AARCH64 cont {} on {}: {}".format(cont_id, host, error))
+
+                if error is None:
+                    metrics.CONTAINERS_STOPPED.labels(arch=Arch.AARCH64.value).inc()
+                    killed.add(cont_id)
+
+                if error is None or "No such container" in error:
+                    self._forget_container(Arch.AARCH64, cont_id)
+
+        return killed
+
+    def _create_x86_64_container(self) -> tuple:
+        """
+        Create, but do not start, a single x86_64 worker container on the 
+        least loaded docker daemon.
+
+        :raises RuntimeError: no docker daemon has room for another worker
+        :return: docker endpoint and created container
+        :rtype: tuple
+        """
+        hosts = self._pick_docker_hosts(1)
+        if len(hosts) == 0:
+            raise RuntimeError("no docker host has room for another worker")
+
+        name = str(uuid.uuid1())
+        self._begin_launch([name], Arch.X86_64, hosts[0], self.clock(), standby=True)
+        try:
+            with metrics.DOCKER_CREATE_LATENCY.time():
+                cont = self.docker_hosts.client(hosts[0]).containers.create(
+                    image=WORKER_IMAGES[Arch.X86_64.value],
+                    name=name,
+                    volumes=["/local-scratch/tanaka/condorexec/secrets:/root/secrets:ro"],
+                    environment={"CONDOR_HOST":"workflow.isi.edu",},
+                    auto_remove=True,
+                    detach=True
+                )
+        except Exception as e:
+            self._launch_failed([name], isinstance(e, docker.errors.APIError))
+            raise
+
+        self._standby_created(name, cont.id)
+
+        return hosts[0], cont
+
+    def _create_aarch64_container(self) -> tuple:
+        """
+        Create, but do not start, a single AARCH64 worker container on an
+        edge host over ssh.
+
+        :raises RuntimeError: ssh docker command failed
+        :return: edge host and id of the created container
+        :rtype: tuple
+        """
+        host = self._pick_edge_hosts(1)[0]
+        name = str(uuid.uuid1())
+        self._begin_launch([name], Arch.AARCH64, host, self.clock(), standby=True)
+        try:
+            cont_id, error = self.edge_docker.run(host, {name: self._aarch64_docker_args(name)}, create_only=True)[name]
+        except Exception:
+            self._launch_failed([name], refused=False)
+            raise
+
+        if error is not None:
+            self._launch_failed([name], refused=True)
+            raise RuntimeError("SSH docker create command failed: {}".format(error))
+
+        self._standby_created(name, cont_id)
+
+        return host, cont_id
+
+    def _pick_docker_hosts(self, count: int) -> List[str]:
+        """
+        Docker endpoints for up to count new x86_64 containers, see 
+        DockerHostPool.place(). Endpoints that already have the worker
+        image are preferred.
+        """
+        with self.lock:
+            managed = collections.Counter(value["host"] for value in self.containers[Arch.X86_64.value].values())
+
+        cpus = self.worker_size(Arch.X86_64, self.pool_snapshot.get().pool_state).cpus
+        preferred = self.image_cache.hosts_with(self.docker_hosts.clients) if self.image_cache is not None else set()
+
+        return self.docker_hosts.place(count, cpus, managed, preferred)
+
+    def _pick_edge_hosts(self, count: int) -> List[str]:
+        """
+        Edge hosts for count new AARCH64 containers, each one placed on the
+        host running the fewest of our containers so far. A host that already
+        has the worker image counts as running EDGE_IMAGE_PREFERENCE fewer
+        containers than it does, and wins ties, so that the image is reused
+        without piling workers onto the hosts that have it.
+        """
+        with self.lock:
+            counts = {hostname: 0 for hostname in self.ssh_pool.hosts}
+            for value in self.containers[Arch.AARCH64.value].values():
+                if value["host"] in counts:
+                    counts[value["host"]] += 1
+
+        preferred = self.image_cache.hosts_with(counts) if self.image_cache is not None else set()
+
+        hosts = list()
+        for _ in range(count):
+            host = min(counts, key=lambda h: (
+                    counts[h] - (EDGE_IMAGE_PREFERENCE if h in preferred else 0),
+                    h not in preferred
+                ))
+            counts[host] += 1
+            hosts.append(host)
+
+        return hosts
+
+    def _aarch64_docker_args(self, name: str) -> List[str]:
+        env = {
+            "CONDOR_HOST": "workflow.isi.edu",
+            # advertise the same custom attribute as the x86_64 demo worker
+            "_CONDOR_DEMO_NODE": "true",
+            "_CONDOR_STARTD_ATTRS": "DEMO_NODE"
+        }
+        if self.token_dir is not None:
+            with (Path(self.token_dir) / "cm-token").open("r") as f:
+                env["TOKEN"] = f.read().strip()
+
+        return [
+            "--rm",
+            "--name={}".format(name),
+            *("-e {}={}".format(k, shlex.quote(v)) for k, v in env.items()),
+            WORKER_IMAGES[Arch.AARCH64.value]
+        ]
+
+    def _begin_launch(self, names: List[str], arch: Arch, host: str, requested: float, standby: bool = False):
+        # called before the containers are created, so that their start
+        # events are not taken for containers to adopt and a crash in
+        # between leaves a journal row to match them by
+        with self.lock:
+            self.launching.update(names)
+
+        if self.journal is not None:
+            self.journal.record_launch(names, arch.value, host, requested, standby)
+
+    def _launch_failed(self, names: List[str], refused: bool):
+        with self.lock:
+            self.launching.difference_update(names)
+
+        # containers docker refused to create are gone for good, any other
+        # failure may have created them and leaves their rows for resume()
+        if refused and self.journal is not None:
+            self.journal.record_abandoned(names)
+
+    def _standby_created(self, name: str, cont_id: str):
+        # a standby container is known by its id from now on, its start
+        # event comes once it is taken from the warm pool
+        with self.lock:
+            self.launching.discard(name)
+            self.launching.add(cont_id)
+
+        if self.journal is not None:
+            self.journal.record_created(name, cont_id)
+
+    def _record_start(self, arch: Arch, cont_id: str, entry: dict, requested: float, name: str = None):
+        now = self.clock()
+        latency = now - requested
+        with self.lock:
+            self.launching.discard(name)
+            self.launching.discard(cont_id)
+
+            # its die event came before the container could be recorded
+            died = self.died.pop(cont_id, None) is not None
+            if not died:
+                self.containers[arch.value][cont_id] = {
+                    "last_idle": now,
+                    "started": requested,
+                    "registered": False,
+                    "claimed": False,
+                    **entry
+                }
+                self.launch_latencies[arch.value].append(latency)
+
+                # a standby container's startd may already be in the pool
+                transition = self.reconciler.add_container(cont_id, arch.value, now)
+                if transition is not None:
+                    self._apply_transition(transition, now)
+
+        if died:
+            if self.journal is not None:
+                if name is not None:
+                    self.journal.record_abandoned([name])
+                else:
+                    self.journal.record_stop([cont_id])
+
+            print_red("{} cont {} exited before it was recorded".format(arch.value, cont_id))
+            return
+
+        if self.journal is not None:
+            self.journal.record_start(cont_id, requested, name)
+
+        # standby containers were created from an image already on their host,
+        # so they are not counted as hits or misses
+        if self.image_cache is not None:
+            if entry["warm"]:
+                self.image_cache.mark_present(entry["host"])
+            else:
+                self.image_cache.record_start(entry["host"])
+
+        metrics.CONTAINERS_STARTED.labels(arch=arch.value).inc()
+
+        print_green("STARTED {} cont {} in {:.2f} seconds".format(arch.value, cont_id, latency))
+
+    def _start_x86_64_container(self, requested: float, host: str, standby=None) -> str:
+        """
+        Start a single x86_64 worker container: the given standby container,
+        or else a new one.
+
+        :param requested: clock time at which the container was requested
+        :type requested: float
+        :param host: docker endpoint to start the container on
+        :type host: str
+        :param standby: standby container created on host, defaults to None
+        :type standby: docker.models.containers.Container, optional
+        :return: id of the started container
+        :rtype: str
+        """
+        cont = standby
+        warm = cont is not None
+
+        name = None
+        if warm:
+            try:
+                cont.start()
+            except Exception:
+                with self.lock:
+                    self.launching.discard(cont.id)
+                raise
+        else:
+            name = str(uuid.uuid1())
+            self._begin_launch([name], Arch.X86_64, host, requested)
+            try:
+                with metrics.DOCKER_RUN_LATENCY.time():
+                    cont = self.docker_hosts.client(host).containers.run(
+                        image=WORKER_IMAGES[Arch.X86_64.value],
+                        name=name,
+                        volumes=["/local-scratch/tanaka/condorexec/secrets:/root/secrets:ro"],
+                        environment={"CONDOR_HOST":"workflow.isi.edu",},
+                        remove=True,
+                        detach=True  
+                    )
+            except Exception as e:
+                self._launch_failed([name], isinstance(e, docker.errors.APIError))
+                raise
+
+        self._record_start(Arch.X86_64, cont.id, {"cont": cont, "host": host, "warm": warm}, requested, name)
+
+        return cont.id
+
+    def _start_aarch64_containers(self, host: str, standby: List[str], count: int, requested: float) -> List[str]:
+        """
+        Start containers on a single edge host: the given standby containers
+        with one `docker start`, and count new ones with one remote script.
+
+        :param host: edge host to start the containers on
+        :type host: str
+        :param standby: ids of standby containers on host to start
+        :type standby: List[str]
+        :param count: number of new containers to run
+        :type count: int
+        :param requested: clock time at which the containers were requested
+        :type requested: float
+        :return: ids of the containers that were started
+        :rtype: List[str]
+        """
+        started = list()
+        for cont_id, error in self.edge_docker.start(host, standby).items():
+            if error is None:
+                self._record_start(Arch.AARCH64, cont_id, {"host": host, "warm": True}, requested)
+                started.append(cont_id)
+            else:
+                print_red("FAILED to start standby AARCH64 cont {} on {}: {}".format(cont_id, host, error))
+                with self.lock:
+                    self.launching.discard(cont_id)
+
+        names = [str(uuid.uuid1()) for _ in range(count)]
+        self._begin_launch(names, Arch.AARCH64, host, requested)
+        try:
+            outcome = self.edge_docker.run(host, {name: self._aarch64_docker_args(name) for name in names})
+        except Exception:
+            self._launch_failed(names, refused=False)
+            raise
+
+        failed = list()
+        for name, (cont_id, error) in outcome.items():
+            if error is None:
+                self._record_start(Arch.AARCH64, cont_id, {"host": host, "warm": False}, requested, name)
+                started.append(cont_id)
+            else:
+                print_red("FAILED to start AARCH64 cont {} on {}: {}".format(name, host, error))
+                failed.append(name)
+
+        self._launch_failed(failed, refused=True)
+
+        return started
+
+    def reconcile(self, snapshot: PoolSnapshot):
+        """
+        Apply a pool snapshot to the reconciler, once per snapshot, and
+        record what the state changes of managed containers tell about them:
+        time to register, time to claim, and how long idle workers waited
+        before being reused.
+
+        :param snapshot: current snapshot of the pool
+        :type snapshot: PoolSnapshot
+        """
+        with self.lock:
+            if snapshot is self._reconciled_snapshot:
+                return
+            self._reconciled_snapshot = snapshot
+
+            now = self.clock()
+            idle = list()
+            for transition in self.reconciler.update(snapshot.slots, now):
+                self._apply_transition(transition, now)
+                if transition.state == ContainerState.IDLE:
+                    idle.append((transition.container, now))
+
+        if self.journal is not None:
+            self.journal.record_idle(idle)
+
+    def _apply_transition(self, transition, now: float):
+        # called with self.lock held
+        value = self.containers[transition.arch].get(transition.container)
+        if value is None:
+            return
+
+        if transition.prev == ContainerState.PENDING and not value["registered"]:
+            self.scale_down_policy.observe_start_latency(transition.arch, now - value["started"])
+            value["registered"] = True
+
+        if transition.state == ContainerState.BUSY:
+            if not value["claimed"]:
+                value["claimed"] = True
+                self.claim_latencies[transition.arch]["warm" if value["warm"] else "cold"].append(
+                        now - value["started"]
+                    )
+            elif transition.prev == ContainerState.IDLE:
+                self.scale_down_policy.observe_reuse(transition.arch, transition.container, now - transition.since)
+        elif transition.state == ContainerState.IDLE:
+            value["last_idle"] = now
+
+    def resume(self):
+        """
+        Adopt the containers a previous run left running, as recorded in the
+        journal, so that a restart neither starts workers that already exist
+        nor leaks them. Each journaled container is checked against docker,
+        one inspect per x86_64 container and one `docker ps` per edge host,
+        all concurrently, containers the previous run crashed while creating
+        being looked up by the name they were journaled with. Running ones
+        are managed again with their last idle time. Ones that exist without
+        running, e.g. standby containers or containers created but never
+        started, are removed. The others are recorded as stopped and the ads
+        they left in the collector are invalidated. Adopted containers whose
+        startd is not in the pool are stopped by scale_down after
+        registration_timeout.
+        """
+        if self.journal is None:
+            return
+
+        entries = self.journal.running()
+        if len(entries) == 0:
+            return
+
+        def inspect(entry):
+            client = self.docker_hosts.client(entry.host)
+            if client is None:
+                print_red("WARNING docker host {} of {} is no longer configured".format(entry.host, entry.name))
+                return None
+
+            try:
+                return client.containers.get(entry.cont_id or entry.name)
+            except docker.errors.NotFound:
+                return None
+
+        # (id, container table entry) of the running containers and the
+        # containers to remove, per journaled name
+        alive = dict()
+        leftover_x86_64 = list()
+        leftover_aarch64 = collections.defaultdict(list)
+        # journaled names that could not be checked and are left as they are
+        unknown = set()
+
+        x86_64 = [e for e in entries if e.arch == Arch.X86_64.value]
+        for entry, cont in zip(x86_64, self.io_executor.map(inspect, x86_64)):
+            if cont is None:
+                continue
+
+            if cont.status == "running":
+                alive[entry.name] = (cont.id, {"cont": cont, "host": entry.host or LOCAL_DOCKER})
+            else:
+                leftover_x86_64.append(cont)
+
+        aarch64 = [e for e in entries if e.arch == Arch.AARCH64.value]
+        inventory = self.edge_docker.ps(sorted({e.host for e in aarch64}))
+        ids_by_name = {
+            host: {info["name"]: cont_id for cont_id, info in containers.items()}
+            for host, containers in inventory.items()
+        }
+        for entry in aarch64:
+            if entry.host not in inventory:
+                if entry.cont_id is None:
+                    print_red("WARNING could not list containers on {}, leaving {} for later".format(entry.host, entry.name))
+                    unknown.add(entry.name)
+                else:
+                    # cannot tell, keep managing it rather than leak it
+                    print_red("WARNING could not list containers on {}, adopting {}".format(entry.host, entry.cont_id))
+                    alive[entry.name] = (entry.cont_id, {"host": entry.host})
+                continue
+
+            cont_id = entry.cont_id or ids_by_name[entry.host].get(entry.name)
+            info = inventory[entry.host].get(cont_id)
+            if info is None:
+                continue
+
+            if info["state"] == "running":
+                alive[entry.name] = (cont_id, {"host": entry.host})
+            else:
+                leftover_aarch64[entry.host].append(cont_id)
+
+        futures = list()
+        for cont in leftover_x86_64:
+            print("removing leftover container {}".format(cont.id))
+            futures.append(self.io_executor.submit(cont.remove, force=True))
+
+        for f in futures:
+            try:
+                f.result()
+            except docker.errors.APIError as e:
+                print_red("ERROR docker could not remove leftover container: {}".format(e))
+
+        for host, errors in self.edge_docker.remove_many(leftover_aarch64).items():
+            for cont_id, error in errors.items():
+                if error is not None:
+                    print_red("ERROR SSH docker could not remove leftover {} on {}: {}".format(cont_id, host, error))
+
+        # machines already in the pool start out idle or busy, from the time
+        # they were journaled as last idle
+        self.reconcile(self.pool_snapshot.get())
+        now = self.clock()
+
+        gone = list()
+        stale = set()
+        with self.lock:
+            for entry in entries:
+                if entry.name in unknown:
+                    continue
+
+                cont_id = alive[entry.name][0] if entry.name in alive else entry.cont_id
+                machine = container_machine(cont_id) if cont_id is not None else None
+                registered = machine is not None and len(self.reconciler.names(machine)) > 0
+                if entry.name not in alive:
+                    gone.append(entry.name)
+                    if registered:
+                        stale.add(machine)
+                    continue
+
+                self.containers[entry.arch][cont_id] = {
+                    "last_idle": entry.last_idle,
+                    "started": entry.started,
+                    "registered": True,
+                    "claimed": True,
+                    "warm": entry.warm,
+                    **alive[entry.name][1]
+                }
+
+                since = entry.last_idle if registered else now
+                transition = self.reconciler.add_container(cont_id, entry.arch, since)
+                if transition is not None:
+                    self._apply_transition(transition, since)
+
+        # containers that were running before their row said so
+        for entry in entries:
+            if entry.name in alive and entry.state != RUNNING:
+                self.journal.record_start(alive[entry.name][0], entry.started, entry.name)
+
+        self.journal.record_abandoned(gone)
+        self.journal.compact()
+        self.invalidate_orphan_ads(stale)
+
+        print_green("RESUMED {} containers from {}, {} no longer running".format(
+                len(alive), self.journal.path, len(gone)
+            ))
+
+    def count_pending_workers(self, arch: Arch, snapshot: PoolSnapshot) -> int:
+        """
+        Count containers of the given arch that have been started but whose
+        startd has not yet shown up in the pool. Containers that take longer
+        than registration_timeout to show up are no longer counted so that a
+        broken worker cannot block scale up.
+
+        :param arch: arch of the containers
+        :type arch: Arch
+        :param snapshot: current snapshot of the pool
+        :type snapshot: PoolSnapshot
+        :return: number of pending workers
+        :rtype: int
+        """
+        self.reconcile(snapshot)
+
+        now = self.clock()
+        with self.lock:
+            return sum(
+                1 for _id in self.reconciler.pending(arch.value)
+                if now - self.containers[arch.value][_id]["started"] < self.registration_timeout
+            )
+
+    def launch_workers(self, arch: Arch, count: int) -> List[str]:
+        """
+        Start count workers of the given arch concurrently, bounded by the
+        size of the launch executor.
+
+        :param arch: arch of the workers to start
+        :type arch: Arch
+        :param count: number of workers to start
+        :type count: int
+        :return: ids of the containers that were started
+        :rtype: List[str]
+        """
+        requested = self.clock()
+        self.last_launch = requested
+        if arch == Arch.X86_64:
+            # standby containers first, each started on the host it was
+            # created on, new ones on the least loaded hosts
+            standby = list()
+            while self.warm_pool is not None and len(standby) < count:
+                handle = self.warm_pool.take(Arch.X86_64.value)
+                if handle is None:
+                    break
+
+                standby.append(handle)
+
+            hosts = self._pick_docker_hosts(count - len(standby))
+            if len(standby) + len(hosts) < count:
+                print_red("only {} of {} X86_64 conts fit on the docker hosts".format(len(standby) + len(hosts), count))
+
+            futures = [
+                self.launch_executor.submit(self._start_x86_64_container, requested, host, cont) 
+                for host, cont in standby
+            ] + [
+                self.launch_executor.submit(self._start_x86_64_container, requested, host) 
+                for host in hosts
+            ]
+        else:
+            # one batch per edge host, standby containers first
+            batches = collections.defaultdict(lambda: {"standby": list(), "new": 0})
+            num_standby = 0
+            while self.warm_pool is not None and num_standby < count:
+                standby = self.warm_pool.take(Arch.AARCH64.value)
+                if standby is None:
+                    break
+
+                host, cont_id = standby
+                batches[host]["standby"].append(cont_id)
+                num_standby += 1
+
+            for host in self._pick_edge_hosts(count - num_standby):
+                batches[host]["new"] += 1
+
+            futures = [
+                self.launch_executor.submit(
+                    self._start_aarch64_containers, 
+                    host, 
+                    batch["standby"], 
+                    batch["new"], 
+                    requested
+                ) for host, batch in batches.items()
+            ]
+
+        started = list()
+        for f in concurrent.futures.as_completed(futures):
+            try:
+                result = f.result()
+                started.extend(result if isinstance(result, list) else [result])
+            except Exception as e:
+                print_red("FAILED to start {} cont: {}".format(arch.value, e))
+
+        return started
+
+    def predict_demand(self, queued: Set[str] = frozenset()) -> Dict[str, int]:
+        """
+        Number of DAG nodes per arch expected to become ready within
+        lookahead_lead_time seconds, empty when no DAG is being watched.
+        Nodes whose jobs are already in the queue are counted as idle jobs
+        by the queue state and left out here.
+
+        :param queued: names of the DAG nodes whose jobs are in the queue, defaults to frozenset()
+        :type queued: Set[str], optional
+        :return: predicted number of new idle jobs per arch
+        :rtype: Dict[str, int]
+        """
+        if self.dag_watcher is None:
+            return dict()
+
+        return self.dag_watcher.predict(self.clock(), self.lookahead_lead_time, queued)
+
+    def place_flexible_jobs(self, queue_state: QueueState, snapshot: PoolSnapshot) -> QueueState:
+        """
+        Count each idle job that can run on several arches against the arch
+        where the throughput model expects the queue to be finished soonest,
+        given the workers of each arch and the idle jobs already pinned to
+        it. Running flexible jobs are not counted against any arch.
+
+        :param queue_state: current state of the queue
+        :type queue_state: QueueState
+        :param snapshot: current snapshot of the pool
+        :type snapshot: PoolSnapshot
+        :return: copy of queue_state with flexible idle jobs added to the per arch counts
+        :rtype: QueueState
+        """
+        result = queue_state.copy()
+        if len(result.flexible) == 0:
+            return result
+
+        with self.lock:
+            slots = {
+                arch.value: len(self.containers[arch.value]) + getattr(snapshot.pool_state, arch.value)
+                for arch in Arch
+            }
+
+        # seconds of work per slot already waiting on each arch, pinned idle
+        # jobs are assumed to be of the same workload as the flexible ones
+        backlog = dict()
+        for (arches, workload), count in sorted(result.flexible.items(), key=lambda kv: str(kv[0])):
+            if count.idle == 0:
+                continue
+
+            for arch in arches:
+                if arch not in backlog:
+                    backlog[arch] = getattr(result, arch).idle * self.throughput_model.runtime(workload, arch)
+
+            per_job = Resources(*(d / count.idle for d in count.demand))
+            placement = self.throughput_model.assign(workload, count.idle, list(arches), slots, backlog)
+            for arch, n in placement.items():
+                target = getattr(result, arch)
+                target.idle += n
+                target.demand = add_resources(target.demand, per_job, n)
+
+            print_cyan("PLACED {} idle {} jobs: {}".format(count.idle, workload or "flexible", placement))
+
+        return result
+
+    def export_state(self, queue_state: QueueState, pool_state: PoolState):
+        """Set the queue, pool and container gauges served on /metrics."""
+        for arch in Arch:
+            count = getattr(queue_state, arch.value)
+            metrics.QUEUE_JOBS.labels(arch=arch.value, status="idle").set(count.idle)
+            metrics.QUEUE_JOBS.labels(arch=arch.value, status="running").set(count.running)
+            metrics.POOL_AVAILABLE_SLOTS.labels(arch=arch.value).set(getattr(pool_state, arch.value))
+            metrics.POOL_FREE_CPUS.labels(arch=arch.value).set(pool_state.free[arch.value].cpus)
+            metrics.MANAGED_CONTAINERS.labels(arch=arch.value).set(len(self.containers[arch.value]))
+
+    def plan_scale_up(
+            self, 
+            queue_state: QueueState, 
+            snapshot: PoolSnapshot, 
+            load_threshold: float,
+            predicted: Dict[str, int] = None
+        ) -> Dict[Arch, int]:
+        """
+        Number of workers per arch needed to cover the resource deficit
+        (see compute_load()), up to max_per_tick per arch. Jobs predicted to
+        become idle soon are counted as if they were already idle.
+
+        :param queue_state: current state of the queue
+        :type queue_state: QueueState
+        :param snapshot: current snapshot of the pool
+        :type snapshot: PoolSnapshot
+        :param load_threshold: threshold, which if exceeded, will cause containers to be created
+        :type load_threshold: float
+        :param predicted: number of jobs per arch about to become idle, defaults to None
+        :type predicted: Dict[str, int], optional
+        :return: number of workers to start per arch
+        :rtype: Dict[Arch, int]
+        """
+        pool_state = snapshot.pool_state
+        predicted = predicted or dict()
+
+        print(queue_state)
+        queue_state = self.place_flexible_jobs(queue_state, snapshot)
+
+        print(pool_state)
+        print(self.pool_snapshot)
+        print_cyan("CURRENT LOAD: {}".format(estimate_load(queue_state, pool_state)))
+        self.export_state(queue_state, pool_state)
+        if len(predicted) > 0:
+            print_cyan("PREDICTED DEMAND: {}".format(predicted))
+
+        now = self.clock()
+        with self.lock:
+            pool_sizes = {arch: len(self.containers[arch.value]) for arch in Arch}
+
+        load = self.compute_load(queue_state, snapshot, load_threshold, predicted)
+
+        plan = dict()
+        for arch in Arch:
+            count = getattr(queue_state, arch.value)
+            self.scale_down_policy.observe_queue(arch.value, count.idle, count.running, now)
+
+            missing = load[arch.value]
+            deficit = workers_for_deficit(missing, self.worker_size(arch, pool_state), self.max_per_tick)
+            if deficit > 0:
+                print_cyan("{} DEFICIT: {} ({} workers)".format(arch.value, tuple(missing), deficit))
+
+            # keep the pool within the policy's min/max workers
+            deficit = max(deficit, self.scale_down_policy.shortfall(arch.value, pool_sizes[arch]))
+            capacity = self.scale_down_policy.capacity(arch.value, pool_sizes[arch])
+            plan[arch] = deficit if capacity is None else min(deficit, capacity)
+
+        return plan
+
+    ### Control Loop ###########################################################
+    async def _in_executor(self, fn: Callable, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, fn, *args)
+
+    async def _scale_up_tick(self, load_threshold: float):
+        """
+        Start as many workers per arch as needed to bring the estimated load
+        back under load_threshold, up to max_per_tick per arch.
+
+        :param load_threshold: threshold, which if exceeded, will cause containers to be created
+        :type load_threshold: float
+        """
+        # the schedd and collector are read concurrently, the DAG status after
+        # them so that nodes already in the queue are not predicted again
+        queue_state, snapshot = await asyncio.gather(
+                self._in_executor(self.get_queue_state),
+                self._in_executor(self.pool_snapshot.get)
+            )
+        predicted = await self._in_executor(self.predict_demand, queue_state.dag_nodes)
+
+        plan = self.plan_scale_up(queue_state, snapshot, load_threshold, predicted)
+
+        launches = list()
+        for arch, deficit in plan.items():
+            if deficit > 0:
+                print_cyan("STARTING {} {} workers".format(deficit, arch.value))
+                launches.append(self._in_executor(self.launch_workers, arch, deficit))
+
+        await asyncio.gather(*launches)
+
+    async def _scale_down_tick(self):
+        await self._in_executor(self.scale_down)
+
+    def prefetch_images(self) -> List[str]:
+        """
+        Refresh the images present on each host and, once no worker has been
+        started for prefetch_idle_period seconds, start pulling the worker
+        image on the hosts that do not have it.
+
+        :return: hosts a pull was started on
+        :rtype: List[str]
+        """
+        self.image_cache.refresh()
+
+        if self.last_launch is not None and self.clock() - self.last_launch < self.prefetch_idle_period:
+            return list()
+
+        hosts = self.image_cache.prefetch()
+        if len(hosts) > 0:
+            print("PULLING worker images on {}".format(", ".join(hosts)))
+
+        return hosts
+
+    async def _prefetch_tick(self):
+        await self._in_executor(self.prefetch_images)
+
+    async def _run_periodic(self, name: str, period: float, tick: Callable):
+        """
+        Run tick every period seconds until stop_event is set. Ticks are
+        scheduled against fixed deadlines, so the time taken by a tick does
+        not shift the ones after it; ticks that overrun their period cause
+        the missed deadlines to be skipped rather than run back to back.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while not self.stop_event.is_set():
+            start = loop.time()
+            try:
+                await tick()
+            except Exception as e:
+                print_red("{} tick FAILED: {}".format(name, e))
+
+            now = loop.time()
+            self.tick_latencies[name].append(now - start)
+            metrics.TICK_LATENCY.labels(loop=name).observe(now - start)
+
+            deadline += period
+            if deadline < now:
+                deadline += math.ceil((now - deadline) / period) * period
+
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), timeout=deadline - now)
+            except asyncio.TimeoutError:
+                pass
+
+        print("{} loop exiting".format(name))
+
+    async def _provision(self, rate: int, load_threshold: float):
+        loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self.stop_event.set)
+
+        await self._in_executor(self.resume)
+
+        # inventory the worker images before the first tick places workers
+        if self.image_cache is not None:
+            await self._in_executor(self.image_cache.refresh)
+
+        # standby containers are only created once the provisioner runs, not
+        # as a side effect of constructing it
+        if self.warm_pool is not None:
+            self.warm_pool.refill()
+
+        self.event_watcher = ContainerEventWatcher(self.docker_hosts.clients, self.ssh_pool, self.on_container_event)
+        self.event_watcher.start()
+
+        loops = [
+            self._run_periodic("scale_up", rate, lambda: self._scale_up_tick(load_threshold)),
+            self._run_periodic("scale_down", self.scale_down_rate, self._scale_down_tick)
+        ]
+        if self.image_cache is not None:
+            loops.append(self._run_periodic("prefetch", self.prefetch_rate, self._prefetch_tick))
+
+        try:
+            await asyncio.gather(*loops)
+        finally:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(sig)
+
+            self.event_watcher.close()
+
+            print("got interrupt, shutting down all containers")
+            await self._in_executor(self.shutdown_all_containers)
+
+            if self.journal is not None:
+                self.journal.compact()
+
+            if self.image_cache is not None:
+                self.image_cache.close()
+
+    def provision(self, rate: int, load_threshold: float):
+        """
+        Main provisioning function. Scale up and scale down are driven by a
+        single asyncio event loop, with blocking collector, schedd, docker
+        and ssh calls run concurrently in an executor. SIGINT or SIGTERM stop
+        both loops after their current tick and shut down all containers.
+
+        :param rate: rate (in seconds), at which to check if new containers need to be started
+        :type rate: int
+        :param load_threshold: threshold, which if exceeded, will cause a container to be created
+        :type load_threshold: float
+        """
+        if self.metrics_port is not None:
+            metrics.serve(self.metrics_port)
+            print("serving metrics on http://127.0.0.1:{}/metrics".format(self.metrics_port))
+
+        asyncio.run(self._provision(rate, load_threshold))
+
+        self.launch_executor.shutdown(wait=True)
+        self.io_executor.shutdown(wait=True)
+
+        for arch in Arch:
+            print_latency_summary("{} launch".format(arch.value), self.launch_latencies[arch.value])
+            for kind, latencies in self.claim_latencies[arch.value].items():
+                print_latency_summary("{} {} time-to-claim".format(arch.value, kind), latencies)
+
+        for name, latencies in self.tick_latencies.items():
+            print_latency_summary("{} tick".format(name), latencies)
+
+        print(self.scale_down_policy)
+        if self.image_cache is not None:
+            print(self.image_cache)
+
+    ### Monitoring #############################################################
+    def monitor(
+            self, 
+            rate: int, 
+            store_dir: str = "monitor_data", 
+            store_max_bytes: int = 64 * 1024 * 1024,
+            store_max_age: float = 24 * 3600
+        ):
+        """
+        Print the pool and queue state every rate seconds, and append it to
+        a time-series store (see timeseries.TimeSeriesReader to load it).
+
+        :param rate: rate, in seconds, at which to monitor condor_collector and schedd
+        :type rate: int
+        :param store_dir: directory of the time-series store, defaults to "monitor_data"
+        :type store_dir: str, optional
+        :param store_max_bytes: size, in bytes, at which the store starts a new segment, defaults to 64MB
+        :type store_max_bytes: int, optional
+        :param store_max_age: age, in seconds, at which the store starts a new segment, defaults to 24 hours
+        :type store_max_age: float, optional
+        """
+        store = TimeSeriesWriter(store_dir, MONITOR_COLUMNS, store_max_bytes, store_max_age)
+
+        def fetch():
+            pool = self.get_pool_state()
+            queue = self.get_queue_state()
+
+            record = {"ts": datetime.now().timestamp(), "unavailable": pool.unavailable}
+            for arch in Arch:
+                count = getattr(queue, arch.value)
+                record["{}_idle_workers".format(arch.value)] = getattr(pool, arch.value)
+                record["{}_free_cpus".format(arch.value)] = pool.free[arch.value].cpus
+                record["{}_idle_jobs".format(arch.value)] = count.idle
+                record["{}_running_jobs".format(arch.value)] = count.running
+
+            store.append(record)
+
+            sections = {
+                "POOL": [(arch.value, getattr(pool, arch.value)) for arch in Arch] + [("Unavailable", pool.unavailable)]
+            }
+            for arch in Arch:
+                count = getattr(queue, arch.value)
+                sections["JOBS {}".format(arch.value)] = [("running", count.running), ("idle", count.idle)]
+
+            return sections
+
+        # polling runs on its own thread so a slow collector or schedd never
+        # freezes the display
+        try:
+            Dashboard("monitoring every {}s, data in {}".format(rate, store_dir)).run(Poller(fetch, rate))
+        finally:
+            store.close()
+
+################################################################################
+### Workflow Creation/Submission ###############################################
+################################################################################
+def build_and_submit_dag(
+        num_layers, 
+        layer_width, 
+        job_duration, 
+        arches: List[str] = None, 
+        workload: str = None,
+        throughput_model: ArchThroughputModel = None,
+        shape: str = "forkjoin",
+        seed: int = None,
+        fan_in: int = 2,
+        dag_base_dir: Path = None,
+        direct: bool = False
+    ):
+    """
+    Build and submit a DAG of sleep jobs (a fork-join one by default, see
+    dag_gen.DAG_SHAPES). The DAG is streamed to a new directory under
+    dag_base_dir layer by layer, so DAGs of any size can be written. In
+    direct mode, no DAG file is written and DAGMan is not involved: each
+    layer is submitted as a single cluster once the previous one is done,
+    and this only returns once the whole DAG has run (see
+    direct_submit.DirectSubmitter). Jobs
+    that can run on several arches are pinned, node by node, to the arch the
+    throughput model expects to finish each layer soonest on: the node's
+    REQUIRED_ARCH and Arch requirement are set through its VARS.
+
+    :param arches: arches the jobs can run on, defaults to [AARCH64]
+    :type arches: List[str], optional
+    :param workload: WORKLOAD of the jobs, looked up in the throughput model, defaults to None
+    :type workload: str, optional
+    :param throughput_model: model used to choose arches, defaults to None (all arches equally fast)
+    :type throughput_model: ArchThroughputModel, optional
+    :param shape: name of the shape of the DAG, defaults to "forkjoin"
+    :type shape: str, optional
+    :param seed: seed of random shapes, defaults to None
+    :type seed: int, optional
+    :param fan_in: max number of parents of a node of the random shape, defaults to 2
+    :type fan_in: int, optional
+    :param dag_base_dir: directory the DAG's own directory is created in, defaults to ~/htcondor_dags
+    :type dag_base_dir: Path, optional
+    :param direct: submit layers directly to the schedd instead of through DAGMan, defaults to False
+    :type direct: bool, optional
+    """
+    arches = arches or [Arch.AARCH64.value]
+    throughput_model = throughput_model or ArchThroughputModel()
+
+    attrs = {
+        "+{}".format(ARCH_CUSTOM_ATTRIBUTE): classad.quote("$(arch)"),
+        "+{}".format(ACCEPTABLE_ARCHES_ATTRIBUTE): classad.quote(",".join(arches))
+    }
+    if workload is not None:
+        attrs["+{}".format(WORKLOAD_ATTRIBUTE)] = classad.quote(workload)
+
+    sub = htcondor.Submit(
+        executable="/bin/sleep",
+        arguments=job_duration,
+        requirements='DEMO_NODE == true && Arch == "$(arch)"',
+        **attrs
+    )
+
+    # every layer waits for the previous one, so each is placed on its own
+    def assign(width):
+        return throughput_model.assign(workload, width, arches, slots=dict())
+
+    dag_shape = DAG_SHAPES[shape](
+            num_layers, 
+            layer_width, 
+            seed=seed, 
+            **({"fan_in": fan_in} if shape == "random" else {})
+        )
+
+    # each run gets its own directory
+    dag_path = make_dag_dir(dag_base_dir or Path.home() / "htcondor_dags", shape)
+
+    coll = htcondor.Collector()
+    schedd_ad = coll.locate(htcondor.DaemonTypes.Schedd)
+    print(schedd_ad)
+
+    schedd = htcondor.Schedd(schedd_ad)
+
+    if direct:
+        submitter = DirectSubmitter(schedd, sub, dag_path / DIRECT_EVENT_LOG)
+        print("jobs log to {}, to be tailed with `provision --event-log`".format(submitter.event_log))
+
+        results = submitter.run(dag_shape, assign=assign)
+        print_layer_results(results)
+        print_submit_rate("direct", read_submit_rate(submitter.event_log))
+        return
+
+    # the node status file is read by `provision --dag` to provision ahead
+    # of layer boundaries
+    stats = write_dag(dag_shape, dag_path, sub, assign=assign)
+    print_dag_stats(stats)
+
+    dag_submit = htcondor.Submit.from_dag(str(stats.dag_file), {"force":True})
+    print(dag_submit)
+
+    cwd = os.getcwd()
+    os.chdir(dag_path)
+    with schedd.transaction() as txn:
+        cluster_id = dag_submit.queue(txn)
+    print("DAGMan job cluster is {}".format(cluster_id))
+    print("once done, compare with `submit-rate {}.nodes.log`".format(stats.dag_file))
+    os.chdir(cwd)
+
+def parse_arch_count(value: str) -> tuple:
+    arch, _, size = value.partition("=")
+    if arch not in (a.value for a in Arch) or not size.isdigit():
+        raise argparse.ArgumentTypeError("expected ARCH=N with ARCH one of {}".format(
+                ", ".join(a.value for a in Arch)
+            ))
+
+    return arch, int(size)
+
+def load_throughput_model(ffmpeg_data: str = None, model_file: str = None) -> ArchThroughputModel:
+    """
+    Throughput model seeded from the ffmpeg benchmark runs in ffmpeg_data,
+    then updated with the runtimes saved in model_file if it exists.
+    """
+    model = ArchThroughputModel()
+    if ffmpeg_data:
+        print("seeded throughput model with {} ffmpeg runs".format(model.seed_from_ffmpeg(ffmpeg_data)))
+
+    if model_file and Path(model_file).exists():
+        model.load(model_file)
+
+    return model
+
+def parse_args(args=sys.argv[1:]):
+    parser = argparse.ArgumentParser(description="demo tools")
+
+    subparsers = parser.add_subparsers(help="demo command to run")
+
+    ### Monitor ##############################################################
+    parser_monitor = subparsers.add_parser("monitor", help="monitor pool and queue")
+    parser_monitor.set_defaults(cmd="monitor")
+    parser_monitor.add_argument(
+        "monitor_rate",
         type=int,
         default=None,
         choices=range(1, 300),
@@ -622,6 +3291,49 @@ def parse_args(args=sys.argv[1:]):
         help="rate, in seconds, at which to monitor condor_collector and schedd"
     )
 
+    parser_monitor.add_argument(
+        "--store-dir",
+        default="monitor_data",
+        help="directory of the time-series store monitor data is appended to"
+    )
+
+    parser_monitor.add_argument(
+        "--store-max-bytes",
+        type=int,
+        default=64 * 1024 * 1024,
+        help="size, in bytes, at which the store starts a new segment"
+    )
+
+    parser_monitor.add_argument(
+        "--store-max-age",
+        type=float,
+        default=24 * 3600,
+        help="age, in seconds, at which the store starts a new segment"
+    )
+
+    parser_monitor.add_argument(
+        "--pool-refresh-interval",
+        type=float,
+        default=1.0,
+        help="max age, in seconds, of cached startd ads before the collector is queried again"
+    )
+
+    parser_monitor.add_argument(
+        "--event-log",
+        dest="event_logs",
+        action="append",
+        default=None,
+        help="""job event log to tail (e.g. <dag>.nodes.log) instead of scanning 
+        the whole queue on every tick, may be given multiple times"""
+    )
+
+    parser_monitor.add_argument(
+        "--queue-resync-interval",
+        type=float,
+        default=300,
+        help="rate, in seconds, at which the queue is fully rescanned when tailing event logs"
+    )
+
     ### Provision ############################################################
     parser_provision = subparsers.add_parser("provision", help="start provisioner")
     parser_provision.set_defaults(cmd="provision")
@@ -644,23 +3356,210 @@ def parse_args(args=sys.argv[1:]):
         of a given arch) at which a new worker container will be started"""
     )
 
+    parser_provision.add_argument(
+        "--pool-refresh-interval",
+        type=float,
+        default=1.0,
+        help="max age, in seconds, of cached startd ads before the collector is queried again"
+    )
+
+    parser_provision.add_argument(
+        "--max-per-tick",
+        type=int,
+        default=10,
+        help="max number of workers of a given arch to start per tick"
+    )
+
+    parser_provision.add_argument(
+        "--launch-concurrency",
+        type=int,
+        default=8,
+        help="max number of workers being started at the same time"
+    )
+
+    parser_provision.add_argument(
+        "--edge-host",
+        dest="edge_hosts",
+        action="append",
+        default=None,
+        metavar="USER@HOST",
+        help="edge host on which AARCH64 workers are started, may be given multiple times"
+    )
+
+    parser_provision.add_argument(
+        "--docker-host",
+        dest="docker_endpoints",
+        type=parse_docker_endpoint,
+        action="append",
+        default=None,
+        metavar="URL[=N]",
+        help="""docker daemon on which X86_64 workers are started, e.g. 
+        tcp://rack-2:2376 or ssh://user@rack-3, "local" for the one DOCKER_HOST 
+        points to, with at most N workers when given; may be given multiple 
+        times (local only by default)"""
+    )
+
+    parser_provision.add_argument(
+        "--ssh-key",
+        default=None,
+        help="private key used to connect to edge hosts"
+    )
+
+    parser_provision.add_argument(
+        "--warm-pool",
+        dest="warm_pool_sizes",
+        type=parse_arch_count,
+        action="append",
+        default=None,
+        metavar="ARCH=N",
+        help="""keep N created but not yet started worker containers of the 
+        given arch on standby, may be given once per arch"""
+    )
+
+    parser_provision.add_argument(
+        "--worker-cpus",
+        type=parse_arch_count,
+        action="append",
+        default=None,
+        metavar="ARCH=N",
+        help="""cores of a single worker of the given arch, used until one has 
+        shown up in the pool (1 by default), may be given once per arch"""
+    )
+
+    parser_provision.add_argument(
+        "--scale-down-policy",
+        choices=sorted(SCALE_DOWN_POLICIES),
+        default="fixed",
+        help="""fixed: stop workers idle for more than --max-idle-dur seconds; 
+        adaptive: keep idle workers while the next job is expected sooner 
+        than a new worker could start"""
+    )
+
+    parser_provision.add_argument(
+        "--max-idle-dur",
+        type=float,
+        default=None,
+        help="idle timeout of the fixed policy, upper bound of the adaptive one (30 and 300 by default)"
+    )
+
+    parser_provision.add_argument(
+        "--min-workers",
+        type=parse_arch_count,
+        action="append",
+        default=None,
+        metavar="ARCH=N",
+        help="min number of workers of the given arch to keep, may be given once per arch"
+    )
+
+    parser_provision.add_argument(
+        "--max-workers",
+        type=parse_arch_count,
+        action="append",
+        default=None,
+        metavar="ARCH=N",
+        help="max number of workers of the given arch, may be given once per arch"
+    )
+
+    parser_provision.add_argument(
+        "--dag",
+        default=None,
+        help="""dag file of a submitted workflow; when given, workers are started
+        ahead of time for nodes whose parents are about to finish"""
+    )
+
+    parser_provision.add_argument(
+        "--dag-status",
+        default=None,
+        help="node status file of the dag, defaults to {} next to the dag file".format(DAG_STATUS_FILE)
+    )
+
+    parser_provision.add_argument(
+        "--lookahead-lead-time",
+        type=float,
+        default=30,
+        help="how far ahead, in seconds, to start workers for dag nodes about to become ready"
+    )
+
+    parser_provision.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="serve prometheus metrics on http://127.0.0.1:<port>/metrics while provisioning"
+    )
+
+    parser_provision.add_argument(
+        "--ffmpeg-data",
+        default=None,
+        help="""directory with the parsed ffmpeg benchmark runs 
+        (<resolution>_client_<mbp|rpi>.pkl) to seed the throughput model with"""
+    )
+
+    parser_provision.add_argument(
+        "--throughput-model",
+        default=None,
+        help="json file the throughput model is loaded from and recorded runtimes are saved to"
+    )
+
+    parser_provision.add_argument(
+        "--event-log",
+        dest="event_logs",
+        action="append",
+        default=None,
+        help="""job event log to tail (e.g. <dag>.nodes.log) instead of scanning 
+        the whole queue on every tick, may be given multiple times"""
+    )
+
+    parser_provision.add_argument(
+        "--queue-resync-interval",
+        type=float,
+        default=300,
+        help="rate, in seconds, at which the queue is fully rescanned when tailing event logs"
+    )
+
+    parser_provision.add_argument(
+        "--prefetch-images",
+        action="store_true",
+        help="""track the worker images present on each docker and edge host, 
+        prefer hosts that have them and pull them in the background while idle"""
+    )
+
+    parser_provision.add_argument(
+        "--max-pulls",
+        type=int,
+        default=2,
+        help="max number of images pulled at the same time when prefetching"
+    )
+
+    parser_provision.add_argument(
+        "--pull-bandwidth",
+        type=float,
+        default=None,
+        help="average bytes per second image pulls may use when prefetching, unlimited by default"
+    )
+
+    parser_provision.add_argument(
+        "--journal",
+        default=None,
+        help="""sqlite file started and stopped containers are recorded to; 
+        containers a previous run left running are adopted on startup"""
+    )
+
     ### Submit ###############################################################
-    parser_submit = subparsers.add_parser("submit", help="submit forkjoin dag")
+    parser_submit = subparsers.add_parser("submit", help="submit forkjoin, random or diamond dag")
     parser_submit.set_defaults(cmd="submit")
     parser_submit.add_argument(
                 "num_layers",
-                type=int,
-                choices=range(1, 101),
-                metavar="[1,100]",
+                type=parse_positive_int,
+                metavar="N",
                 help="number of levels in the workflow"
             )
 
     parser_submit.add_argument(
                 "layer_width",
-                type=int,
-                choices=range(1,101),
-                metavar="[1,100]",
-                help="number of independent jobs per odd numbered layer"
+                type=parse_positive_int,
+                metavar="N",
+                help="""number of independent jobs per odd numbered layer (forkjoin), 
+                max width of a layer (random), width of the middle layer (diamond)"""
             )
 
     parser_submit.add_argument(
@@ -671,6 +3570,79 @@ def parse_args(args=sys.argv[1:]):
                 help="duration in seconds that a job will sleep for in"
             )
 
+    parser_submit.add_argument(
+        "--arch",
+        dest="arches",
+        choices=[a.value for a in Arch],
+        action="append",
+        default=None,
+        help="arch the jobs can run on, may be given multiple times (AARCH64 by default)"
+    )
+
+    parser_submit.add_argument(
+        "--workload",
+        default=None,
+        help="WORKLOAD of the jobs, e.g. ffmpeg-720x480, used to choose between arches"
+    )
+
+    parser_submit.add_argument(
+        "--ffmpeg-data",
+        default=None,
+        help="directory with the parsed ffmpeg benchmark runs to seed the throughput model with"
+    )
+
+    parser_submit.add_argument(
+        "--throughput-model",
+        default=None,
+        help="json file with runtimes recorded by the provisioner"
+    )
+
+    parser_submit.add_argument(
+        "--shape",
+        choices=sorted(DAG_SHAPES),
+        default="forkjoin",
+        help="""forkjoin: layers alternate between 1 and layer_width jobs; 
+        random: layers of random width, each job depending on --fan-in random 
+        jobs of the previous layer; diamond: layers widen to layer_width and 
+        narrow back to 1, each job depending on its neighbours"""
+    )
+
+    parser_submit.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="seed of the random shape"
+    )
+
+    parser_submit.add_argument(
+        "--fan-in",
+        type=parse_positive_int,
+        default=2,
+        help="max number of parents of a job of the random shape"
+    )
+
+    parser_submit.add_argument(
+        "--dag-dir",
+        default=str(Path.home() / "htcondor_dags"),
+        help="directory in which a new directory is created for each submitted dag"
+    )
+
+    parser_submit.add_argument(
+        "--direct",
+        action="store_true",
+        help="""submit each layer as a single cluster once the previous one is 
+        done, without DAGMan; runs until the whole dag is done"""
+    )
+
+    ### Submit rate ##########################################################
+    parser_submit_rate = subparsers.add_parser("submit-rate", help="jobs/s submitted according to job event logs")
+    parser_submit_rate.set_defaults(cmd="submit-rate")
+    parser_submit_rate.add_argument(
+        "event_logs",
+        nargs="+",
+        help="job event logs, e.g. <dag>.nodes.log of a dag or {} of a --direct run".format(DIRECT_EVENT_LOG)
+    )
+
     return parser.parse_args(args)
 
 class ServiceExit(Exception):
@@ -688,23 +3660,82 @@ if __name__=="__main__":
 
     if args.cmd == "monitor":    
         try:
-            Provisioner().monitor(args.monitor_rate)
+            Provisioner(
+                pool_refresh_interval=args.pool_refresh_interval,
+                event_logs=args.event_logs,
+                queue_resync_interval=args.queue_resync_interval
+            ).monitor(
+                args.monitor_rate, 
+                store_dir=args.store_dir, 
+                store_max_bytes=args.store_max_bytes, 
+                store_max_age=args.store_max_age
+            )
         except ServiceExit:
             print("exiting monitoring")
 
     elif args.cmd == "provision":
+        provisioner = None
         try:
-            provisioner = Provisioner()
+            provisioner = Provisioner(
+                pool_refresh_interval=args.pool_refresh_interval,
+                event_logs=args.event_logs,
+                queue_resync_interval=args.queue_resync_interval,
+                max_per_tick=args.max_per_tick,
+                launch_concurrency=args.launch_concurrency,
+                warm_pool_sizes=dict(args.warm_pool_sizes or []),
+                edge_hosts=[
+                    EdgeHost(
+                        hostname=h.partition("@")[2] or h,
+                        username=h.partition("@")[0] if "@" in h else None,
+                        key_filename=args.ssh_key
+                    ) for h in args.edge_hosts
+                ] if args.edge_hosts else None,
+                docker_endpoints=args.docker_endpoints,
+                dag_watcher=DagStatusWatcher(
+                    args.dag, 
+                    args.dag_status or str(Path(args.dag).parent / DAG_STATUS_FILE)
+                ) if args.dag else None,
+                lookahead_lead_time=args.lookahead_lead_time,
+                worker_sizes={
+                    arch: DEFAULT_WORKER_SIZE._replace(cpus=cpus) for arch, cpus in (args.worker_cpus or [])
+                },
+                scale_down_policy=SCALE_DOWN_POLICIES[args.scale_down_policy](
+                    min_workers=dict(args.min_workers or []),
+                    max_workers=dict(args.max_workers or []),
+                    **({"max_idle_dur": args.max_idle_dur} if args.max_idle_dur is not None else {})
+                ),
+                throughput_model=load_throughput_model(args.ffmpeg_data, args.throughput_model),
+                metrics_port=args.metrics_port,
+                journal=ContainerJournal(args.journal) if args.journal else None,
+                prefetch_images=args.prefetch_images,
+                max_pulls=args.max_pulls,
+                pull_bandwidth=args.pull_bandwidth
+            )
             provisioner.provision(args.provision_rate, args.load_threshold)
         except ServiceExit:
-            provisioner.stop_event.set()
-            provisioner.shutdown_all_containers()
+            # interrupted before the control loop took over SIGINT
+            if provisioner is not None:
+                provisioner.shutdown_all_containers()
+
+        if args.throughput_model and provisioner is not None:
+            provisioner.throughput_model.save(args.throughput_model)
 
     elif args.cmd == "submit":
         build_and_submit_dag(
                 num_layers=args.num_layers, 
                 layer_width=args.layer_width, 
-                job_duration=args.job_duration
+                job_duration=args.job_duration,
+                arches=args.arches,
+                workload=args.workload,
+                throughput_model=load_throughput_model(args.ffmpeg_data, args.throughput_model),
+                shape=args.shape,
+                seed=args.seed,
+                fan_in=args.fan_in,
+                dag_base_dir=Path(args.dag_dir),
+                direct=args.direct
             )
+    elif args.cmd == "submit-rate":
+        for event_log in args.event_logs:
+            print_submit_rate(event_log, read_submit_rate(event_log))
     else:
         raise RuntimeError("unexpected cmd: {}".format(args.cmd))
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+import collections
+import itertools
+import threading
+
+from collections import namedtuple
+from typing import Dict, List, Set
+
+# what a container needs to know about one of the slots of its startd
+SlotInfo = namedtuple("SlotInfo", ["machine", "arch", "idle"])
+
+# a container moving from one state to another, since being the time it
+# entered the previous state
+Transition = namedtuple("Transition", ["container", "arch", "prev", "state", "since"])
+
+class ContainerState:
+    # started, no startd ad seen yet
+    PENDING = "pending"
+    # every slot of its startd is unclaimed and idle
+    IDLE = "idle"
+    # at least one slot of its startd is claimed
+    BUSY = "busy"
+    # its startd ads have disappeared from the collector
+    LOST = "lost"
+
+def container_machine(cont_id: str) -> str:
+    """
+    Short hostname of the startd of a worker container: docker names a
+    container's host after its truncated id.
+    """
+    return cont_id[:12]
+
+class Reconciler:
+    def __init__(self):
+        """
+        Bidirectional indexes between managed containers, the machine (short
+        hostname) their startd runs on, and the startd ads of that machine,
+        which may be several: slot1@host, a partitionable slot and its
+        dynamic slots, etc.
+
+        update() is given the slots of each new collector snapshot, diffs
+        them against the previous one, and only applies the ads that were
+        added, changed or removed. The diff itself still goes through every
+        ad of the snapshot, so each update is linear in the size of the pool,
+        but the index updates and state changes only run for changed ads.
+        The state of each container (pending, idle, busy, lost) is derived
+        from the ads of its machine and every change is returned as a
+        Transition.
+
+        Orphans are tracked in both directions: containers without any ad
+        (never registered or lost), and ads of machines whose container is
+        no longer managed.
+        """
+        # startd Name -> SlotInfo
+        self.slots = dict()
+        # machine -> startd Names
+        self.names_by_machine = collections.defaultdict(set)
+        # machine -> number of its slots that are not idle
+        self.busy_by_machine = collections.Counter()
+
+        self.container_by_machine = dict()
+        self.machine_by_container = dict()
+        self.arch_by_container = dict()
+
+        # container -> [state, time it entered the state]
+        self.states = dict()
+        # idle containers per arch -> time they became idle
+        self.idle = collections.defaultdict(dict)
+        # containers without ads (pending or lost) -> time since
+        self.without_ads = dict()
+
+        # machines with ads but no managed container
+        self.unmatched = set()
+        # machines of containers that are no longer managed, whose ads are
+        # still in the collector -> time the container went away
+        self.departed = dict()
+
+        self.lock = threading.Lock()
+
+    def __str__(self):
+        with self.lock:
+            counts = collections.Counter(state for state, _ in self.states.values())
+            return "Reconciler: slots={}, containers={}, unmatched={}, departed={}".format(
+                    len(self.slots),
+                    dict(counts),
+                    len(self.unmatched),
+                    len(self.departed)
+                )
+
+    def _state_of(self, machine: str, prev: str) -> str:
+        if len(self.names_by_machine.get(machine, ())) == 0:
+            return ContainerState.PENDING if prev == ContainerState.PENDING else ContainerState.LOST
+        if self.busy_by_machine[machine] > 0:
+            return ContainerState.BUSY
+
+        return ContainerState.IDLE
+
+    def _set_state(self, cont_id: str, state: str, now: float) -> Transition:
+        prev, since = self.states[cont_id]
+        if prev == state:
+            return None
+
+        arch = self.arch_by_container[cont_id]
+        self.states[cont_id] = [state, now]
+
+        self.idle[arch].pop(cont_id, None)
+        self.without_ads.pop(cont_id, None)
+        if state == ContainerState.IDLE:
+            self.idle[arch][cont_id] = now
+        elif state in (ContainerState.PENDING, ContainerState.LOST):
+            self.without_ads[cont_id] = now
+
+        return Transition(cont_id, arch, prev, state, since)
+
+    def _refresh_machine(self, machine: str, now: float, transitions: List[Transition]):
+        has_ads = len(self.names_by_machine.get(machine, ())) > 0
+        cont_id = self.container_by_machine.get(machine)
+        if cont_id is None:
+            if has_ads:
+                self.unmatched.add(machine)
+            else:
+                self.unmatched.discard(machine)
+                self.departed.pop(machine, None)
+                self.names_by_machine.pop(machine, None)
+                self.busy_by_machine.pop(machine, None)
+            return
+
+        transition = self._set_state(cont_id, self._state_of(machine, self.states[cont_id][0]), now)
+        if transition is not None:
+            transitions.append(transition)
+
+    def add_container(self, cont_id: str, arch: str, now: float, machine: str = None) -> Transition:
+        """
+        Start tracking a container. Its state is taken from the ads already
+        known for its machine, if any.
+
+        :param cont_id: full id of the container
+        :type cont_id: str
+        :param arch: arch of the container
+        :type arch: str
+        :param now: current time, in seconds
+        :type now: float
+        :param machine: short hostname of its startd, defaults to container_machine(cont_id)
+        :type machine: str, optional
+        :return: transition out of pending if its startd is already in the pool, else None
+        :rtype: Transition
+        """
+        machine = machine or container_machine(cont_id)
+        with self.lock:
+            if cont_id in self.machine_by_container:
+                return None
+
+            self.container_by_machine[machine] = cont_id
+            self.machine_by_container[cont_id] = machine
+            self.arch_by_container[cont_id] = arch
+            self.states[cont_id] = [ContainerState.PENDING, now]
+            self.without_ads[cont_id] = now
+            self.unmatched.discard(machine)
+            self.departed.pop(machine, None)
+
+            transitions = list()
+            self._refresh_machine(machine, now, transitions)
+
+            return transitions[0] if len(transitions) > 0 else None
+
+    def remove_container(self, cont_id: str, now: float):
+        """Stop tracking a container; ads left behind by it become orphans."""
+        with self.lock:
+            machine = self.machine_by_container.pop(cont_id, None)
+            if machine is None:
+                return
+
+            arch = self.arch_by_container.pop(cont_id)
+            self.states.pop(cont_id)
+            self.idle[arch].pop(cont_id, None)
+            self.without_ads.pop(cont_id, None)
+            if self.container_by_machine.get(machine) == cont_id:
+                del self.container_by_machine[machine]
+
+            if len(self.names_by_machine.get(machine, ())) > 0:
+                self.unmatched.add(machine)
+                self.departed[machine] = now
+
+    def update(self, slots: Dict[str, SlotInfo], now: float) -> List[Transition]:
+        """
+        Apply a new collector snapshot: diff it against the previous one and
+        update the indexes of the ads that changed.
+
+        :param slots: SlotInfo per startd Name of every demo slot in the pool
+        :type slots: Dict[str, SlotInfo]
+        :param now: current time, in seconds
+        :type now: float
+        :return: state changes of managed containers
+        :rtype: List[Transition]
+        """
+        with self.lock:
+            # a full diff of the snapshot, done on the dict views in C
+            # without building a set of the items; only changed ads are
+            # handled below
+            removed = self.slots.keys() - slots.keys()
+            changed = list(itertools.filterfalse(self.slots.items().__contains__, slots.items()))
+
+            touched = set()
+            for name in removed:
+                info = self.slots.pop(name)
+                self.names_by_machine[info.machine].discard(name)
+                if not info.idle:
+                    self.busy_by_machine[info.machine] -= 1
+                touched.add(info.machine)
+
+            for name, info in changed:
+                prev = self.slots.get(name)
+                if prev is not None:
+                    self.names_by_machine[prev.machine].discard(name)
+                    if not prev.idle:
+                        self.busy_by_machine[prev.machine] -= 1
+                    touched.add(prev.machine)
+
+                self.slots[name] = info
+                self.names_by_machine[info.machine].add(name)
+                if not info.idle:
+                    self.busy_by_machine[info.machine] += 1
+                touched.add(info.machine)
+
+            transitions = list()
+            for machine in touched:
+                self._refresh_machine(machine, now, transitions)
+
+            return transitions
+
+    def state(self, cont_id: str) -> str:
+        """ContainerState of a managed container, None if it is not managed."""
+        with self.lock:
+            state = self.states.get(cont_id)
+            return state[0] if state is not None else None
+
+    def pending(self, arch: str) -> Dict[str, float]:
+        """Containers of the given arch whose startd has not shown up yet, with the time they were added."""
+        with self.lock:
+            return {
+                cont_id: since for cont_id, since in self.without_ads.items()
+                if self.arch_by_container[cont_id] == arch and self.states[cont_id][0] == ContainerState.PENDING
+            }
+
+    def idle_containers(self, arch: str) -> Dict[str, float]:
+        """Idle containers of the given arch with the time they became idle."""
+        with self.lock:
+            return dict(self.idle[arch])
+
+    def orphan_containers(self, now: float, grace: float) -> List[str]:
+        """
+        Containers that have been without a startd ad for longer than
+        grace seconds: never registered, or whose startd went away.
+        """
+        with self.lock:
+            return [cont_id for cont_id, since in self.without_ads.items() if now - since > grace]
+
+    def orphan_machines(self, now: float, grace: float) -> Set[str]:
+        """
+        Machines whose ads are still in the collector more than grace
+        seconds after their container went away. A startd that shuts down
+        cleanly invalidates its own ads, so these are left by containers
+        that died.
+        """
+        with self.lock:
+            return {machine for machine, since in self.departed.items() if now - since > grace}
+
+    def forget_machine(self, machine: str):
+        """Stop reporting the ads of machine as orphans, e.g. once they have been invalidated."""
+        with self.lock:
+            self.departed.pop(machine, None)
+
+    def names(self, machine: str) -> Set[str]:
+        """Startd Names advertised by machine."""
+        with self.lock:
+            return set(self.names_by_machine.get(machine, ()))
+
+    def container(self, name: str) -> str:
+        """Id of the managed container advertising the given startd Name, None if there is none."""
+        with self.lock:
+            info = self.slots.get(name)
+            return self.container_by_machine.get(info.machine) if info is not None else None
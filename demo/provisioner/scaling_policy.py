@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+import collections
+import math
+
+from typing import Dict, List, Tuple
+
+class ScaleDownPolicy:
+    def __init__(
+            self,
+            min_workers: Dict[str, int] = None,
+            max_workers: Dict[str, int] = None,
+            baseline_idle_dur: float = 30
+        ):
+        """
+        Decides which idle workers to stop. Subclasses implement should_stop()
+        for a single worker; min_workers and max_workers are enforced here for
+        every policy.
+
+        Savings are accounted against a fixed baseline_idle_dur timeout, so
+        that policies can be compared. The baseline is evaluated on the same
+        calls to select() as the policy, so a worker counts as stopped by the
+        baseline at the first call in which the baseline would have stopped
+        it, and tick granularity is charged to neither: stopping a worker
+        before that saves worker-seconds, keeping one past it costs
+        worker-seconds, and a worker reused after it is a restart avoided,
+        which saves the measured start latency of a new worker less the
+        extra time it was kept idle. The baseline policy measured against
+        itself saves nothing.
+
+        :param min_workers: min number of workers to keep per arch, defaults to None
+        :type min_workers: Dict[str, int], optional
+        :param max_workers: max number of workers per arch, defaults to None
+        :type max_workers: Dict[str, int], optional
+        :param baseline_idle_dur: idle timeout savings are measured against, defaults to 30
+        :type baseline_idle_dur: float, optional
+        """
+        self.min_workers = min_workers or dict()
+        self.max_workers = max_workers or dict()
+        self.baseline_idle_dur = baseline_idle_dur
+
+        # arch -> EWMA of start latency
+        self.start_latency = dict()
+
+        # arch -> idle workers the baseline would have stopped -> seconds
+        # they had been idle at the first select() in which it would have
+        self.baseline_stops = collections.defaultdict(dict)
+
+        # arch -> workers picked by select() -> worker-seconds saved once
+        # they have actually been stopped
+        self.pending_stops = collections.defaultdict(dict)
+
+        self.stats = {
+            "worker_seconds_saved": 0.0,
+            "restarts_avoided": 0,
+            "workers_stopped": 0
+        }
+
+    def observe_queue(self, arch: str, idle_jobs: int, running_jobs: int, now: float):
+        """Called once per scale up tick with the current queue state."""
+        pass
+
+    def observe_start_latency(self, arch: str, seconds: float):
+        """Called with the time a new worker took to show up in the pool."""
+        if arch in self.start_latency:
+            self.start_latency[arch] = 0.3 * seconds + 0.7 * self.start_latency[arch]
+        else:
+            self.start_latency[arch] = seconds
+
+    def observe_reuse(self, arch: str, worker_id: str, idle_dur: float):
+        """
+        Called when a worker that had been idle for idle_dur seconds is
+        claimed again.
+        """
+        baseline_dur = self.baseline_stops[arch].pop(worker_id, None)
+        if baseline_dur is not None:
+            self.stats["restarts_avoided"] += 1
+            self.stats["worker_seconds_saved"] += self.start_latency.get(arch, 0.0) - (idle_dur - baseline_dur)
+
+    def observe_stop(self, arch: str, worker_id: str):
+        """
+        Called when a worker picked by select() has been stopped. Workers
+        whose stop failed are not counted, and may be picked again.
+        """
+        saved = self.pending_stops[arch].pop(worker_id, None)
+        if saved is not None:
+            self.stats["workers_stopped"] += 1
+            self.stats["worker_seconds_saved"] += saved
+
+    def should_stop(self, arch: str, idle_dur: float, now: float) -> bool:
+        raise NotImplementedError
+
+    def capacity(self, arch: str, pool_size: int) -> int:
+        """
+        Number of workers that may be added to a pool of pool_size workers
+        of the given arch without exceeding max_workers, or None when
+        max_workers does not limit the arch.
+        """
+        if arch not in self.max_workers:
+            return None
+
+        return max(0, self.max_workers[arch] - pool_size)
+
+    def shortfall(self, arch: str, pool_size: int) -> int:
+        """Number of workers missing from a pool of pool_size to reach min_workers."""
+        return max(0, self.min_workers.get(arch, 0) - pool_size)
+
+    def select(self, arch: str, idle: List[Tuple[str, float]], pool_size: int, now: float) -> List[str]:
+        """
+        Pick the idle workers to stop.
+
+        :param arch: arch of the workers
+        :type arch: str
+        :param idle: (id, seconds idle) of each idle worker
+        :type idle: List[Tuple[str, float]]
+        :param pool_size: total number of workers of this arch, idle or not
+        :type pool_size: int
+        :param now: current time, in seconds
+        :type now: float
+        :return: ids of the workers to stop
+        :rtype: List[str]
+        """
+        # longest idle first, so those are the ones stopped when capping
+        idle = sorted(idle, key=lambda w: w[1], reverse=True)
+
+        stop = self._bound(arch, idle, [(_id, d) for _id, d in idle if self.should_stop(arch, d, now)], pool_size)
+
+        # workers that are no longer idle were reused or stopped
+        baseline_stops = {_id: self.baseline_stops[arch][_id] for _id, _ in idle if _id in self.baseline_stops[arch]}
+        baseline = self._bound(arch, idle, [(_id, d) for _id, d in idle if d > self.baseline_idle_dur], pool_size)
+        for _id, idle_dur in baseline:
+            baseline_stops.setdefault(_id, idle_dur)
+        self.baseline_stops[arch] = baseline_stops
+
+        # workers picked before that are still idle were not stopped
+        self.pending_stops[arch] = dict()
+        for _id, idle_dur in stop:
+            # stopped before the baseline would have, it would have at the
+            # earliest once past its timeout
+            baseline_dur = baseline_stops.pop(_id, max(idle_dur, self.baseline_idle_dur))
+            self.pending_stops[arch][_id] = baseline_dur - idle_dur
+
+        return [_id for _id, _ in stop]
+
+    def _bound(
+            self, 
+            arch: str, 
+            idle: List[Tuple[str, float]], 
+            stop: List[Tuple[str, float]], 
+            pool_size: int
+        ) -> List[Tuple[str, float]]:
+        """Workers out of stop, plus longest idle ones, that keep the pool within min_workers and max_workers."""
+        # never go below min_workers
+        max_stop = max(0, pool_size - self.min_workers.get(arch, 0))
+        stop = stop[:max_stop]
+
+        # go down to max_workers if over it, even if the policy would keep them
+        excess = pool_size - len(stop) - self.max_workers.get(arch, pool_size)
+        if excess > 0:
+            stopping = set(_id for _id, _ in stop)
+            stop.extend([w for w in idle if w[0] not in stopping][:excess])
+
+        return stop
+
+    def __str__(self):
+        return "{}: {}".format(type(self).__name__, ", ".join(
+            "{}={:.1f}".format(k, v) if isinstance(v, float) else "{}={}".format(k, v)
+            for k, v in self.stats.items()
+        ))
+
+class FixedIdleTimeout(ScaleDownPolicy):
+    def __init__(self, max_idle_dur: float = 30, **kwargs):
+        """
+        Stop workers that have been idle for more than max_idle_dur seconds.
+
+        :param max_idle_dur: idle timeout, in seconds, defaults to 30
+        :type max_idle_dur: float, optional
+        """
+        super().__init__(**kwargs)
+        self.max_idle_dur = max_idle_dur
+
+    def should_stop(self, arch: str, idle_dur: float, now: float) -> bool:
+        return idle_dur > self.max_idle_dur
+
+class AdaptiveIdleTimeout(ScaleDownPolicy):
+    def __init__(
+            self,
+            min_idle_dur: float = 5,
+            max_idle_dur: float = 300,
+            default_start_latency: float = 30,
+            tau: float = 60,
+            **kwargs
+        ):
+        """
+        Keep an idle worker while the next job of its arch is expected to
+        arrive sooner than a new worker could be started, and stop it
+        otherwise.
+
+        The job arrival rate per arch is an EWMA, with time constant tau, of
+        the number of new jobs per second seen between scale up ticks. The
+        expected wait for the next job is its inverse, and the cost of a
+        restart is the measured start latency of workers of that arch. Workers
+        are always kept for min_idle_dur and always stopped after
+        max_idle_dur.
+
+        :param min_idle_dur: seconds an idle worker is always kept, defaults to 5
+        :type min_idle_dur: float, optional
+        :param max_idle_dur: seconds after which an idle worker is always stopped, defaults to 300
+        :type max_idle_dur: float, optional
+        :param default_start_latency: start latency, in seconds, assumed until one has been measured, defaults to 30
+        :type default_start_latency: float, optional
+        :param tau: time constant, in seconds, of the arrival rate EWMA, defaults to 60
+        :type tau: float, optional
+        """
+        super().__init__(**kwargs)
+        self.min_idle_dur = min_idle_dur
+        self.max_idle_dur = max_idle_dur
+        self.default_start_latency = default_start_latency
+        self.tau = tau
+
+        # arch -> jobs per second
+        self.arrival_rate = dict()
+        # arch -> (idle, running, time) at the last observation
+        self.last_queue = dict()
+        # arch -> idle jobs at the last observation
+        self.idle_jobs = dict()
+
+    def observe_queue(self, arch: str, idle_jobs: int, running_jobs: int, now: float):
+        self.idle_jobs[arch] = idle_jobs
+
+        last = self.last_queue.get(arch)
+        self.last_queue[arch] = (idle_jobs, running_jobs, now)
+        if last is None or now <= last[2]:
+            return
+
+        dt = now - last[2]
+        # growth of the queue is a lower bound on the number of arrivals, jobs
+        # finishing during the same interval hide some of them
+        arrivals = max(0, (idle_jobs + running_jobs) - (last[0] + last[1]))
+        weight = 1 - math.exp(-dt / self.tau)
+        self.arrival_rate[arch] = weight * (arrivals / dt) + (1 - weight) * self.arrival_rate.get(arch, 0.0)
+
+    def expected_wait(self, arch: str) -> float:
+        """Expected seconds until the next job of the given arch arrives."""
+        rate = self.arrival_rate.get(arch, 0.0)
+
+        return 1 / rate if rate > 0 else math.inf
+
+    def should_stop(self, arch: str, idle_dur: float, now: float) -> bool:
+        if idle_dur <= self.min_idle_dur:
+            return False
+
+        if idle_dur > self.max_idle_dur:
+            return True
+
+        # an idle job is waiting for this worker, it just hasn't been matched
+        if self.idle_jobs.get(arch, 0) > 0:
+            return False
+
+        restart_cost = self.start_latency.get(arch, self.default_start_latency)
+
+        return self.expected_wait(arch) > restart_cost
+
+# policies selectable with --scale-down-policy
+SCALE_DOWN_POLICIES = {
+    "fixed": FixedIdleTimeout,
+    "adaptive": AdaptiveIdleTimeout
+}
@@ -0,0 +1,1573 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import collections
+import contextlib
+import hashlib
+import heapq
+import io
+import itertools
+import math
+import os
+import random
+import re
+import shlex
+import sys
+import tarfile
+import threading
+import time
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Set
+
+import docker
+import htcondor
+
+from chi_edge import CondorConfigDistributor, EdgeDeviceProvisioner, LeasePool, summarize
+from dag_gen import ForkJoin
+from dag_lookahead import DagLookahead, DagNode, NodeStatus
+from direct_submit import DirectSubmitter, submit_rate
+from provisioner import Arch, EdgeHost, JobStatus, Provisioner, ARCH_CUSTOM_ATTRIBUTE
+from scaling_policy import FixedIdleTimeout, ScaleDownPolicy, SCALE_DOWN_POLICIES
+
+SimResult = namedtuple(
+    "SimResult",
+    ["policy", "makespan", "worker_seconds", "idle_worker_seconds", "workers_started", "time_to_claim"]
+)
+
+def mean(values: List[float]) -> float:
+    return sum(values) / len(values) if len(values) > 0 else 0.0
+
+def build_fork_join(num_layers: int, layer_width: int, arch: str = Arch.X86_64.value) -> Dict[str, DagNode]:
+    """
+    Same shape as provisioner.build_and_submit_dag: a single top node, odd
+    layers of width layer_width and even layers of width 1, each layer
+    depending on every node of the previous one.
+
+    :return: nodes by name
+    :rtype: Dict[str, DagNode]
+    """
+    nodes = dict()
+    prev = [DagNode("top:0", arch=arch, key="top")]
+    nodes["top:0"] = prev[0]
+    for i in range(1, num_layers):
+        width = layer_width if i % 2 != 0 else 1
+        layer = [DagNode("layer_{}:{}".format(i, x), arch=arch, key="layer_{}".format(i)) for x in range(width)]
+        for node in layer:
+            nodes[node.name] = node
+            for parent in prev:
+                parent.children.append(node)
+                node.parents.append(parent)
+        prev = layer
+
+    return nodes
+
+################################################################################
+### Provisioner Simulation #####################################################
+################################################################################
+def parse_distribution(spec: str) -> Callable:
+    """
+    Parse a distribution of durations, in seconds, given as NAME:ARGS, e.g.
+    "const:60", "uniform:30,90", "exp:60" (mean), "normal:60,10" or
+    "lognormal:4,0.5" (mu and sigma of the underlying normal). A bare number
+    is a constant. Negative samples are clamped to 0.
+
+    :param spec: distribution to parse
+    :type spec: str
+    :raises argparse.ArgumentTypeError: unknown distribution or wrong number of arguments
+    :return: callable taking a random.Random and returning a sample
+    :rtype: Callable
+    """
+    name, _, args = spec.partition(":")
+    if args == "":
+        name, args = "const", name
+
+    distributions = {
+        "const": (1, lambda rng, x: x),
+        "uniform": (2, lambda rng, a, b: rng.uniform(a, b)),
+        "exp": (1, lambda rng, m: rng.expovariate(1 / m)),
+        "normal": (2, lambda rng, mu, sigma: rng.gauss(mu, sigma)),
+        "lognormal": (2, lambda rng, mu, sigma: rng.lognormvariate(mu, sigma))
+    }
+
+    try:
+        nargs, sample = distributions[name]
+        values = [float(v) for v in args.split(",")]
+        if len(values) != nargs:
+            raise ValueError
+    except (KeyError, ValueError):
+        raise argparse.ArgumentTypeError("expected one of {} as NAME:ARGS, got: {}".format(
+                ", ".join(distributions), spec
+            ))
+
+    return lambda rng: max(0.0, sample(rng, *values))
+
+class SimClock:
+    """Virtual clock, advanced by the simulation and read by the provisioner."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class SimContainerState:
+    def __init__(self, _id: str, arch: str, host: str, name: str):
+        self.id = _id
+        self.arch = arch
+        self.host = host
+        self.name = name
+        # created, running or exited
+        self.state = "created"
+        self.started = None
+        self.stopped = None
+        # set once the worker's startd has shown up in the collector
+        self.registered = False
+        self.claimed = None
+        # job the worker is running, None while idle
+        self.job = None
+        self.idle_since = None
+
+class SimCluster:
+    def __init__(
+            self,
+            nodes: Dict[str, DagNode],
+            job_runtime: Callable,
+            start_latency: Callable,
+            seed: int = 0
+        ):
+        """
+        State shared by the stand-ins for the collector, schedd, docker and
+        the edge hosts: the containers that have been created, the startd
+        each running one advertises after its start latency, and the jobs of
+        a DAG, which are submitted as their parents complete and matched to
+        unclaimed slots of their arch. Time only moves when the simulation
+        advances the clock, and the stand-ins may be called from the
+        provisioner's executor threads.
+
+        :param nodes: nodes of the DAG by name
+        :type nodes: Dict[str, DagNode]
+        :param job_runtime: distribution of job runtimes (see parse_distribution())
+        :type job_runtime: Callable
+        :param start_latency: distribution of seconds from starting a container until its startd is in the pool
+        :type start_latency: Callable
+        :param seed: seed of the random number generator, defaults to 0
+        :type seed: int, optional
+        """
+        self.nodes = nodes
+        self.job_runtime = job_runtime
+        self.start_latency = start_latency
+        self.rng = random.Random(seed)
+        self.clock = SimClock()
+
+        self.events = list()
+        self.seq = itertools.count()
+        self.lock = threading.RLock()
+
+        # containers not yet removed by id, and every container ever started
+        self.containers = dict()
+        self.workers = list()
+        # ids of unclaimed registered workers per arch, in the order they 
+        # became idle
+        self.idle_slots = collections.defaultdict(dict)
+        self.idle_worker_seconds = 0.0
+
+        # (cluster, proc) -> ad of each job in the queue
+        self.queue = dict()
+        self.job_nodes = dict()
+        self.idle_jobs = collections.defaultdict(collections.deque)
+        self.remaining_parents = {name: len(n.parents) for name, n in nodes.items()}
+        self.next_cluster = itertools.count(1)
+        self.num_done = 0
+        # node statuses changed since they were last read by a SimDagWatcher
+        self.status_changes = dict()
+        # job events written so far, read by SimEventLogs
+        self.job_events = list()
+
+    ### Events ##################################################################
+    def schedule(self, ts: float, kind: str, data=None):
+        with self.lock:
+            heapq.heappush(self.events, (ts, next(self.seq), kind, data))
+
+    def next_event(self) -> tuple:
+        """Pop the next event and advance the clock to it."""
+        with self.lock:
+            ts, _, kind, data = heapq.heappop(self.events)
+            self.clock.now = ts
+
+        return kind, data
+
+    ### Containers ##############################################################
+    def create_container(self, arch: str, host: str, name: str = None) -> SimContainerState:
+        with self.lock:
+            n = len(self.workers)
+            _id = hashlib.sha256(str(n).encode()).hexdigest()
+            cont = SimContainerState(_id, arch, host, name or "sim-{}".format(n))
+            self.containers[_id] = cont
+            self.workers.append(cont)
+
+        return cont
+
+    def start_container(self, _id: str):
+        with self.lock:
+            cont = self.containers.get(_id)
+            if cont is None:
+                raise KeyError("No such container: {}".format(_id))
+            if cont.state != "created":
+                raise RuntimeError("container {} is {}".format(_id, cont.state))
+
+            cont.state = "running"
+            cont.started = self.clock.now
+            self.schedule(self.clock.now + self.start_latency(self.rng), "registered", cont)
+
+    def kill_container(self, _id: str):
+        """Stop a running container; started with --rm, it is removed as well."""
+        with self.lock:
+            cont = self.containers.get(_id)
+            if cont is None:
+                raise KeyError("No such container: {}".format(_id))
+            if cont.state != "running":
+                raise RuntimeError("container {} is not running".format(_id))
+
+            self.remove_container(_id)
+
+    def remove_container(self, _id: str):
+        with self.lock:
+            cont = self.containers.pop(_id, None)
+            if cont is None:
+                raise KeyError("No such container: {}".format(_id))
+
+            now = self.clock.now
+            if cont.state == "running":
+                cont.stopped = now
+                if cont.id in self.idle_slots[cont.arch]:
+                    del self.idle_slots[cont.arch][cont.id]
+                    self.idle_worker_seconds += now - cont.idle_since
+
+                # the job of a killed worker is evicted back to the queue
+                if cont.job is not None:
+                    self.queue[cont.job]["JobStatus"] = JobStatus.IDLE.value
+                    self.idle_jobs[cont.arch].appendleft(cont.job)
+                    self.log_event(htcondor.JobEventType.JOB_EVICTED, cont.job)
+                    cont.job = None
+
+            cont.state = "exited"
+
+    def register(self, cont: SimContainerState):
+        """The startd of a started container shows up in the pool."""
+        with self.lock:
+            if cont.state != "running":
+                return
+
+            cont.registered = True
+            cont.idle_since = self.clock.now
+            self.idle_slots[cont.arch][cont.id] = cont
+
+    ### Jobs ####################################################################
+    def log_event(self, event_type: htcondor.JobEventType, job_id: tuple, **attrs):
+        self.job_events.append(SimJobEvent(event_type, job_id, self.clock.now, attrs))
+
+    def submit(self, node: DagNode):
+        job_id = (next(self.next_cluster), 0)
+        self.queue[job_id] = {
+            "ClusterId": job_id[0],
+            "ProcId": job_id[1],
+            "JobStatus": JobStatus.IDLE.value,
+            ARCH_CUSTOM_ATTRIBUTE: node.arch,
+            "DAGNodeName": node.name,
+            "RequestCpus": 1,
+            "RequestMemory": 0,
+            "RequestDisk": 0
+        }
+        self.job_nodes[job_id] = node
+        self.idle_jobs[node.arch].append(job_id)
+        self.status_changes[node.name] = NodeStatus.SUBMITTED.value
+        # as if submitted with job_ad_information_attrs, so that the
+        # QueueTracker does not need to look up the arch of each job
+        self.log_event(
+            htcondor.JobEventType.SUBMIT, 
+            job_id, 
+            **{k: v for k, v in self.queue[job_id].items() if k not in ("ClusterId", "ProcId", "JobStatus")}
+        )
+
+    def submit_roots(self):
+        with self.lock:
+            for node in self.nodes.values():
+                if len(node.parents) == 0:
+                    self.submit(node)
+
+    def negotiate(self):
+        """Match idle jobs to unclaimed slots of their arch."""
+        with self.lock:
+            now = self.clock.now
+            for arch, slots in self.idle_slots.items():
+                jobs = self.idle_jobs[arch]
+                while len(jobs) > 0 and len(slots) > 0:
+                    job_id = jobs.popleft()
+                    cont = slots.pop(next(iter(slots)))
+                    self.idle_worker_seconds += now - cont.idle_since
+                    if cont.claimed is None:
+                        cont.claimed = now
+
+                    cont.job = job_id
+                    self.queue[job_id]["JobStatus"] = JobStatus.RUNNING.value
+                    self.log_event(htcondor.JobEventType.EXECUTE, job_id)
+                    self.schedule(now + self.job_runtime(self.rng), "done", (job_id, cont))
+
+    def complete(self, job_id: tuple, cont: SimContainerState):
+        """A job finishes, unless its worker was killed in the meantime."""
+        with self.lock:
+            if cont.job != job_id:
+                return
+
+            self.queue.pop(job_id)
+            self.log_event(htcondor.JobEventType.JOB_TERMINATED, job_id)
+            node = self.job_nodes.pop(job_id)
+            self.num_done += 1
+            self.status_changes[node.name] = NodeStatus.DONE.value
+            for child in node.children:
+                self.remaining_parents[child.name] -= 1
+                if self.remaining_parents[child.name] == 0:
+                    self.submit(child)
+
+            cont.job = None
+            cont.idle_since = self.clock.now
+            self.idle_slots[cont.arch][cont.id] = cont
+
+    ### Ads #####################################################################
+    def startd_ads(self) -> List[dict]:
+        with self.lock:
+            ads = list()
+            for cont in self.containers.values():
+                if not cont.registered:
+                    continue
+
+                idle = cont.job is None
+                ads.append({
+                    # the startd of a container is named after its hostname,
+                    # the truncated container id
+                    "Name": cont.id[:12],
+                    "Machine": cont.id[:12],
+                    "Arch": cont.arch,
+                    "State": "Unclaimed" if idle else "Claimed",
+                    "Activity": "Idle" if idle else "Busy",
+                    "DEMO_NODE": True,
+                    "Cpus": 1,
+                    "Memory": 1024,
+                    "Disk": 1024 * 1024
+                })
+
+            return ads
+
+    def job_ads(self, cluster_ids: set = None) -> List[dict]:
+        with self.lock:
+            return [
+                dict(ad) for job_id, ad in self.queue.items() 
+                if cluster_ids is None or job_id[0] in cluster_ids
+            ]
+
+class SimJobEvent(dict):
+    """Stand-in for htcondor.JobEvent, with the job's attributes as items."""
+    def __init__(self, event_type: htcondor.JobEventType, job_id: tuple, timestamp: float, attrs: dict):
+        super().__init__(attrs)
+        self.type = event_type
+        self.cluster, self.proc = job_id
+        self.timestamp = timestamp
+
+class SimEventLog:
+    """Stand-in for htcondor.JobEventLog, tailing the events of the simulated jobs."""
+    def __init__(self, cluster: SimCluster):
+        self.cluster = cluster
+        self.offset = 0
+
+    def events(self, stop_after: int = None) -> List[SimJobEvent]:
+        with self.cluster.lock:
+            events = self.cluster.job_events[self.offset:]
+            self.offset += len(events)
+
+        return events
+
+class SimCollector:
+    """Stand-in for htcondor.Collector."""
+    def __init__(self, cluster: SimCluster):
+        self.cluster = cluster
+
+    def query(self, ad_type=None, constraint=None, projection=None) -> List[dict]:
+        # the simulated ads only have attributes in provisioner.STARTD_PROJECTION
+        return self.cluster.startd_ads()
+
+class SimSchedd:
+    """Stand-in for htcondor.Schedd."""
+    def __init__(self, cluster: SimCluster):
+        self.cluster = cluster
+
+    def xquery(self, requirements: str = None, projection: List[str] = None) -> List[dict]:
+        """
+        Jobs in the queue. Of requirements, only the disjunction of
+        ClusterId == <n> used by QueueTracker is understood.
+        """
+        cluster_ids = None
+        if requirements:
+            cluster_ids = {int(c) for c in re.findall(r"ClusterId\s*==\s*(\d+)", requirements)}
+
+        ads = self.cluster.job_ads(cluster_ids)
+        if projection:
+            ads = [{k: ad[k] for k in projection if k in ad} for ad in ads]
+
+        return ads
+
+class SimContainer:
+    """Stand-in for docker.models.containers.Container."""
+    def __init__(self, cluster: SimCluster, _id: str):
+        self.cluster = cluster
+        self.id = _id
+
+    @property
+    def status(self) -> str:
+        cont = self.cluster.containers.get(self.id)
+        return cont.state if cont is not None else "exited"
+
+    def start(self):
+        self.cluster.start_container(self.id)
+
+    def kill(self, signal=None):
+        self.cluster.kill_container(self.id)
+
+    def remove(self, force: bool = False):
+        self.cluster.remove_container(self.id)
+
+class SimDockerClient:
+    """Stand-in for the local docker.DockerClient, running X86_64 workers."""
+    def __init__(self, cluster: SimCluster):
+        self.cluster = cluster
+        self.containers = self
+
+    def create(self, image: str = None, **kwargs) -> SimContainer:
+        cont = self.cluster.create_container(Arch.X86_64.value, "localhost")
+        return SimContainer(self.cluster, cont.id)
+
+    def run(self, image: str = None, **kwargs) -> SimContainer:
+        cont = self.create(image, **kwargs)
+        cont.start()
+
+        return cont
+
+    def info(self) -> dict:
+        with self.cluster.lock:
+            running = sum(
+                1 for c in self.cluster.containers.values() 
+                if c.arch == Arch.X86_64.value and c.state == "running"
+            )
+
+        # as many cores as workers the simulation may need
+        return {"NCPU": len(self.cluster.nodes), "ContainersRunning": running}
+
+    def get(self, container_id: str) -> SimContainer:
+        if container_id not in self.cluster.containers:
+            raise docker.errors.NotFound("No such container: {}".format(container_id))
+
+        return SimContainer(self.cluster, container_id)
+
+class SimChannel:
+    """
+    Stand-in for a paramiko.Channel, running the docker commands sent by
+    provisioner.EdgeDocker against the containers of one edge host.
+    """
+    RUN_PATTERN = re.compile(r'if out=\$\(docker (run -d|create) (.*?) 2>&1\); then echo "(\S+) ok')
+
+    def __init__(self, cluster: SimCluster, host: str):
+        self.cluster = cluster
+        self.host = host
+        self.stdout = list()
+        self.stderr = list()
+        self.exit_code = 0
+
+    def _each(self, fn: Callable, ids: List[str]):
+        for _id in ids:
+            try:
+                fn(_id)
+                self.stdout.append(_id)
+            except (KeyError, RuntimeError) as e:
+                self.stderr.append("Error response from daemon: {}".format(e.args[0]))
+                self.exit_code = 1
+
+    def exec_command(self, cmd: str):
+        args = shlex.split(cmd) if cmd.startswith("docker ") else list()
+        if args[:2] == ["docker", "kill"]:
+            self._each(self.cluster.kill_container, [a for a in args[2:] if not a.startswith("-")])
+        elif args[:2] == ["docker", "start"]:
+            self._each(self.cluster.start_container, args[2:])
+        elif args[:3] == ["docker", "rm", "-f"]:
+            self._each(self.cluster.remove_container, args[3:])
+        elif args[:2] == ["docker", "ps"]:
+            with self.cluster.lock:
+                for cont in self.cluster.containers.values():
+                    if cont.host == self.host:
+                        self.stdout.append("{} {} {}".format(cont.id, cont.name, cont.state))
+        else:
+            for mode, run_args, name in self.RUN_PATTERN.findall(cmd):
+                cont = self.cluster.create_container(Arch.AARCH64.value, self.host, name)
+                if mode == "run -d":
+                    self.cluster.start_container(cont.id)
+                self.stdout.append("{} ok {}".format(name, cont.id))
+
+    @property
+    def eof_received(self) -> bool:
+        # commands run to completion in exec_command()
+        return True
+
+    @property
+    def closed(self) -> bool:
+        return False
+
+    def recv_ready(self) -> bool:
+        return len(self.stdout) > 0
+
+    def recv_stderr_ready(self) -> bool:
+        return len(self.stderr) > 0
+
+    def recv(self, nbytes: int) -> bytes:
+        data = "".join(line + "\n" for line in self.stdout).encode()
+        self.stdout = list()
+        return data
+
+    def recv_stderr(self, nbytes: int) -> bytes:
+        data = "".join(line + "\n" for line in self.stderr).encode()
+        self.stderr = list()
+        return data
+
+    def makefile(self, mode: str = "r") -> io.BytesIO:
+        return io.BytesIO("".join(line + "\n" for line in self.stdout).encode())
+
+    def recv_exit_status(self) -> int:
+        return self.exit_code
+
+    def close(self):
+        pass
+
+class SimSSHClient:
+    """Stand-in for paramiko.SSHClient connected to a simulated edge host."""
+    def __init__(self, cluster: SimCluster):
+        self.cluster = cluster
+        self.host = None
+
+    def load_system_host_keys(self):
+        pass
+
+    def connect(self, hostname: str, **kwargs):
+        self.host = hostname
+
+    def get_transport(self) -> "SimSSHClient":
+        return self
+
+    def set_keepalive(self, interval: int):
+        pass
+
+    def is_active(self) -> bool:
+        return True
+
+    def open_session(self) -> SimChannel:
+        return SimChannel(self.cluster, self.host)
+
+    def close(self):
+        pass
+
+class SimDagWatcher:
+    """Stand-in for dag_lookahead.DagStatusWatcher, fed from the simulated DAG."""
+    def __init__(self, cluster: SimCluster):
+        self.cluster = cluster
+        self.lookahead = DagLookahead(cluster.nodes)
+
+    def predict(self, now: float, lead_time: float, queued: Set[str] = frozenset()) -> Dict[str, int]:
+        with self.cluster.lock:
+            changes = self.cluster.status_changes
+            self.cluster.status_changes = dict()
+
+        self.lookahead.update(changes, now)
+
+        return self.lookahead.predict(now, lead_time, queued)
+
+class ProvisionerSim:
+    def __init__(
+            self,
+            nodes: Dict[str, DagNode],
+            job_runtime: Callable,
+            start_latency: Callable,
+            rate: float = 1.0,
+            load_threshold: float = 1.0,
+            max_per_tick: int = 100,
+            scale_down_policy: ScaleDownPolicy = None,
+            pool_refresh_interval: float = 1.0,
+            negotiation_interval: float = 0,
+            lookahead_lead_time: float = None,
+            num_edge_hosts: int = 4,
+            track_events: bool = True,
+            seed: int = 0,
+            max_time: float = 7 * 24 * 3600,
+            verbose: bool = False
+        ):
+        """
+        Discrete event simulation of the actual Provisioner running a DAG.
+        The provisioner's collector, schedd, docker client, ssh connections
+        and clock are replaced by the stand-ins above, and its scale up and
+        scale down ticks are called on the virtual clock, so no network,
+        HTCondor pool or docker daemon is needed. Workers are launched one
+        at a time so that results only depend on the seed.
+
+        :param nodes: nodes of the DAG by name, each with its arch set
+        :type nodes: Dict[str, DagNode]
+        :param job_runtime: distribution of job runtimes (see parse_distribution())
+        :type job_runtime: Callable
+        :param start_latency: distribution of seconds from starting a worker until it is in the pool
+        :type start_latency: Callable
+        :param rate: seconds between scale up ticks, defaults to 1.0
+        :type rate: float, optional
+        :param load_threshold: threshold passed to Provisioner.scale_up, defaults to 1.0
+        :type load_threshold: float, optional
+        :param max_per_tick: max workers started per arch per tick, defaults to 100
+        :type max_per_tick: int, optional
+        :param scale_down_policy: scale down policy of the provisioner, defaults to FixedIdleTimeout()
+        :type scale_down_policy: ScaleDownPolicy, optional
+        :param pool_refresh_interval: max age, in seconds, of the provisioner's cached startd ads, defaults to 1.0
+        :type pool_refresh_interval: float, optional
+        :param negotiation_interval: seconds between negotiation cycles, 0 to match as soon as a job and a slot are idle, defaults to 0
+        :type negotiation_interval: float, optional
+        :param lookahead_lead_time: when set, the provisioner watches the DAG with this lead time, defaults to None
+        :type lookahead_lead_time: float, optional
+        :param num_edge_hosts: number of simulated edge hosts AARCH64 workers are spread over, defaults to 4
+        :type num_edge_hosts: int, optional
+        :param track_events: track the queue from a simulated job event log rather than scan it on every tick, defaults to True
+        :type track_events: bool, optional
+        :param seed: seed of the random number generator, defaults to 0
+        :type seed: int, optional
+        :param max_time: virtual seconds after which the simulation is abandoned, defaults to a week
+        :type max_time: float, optional
+        :param verbose: show the provisioner's output, defaults to False
+        :type verbose: bool, optional
+        """
+        self.cluster = SimCluster(nodes, job_runtime, start_latency, seed)
+        self.rate = rate
+        self.load_threshold = load_threshold
+        self.negotiation_interval = negotiation_interval
+        self.max_time = max_time
+        self.verbose = verbose
+
+        cluster = self.cluster
+        self.provisioner = Provisioner(
+                edge_hosts=[EdgeHost("edge-{}".format(i), "sim", None) for i in range(num_edge_hosts)],
+                pool_refresh_interval=pool_refresh_interval,
+                event_logs=["nodes.log"] if track_events else None,
+                max_per_tick=max_per_tick,
+                launch_concurrency=1,
+                dag_watcher=SimDagWatcher(cluster) if lookahead_lead_time is not None else None,
+                lookahead_lead_time=lookahead_lead_time,
+                scale_down_policy=scale_down_policy,
+                collector=SimCollector(cluster),
+                schedd=SimSchedd(cluster),
+                docker_client=SimDockerClient(cluster),
+                ssh_client_factory=lambda: SimSSHClient(cluster),
+                event_log_factory=lambda path: SimEventLog(cluster),
+                clock=cluster.clock
+            )
+
+    def run(self) -> SimResult:
+        """
+        Run the DAG to completion, then shut down all workers.
+
+        :raises RuntimeError: the DAG did not complete within max_time
+        :return: makespan, worker-seconds, idle-worker-seconds, workers started and mean time-to-claim
+        :rtype: SimResult
+        """
+        cluster = self.cluster
+        provisioner = self.provisioner
+
+        cluster.submit_roots()
+        cluster.schedule(0.0, "scale_up")
+        cluster.schedule(0.0, "scale_down")
+        if self.negotiation_interval > 0:
+            cluster.schedule(0.0, "negotiate")
+
+        # the ticks are the coroutines of the provisioner's control loop,
+        # each run to completion on the virtual clock
+        loop = asyncio.new_event_loop()
+        out = sys.stdout if self.verbose else open(os.devnull, "w")
+        try:
+            with contextlib.redirect_stdout(out):
+                while cluster.num_done < len(cluster.nodes):
+                    kind, data = cluster.next_event()
+                    now = cluster.clock.now
+                    if now > self.max_time:
+                        raise RuntimeError("{} of {} jobs done after {:g}s".format(
+                                cluster.num_done, len(cluster.nodes), self.max_time
+                            ))
+
+                    if kind == "scale_up":
+                        loop.run_until_complete(provisioner._scale_up_tick(self.load_threshold))
+                        cluster.schedule(now + self.rate, "scale_up")
+                    elif kind == "scale_down":
+                        loop.run_until_complete(provisioner._scale_down_tick())
+                        cluster.schedule(now + provisioner.scale_down_rate, "scale_down")
+                    elif kind == "registered":
+                        cluster.register(data)
+                    elif kind == "done":
+                        cluster.complete(*data)
+                    elif kind == "negotiate":
+                        cluster.schedule(now + self.negotiation_interval, "negotiate")
+
+                    if self.negotiation_interval == 0 or kind == "negotiate":
+                        cluster.negotiate()
+
+                makespan = cluster.clock.now
+                provisioner.shutdown_all_containers()
+                provisioner.launch_executor.shutdown(wait=True)
+                provisioner.io_executor.shutdown(wait=True)
+        finally:
+            loop.close()
+            if out is not sys.stdout:
+                out.close()
+
+        # workers the provisioner did not stop, or failed to, stop with the DAG
+        for cont in cluster.workers:
+            if cont.state == "running":
+                cluster.remove_container(cont.id)
+
+        return SimResult(
+            policy=type(provisioner.scale_down_policy).__name__,
+            makespan=makespan,
+            worker_seconds=sum(c.stopped - c.started for c in cluster.workers if c.started is not None),
+            idle_worker_seconds=cluster.idle_worker_seconds,
+            workers_started=sum(1 for c in cluster.workers if c.started is not None),
+            time_to_claim=mean([c.claimed - c.started for c in cluster.workers if c.claimed is not None])
+        )
+
+def compare_provisioner(
+        num_layers: int,
+        layer_width: int,
+        job_runtime: Callable,
+        start_latency: Callable,
+        policies: Dict[str, Callable],
+        load_thresholds: List[float],
+        arch: str = Arch.X86_64.value,
+        **kwargs
+    ) -> List[SimResult]:
+    """
+    Run the Provisioner against the same fork-join DAG with each of the
+    given scale down policies at each load threshold.
+
+    :param policies: callable per policy name returning a new ScaleDownPolicy
+    :type policies: Dict[str, Callable]
+    :param load_thresholds: load thresholds to run each policy with
+    :type load_thresholds: List[float]
+    :return: one result per policy and load threshold
+    :rtype: List[SimResult]
+    """
+    results = list()
+    for name, policy in policies.items():
+        for load_threshold in load_thresholds:
+            result = ProvisionerSim(
+                build_fork_join(num_layers, layer_width, arch),
+                job_runtime,
+                start_latency,
+                load_threshold=load_threshold,
+                scale_down_policy=policy(),
+                **kwargs
+            ).run()
+            label = name if len(load_thresholds) == 1 else "{}@{:g}".format(name, load_threshold)
+            results.append(result._replace(policy=label))
+
+    return results
+
+def compare_lookahead(
+        num_layers: int,
+        layer_width: int,
+        job_runtime: Callable,
+        start_latency: Callable,
+        lead_times: List[float],
+        max_idle_dur: float = 30,
+        **kwargs
+    ) -> List[SimResult]:
+    """
+    Run the Provisioner against the same fork-join DAG reactively and with
+    lookahead at each of the given lead times, stopping workers after a
+    fixed idle timeout in every run.
+
+    :param lead_times: lookahead lead times to run with
+    :type lead_times: List[float]
+    :param max_idle_dur: idle timeout of the workers, defaults to 30
+    :type max_idle_dur: float, optional
+    :return: one result per policy, reactive first
+    :rtype: List[SimResult]
+    """
+    results = list()
+    for lead_time in [None, *lead_times]:
+        result = ProvisionerSim(
+            build_fork_join(num_layers, layer_width),
+            job_runtime,
+            start_latency,
+            scale_down_policy=FixedIdleTimeout(max_idle_dur=max_idle_dur, baseline_idle_dur=max_idle_dur),
+            lookahead_lead_time=lead_time,
+            **kwargs
+        ).run()
+        label = "reactive" if lead_time is None else "lookahead({:g}s)".format(lead_time)
+        results.append(result._replace(policy=label))
+
+    return results
+
+def compare_scale_down(
+        num_layers: int,
+        layer_width: int,
+        job_runtime: Callable,
+        start_latency: Callable,
+        policies: Dict[str, ScaleDownPolicy],
+        **kwargs
+    ) -> List[SimResult]:
+    """
+    Run the Provisioner against the same fork-join DAG with each of the
+    given scale down policies.
+
+    :return: one result per policy, in the order given
+    :rtype: List[SimResult]
+    """
+    results = list()
+    for name, policy in policies.items():
+        result = ProvisionerSim(
+            build_fork_join(num_layers, layer_width),
+            job_runtime,
+            start_latency,
+            scale_down_policy=policy,
+            **kwargs
+        ).run()
+        results.append(result._replace(policy=name))
+
+    return results
+
+def print_results(results: List[SimResult]):
+    row = "{0:>16} {1:>12} {2:>16} {3:>20} {4:>16} {5:>14}"
+    print(row.format("policy", "makespan", "worker_seconds", "idle_worker_seconds", "workers_started", "time_to_claim"))
+    for r in results:
+        print(row.format(
+            r.policy,
+            "{:.1f}".format(r.makespan),
+            "{:.1f}".format(r.worker_seconds),
+            "{:.1f}".format(r.idle_worker_seconds),
+            r.workers_started,
+            "{:.1f}".format(r.time_to_claim)
+        ))
+
+class FakeChiBackend:
+    def __init__(
+            self,
+            lease_delay: Callable,
+            active_delay: Callable,
+            api_latency: float = 0.5,
+            time_scale: float = 0.002,
+            seed: int = 0
+        ):
+        """
+        Stand-in for chi.lease and chi.container (see chi_edge.ChiBackend)
+        on a scaled clock: a simulated second lasts time_scale real seconds,
+        so that devices can be brought up concurrently on real threads.
+        Leases become active lease_delay seconds after being created, and
+        containers run active_delay seconds after being created. Every call
+        takes api_latency seconds. A reservation holds at most as many
+        containers as it has devices.
+
+        clock() and sleep() are in simulated seconds and are meant to be
+        given to LeasePool and EdgeDeviceProvisioner.
+        """
+        self.lease_delay = lease_delay
+        self.active_delay = active_delay
+        self.api_latency = api_latency
+        self.time_scale = time_scale
+        self.rng = random.Random(seed)
+
+        self.leases = dict()
+        # reservation id -> [device count, ids of containers on it]
+        self.reservations = dict()
+        # container id -> (reservation id, time it runs)
+        self.containers = dict()
+        # container id -> path -> contents of the files put into it
+        self.files = collections.defaultdict(dict)
+        self.num_calls = collections.Counter()
+
+        self.lock = threading.Lock()
+
+    def clock(self) -> float:
+        return time.monotonic() / self.time_scale
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds * self.time_scale)
+
+    def _call(self, name: str):
+        with self.lock:
+            self.num_calls[name] += 1
+        self.sleep(self.api_latency)
+
+    def list_leases(self) -> List[dict]:
+        self._call("list_leases")
+        return [self.get_lease(lease_id) for lease_id in list(self.leases)]
+
+    def get_lease(self, lease_id: str) -> dict:
+        self._call("get_lease")
+        with self.lock:
+            lease = dict(self.leases[lease_id])
+
+        lease["status"] = "ACTIVE" if self.clock() >= lease.pop("active_at") else "PENDING"
+        return lease
+
+    def create_lease(self, name: str, count: int, device_model: str, days: int) -> dict:
+        self._call("create_lease")
+        lease_id = "lease-{}".format(len(self.leases))
+        reservation_id = "reservation-{}".format(len(self.leases))
+        with self.lock:
+            self.leases[lease_id] = {
+                "id": lease_id,
+                "name": name,
+                "end_date": (datetime.utcnow() + timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%S.%f"),
+                "reservations": [{"id": reservation_id, "resource_type": "device", "min": count, "max": count}],
+                "active_at": self.clock() + self.lease_delay(self.rng)
+            }
+            self.reservations[reservation_id] = [count, set()]
+
+        return self.get_lease(lease_id)
+
+    def delete_lease(self, lease_id: str):
+        self._call("delete_lease")
+        with self.lock:
+            lease = self.leases.pop(lease_id)
+            for r in lease["reservations"]:
+                for container_id in self.reservations.pop(r["id"])[1]:
+                    self.containers.pop(container_id, None)
+
+    def list_containers(self) -> List[tuple]:
+        self._call("list_containers")
+        with self.lock:
+            return [(container_id, r) for container_id, (r, _) in self.containers.items()]
+
+    def create_container(self, name: str, image: str, reservation_id: str, **kwargs) -> str:
+        self._call("create_container")
+        with self.lock:
+            count, containers = self.reservations[reservation_id]
+            if len(containers) >= count:
+                raise RuntimeError("no device left on reservation {}".format(reservation_id))
+
+            container_id = hashlib.sha1(name.encode()).hexdigest()
+            containers.add(container_id)
+            self.containers[container_id] = (reservation_id, self.clock() + self.active_delay(self.rng))
+
+        return container_id
+
+    def container_status(self, container_id: str) -> str:
+        self._call("container_status")
+        with self.lock:
+            _, running_at = self.containers[container_id]
+
+        return "Running" if self.clock() >= running_at else "Creating"
+
+    def associate_floating_ip(self, container_id: str) -> str:
+        self._call("associate_floating_ip")
+        return "10.0.{}.{}".format(*divmod(len(self.containers), 256))
+
+    def destroy_container(self, container_id: str):
+        self._call("destroy_container")
+        with self.lock:
+            reservation_id, _ = self.containers.pop(container_id)
+            self.reservations[reservation_id][1].discard(container_id)
+            self.files.pop(container_id, None)
+
+    def execute(self, container_id: str, cmd: str) -> dict:
+        self._call("execute")
+        args = shlex.split(cmd)
+        with self.lock:
+            if container_id not in self.containers:
+                raise RuntimeError("no such container: {}".format(container_id))
+
+            if args[0] == "sha256sum":
+                data = self.files[container_id].get(args[1])
+                if data is None:
+                    return {"output": "sha256sum: {}: No such file or directory".format(args[1]), "exit_code": 1}
+
+                return {"output": "{}  {}".format(hashlib.sha256(data).hexdigest(), args[1]), "exit_code": 0}
+
+        if args[0] == "condor_reconfig":
+            return {"output": "Sent \"Reconfig\" command to local master", "exit_code": 0}
+
+        return {"output": "{}: not found".format(args[0]), "exit_code": 127}
+
+    def put_archive(self, container_id: str, path: str, data: bytes):
+        self._call("put_archive")
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            files = {
+                "{}/{}".format(path.rstrip("/"), m.name): tar.extractfile(m).read() 
+                for m in tar.getmembers() if m.isfile()
+            }
+
+        with self.lock:
+            self.files[container_id].update(files)
+
+def notebook_flow(backend: FakeChiBackend, count: int, poll_interval: float) -> float:
+    """
+    Bring up count devices the way provision_chi_edge.ipynb does: one lease,
+    its wait, one container, its wait and a floating ip, device after
+    device. Returns the simulated seconds it took.
+    """
+    start = backend.clock()
+    for i in range(count):
+        lease = backend.create_lease("condor9-worker-{}".format(i), 1, "4", 1)
+        while backend.get_lease(lease["id"])["status"] != "ACTIVE":
+            backend.sleep(poll_interval)
+
+        container_id = backend.create_container(
+                "condor9-isi-worker-{}".format(i), 
+                "ryantanaka/condor9-arm64-isi-worker", 
+                lease["reservations"][0]["id"]
+            )
+        while backend.container_status(container_id) != "Running":
+            backend.sleep(poll_interval)
+
+        backend.associate_floating_ip(container_id)
+
+    return backend.clock() - start
+
+def compare_chi_edge(
+        count: int, 
+        lease_delay: Callable, 
+        active_delay: Callable, 
+        concurrency: int, 
+        poll_interval: float, 
+        time_scale: float,
+        seed: int = 0
+    ) -> List[dict]:
+    """
+    Bring up count devices serially like the notebook, then with
+    EdgeDeviceProvisioner on a fresh project, and again once the first
+    containers are torn down, reusing their lease.
+
+    :return: simulated seconds, api calls and per phase latencies per run
+    :rtype: List[dict]
+    """
+    results = list()
+
+    backend = FakeChiBackend(lease_delay, active_delay, time_scale=time_scale, seed=seed)
+    wall = notebook_flow(backend, count, poll_interval)
+    results.append({"run": "notebook", "seconds": wall, "calls": sum(backend.num_calls.values()), "phases": dict()})
+
+    backend = FakeChiBackend(lease_delay, active_delay, time_scale=time_scale, seed=seed)
+    lease_pool = LeasePool(backend, poll_interval=poll_interval, sleep=backend.sleep, clock=backend.clock)
+    provisioner = EdgeDeviceProvisioner(
+            backend, 
+            lease_pool, 
+            max_concurrency=concurrency, 
+            poll_interval=poll_interval, 
+            floating_ip=True,
+            sleep=backend.sleep, 
+            clock=backend.clock
+        )
+
+    for run in ("pool (new lease)", "pool (reused lease)"):
+        backend.num_calls.clear()
+        lease_pool.refresh()
+        start = backend.clock()
+        devices = provisioner.provision(count, "ryantanaka/condor9-arm64-isi-worker")
+        results.append({
+            "run": run, 
+            "seconds": backend.clock() - start, 
+            "calls": sum(backend.num_calls.values()), 
+            "phases": summarize(devices)
+        })
+        provisioner.teardown(devices)
+
+    provisioner.close()
+
+    return results
+
+def compare_config_push(count: int, concurrency: int, time_scale: float, seed: int = 0) -> List[dict]:
+    """
+    Push a condor config to count running containers one at a time like
+    the notebook's configure_condor(), then concurrently, then again
+    concurrently once the central manager moved, with every container
+    checked first.
+
+    :return: simulated seconds, api calls and number of containers per status, per run
+    :rtype: List[dict]
+    """
+    backend = FakeChiBackend(lambda rng: 0, lambda rng: 0, time_scale=time_scale, seed=seed)
+    lease = backend.create_lease("config-push", count, "4", 1)
+    reservation_id = lease["reservations"][0]["id"]
+    container_ids = [
+        backend.create_container("worker-{}".format(i), "ryantanaka/condor9-arm64-isi-worker", reservation_id) 
+        for i in range(count)
+    ]
+
+    runs = [
+        ("notebook", 1, ["CONDOR_HOST = 10.0.0.1"], True),
+        ("concurrent", concurrency, ["CONDOR_HOST = 10.0.0.1"], False),
+        ("concurrent (moved)", concurrency, ["CONDOR_HOST = 10.0.0.2"], False),
+    ]
+    results = list()
+    for run, max_concurrency, configs, force in runs:
+        distributor = CondorConfigDistributor(backend, max_concurrency=max_concurrency, clock=backend.clock)
+        backend.num_calls.clear()
+        start = backend.clock()
+        pushed = distributor.push(container_ids, configs, force=force)
+        results.append({
+            "run": run,
+            "seconds": backend.clock() - start,
+            "calls": sum(backend.num_calls.values()),
+            "statuses": collections.Counter(r.status for r in pushed.values())
+        })
+        distributor.close()
+
+    return results
+
+def print_config_push_results(results: List[dict]):
+    row = "{0:>20} {1:>10} {2:>10} {3:>10} {4:>10} {5:>10}"
+    print(row.format("run", "seconds", "api_calls", "updated", "unchanged", "failed"))
+    for r in results:
+        print(row.format(
+            r["run"],
+            "{:.1f}".format(r["seconds"]),
+            r["calls"],
+            *(r["statuses"][status] for status in ("updated", "unchanged", "failed"))
+        ))
+
+def print_chi_edge_results(results: List[dict]):
+    row = "{0:>20} {1:>10} {2:>10} {3:>12} {4:>12} {5:>12} {6:>12}"
+    print(row.format("run", "seconds", "api_calls", "lease", "create", "active", "floating_ip"))
+    for r in results:
+        print(row.format(
+            r["run"],
+            "{:.1f}".format(r["seconds"]),
+            r["calls"],
+            *("{:.1f}".format(r["phases"][p]["mean"]) if p in r["phases"] else "-" 
+                    for p in ("lease", "create", "active", "floating_ip"))
+        ))
+
+class SimSubmitResult:
+    """Stand-in for htcondor.SubmitResult."""
+    def __init__(self, cluster: int, num_procs: int):
+        self._cluster = cluster
+        self._num_procs = num_procs
+
+    def cluster(self) -> int:
+        return self._cluster
+
+    def first_proc(self) -> int:
+        return 0
+
+    def num_procs(self) -> int:
+        return self._num_procs
+
+class SimSubmit(dict):
+    """Stand-in for htcondor.Submit, queued to a SimSubmitQueue."""
+    def __init__(self, queue: "SimSubmitQueue"):
+        super().__init__()
+        self.queue = queue
+
+    def queue_with_itemdata(self, txn, count: int = 1, itemdata=None) -> SimSubmitResult:
+        return self.queue.queue_with_itemdata(txn, count, itemdata)
+
+class SimSubmitQueue:
+    def __init__(
+            self, 
+            job_runtime: Callable, 
+            transaction_latency: float = 0.5, 
+            job_latency: float = 0.002, 
+            seed: int = 0
+        ):
+        """
+        Stand-in for the schedd, submit description and job event log used
+        by a DirectSubmitter, on a clock that only moves when sleep() is
+        called or jobs are submitted. A transaction takes
+        transaction_latency seconds plus job_latency seconds per job, every
+        job starts as soon as it is submitted (there are always enough
+        slots) and runs for a sample of job_runtime.
+        """
+        self.job_runtime = job_runtime
+        self.transaction_latency = transaction_latency
+        self.job_latency = job_latency
+        self.rng = random.Random(seed)
+        self.clock = SimClock()
+
+        self.next_cluster = itertools.count(1)
+        # job events not yet written by time, and those written so far
+        self.pending = list()
+        self.seq = itertools.count()
+        self.job_events = list()
+
+    def sleep(self, seconds: float):
+        self.clock.now += seconds
+
+    def _log(self, ts: float, event_type: htcondor.JobEventType, job_id: tuple):
+        heapq.heappush(self.pending, (ts, next(self.seq), SimJobEvent(event_type, job_id, ts, {})))
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield self
+        self.clock.now += self.transaction_latency
+
+    def queue_with_itemdata(self, txn, count: int = 1, itemdata=None) -> SimSubmitResult:
+        cluster = next(self.next_cluster)
+        items = list(itemdata)
+        self.clock.now += self.job_latency * len(items) * count
+
+        now = self.clock.now + self.transaction_latency
+        for proc in range(len(items) * count):
+            self._log(now, htcondor.JobEventType.SUBMIT, (cluster, proc))
+            self._log(now + self.job_runtime(self.rng), htcondor.JobEventType.JOB_TERMINATED, (cluster, proc))
+
+        return SimSubmitResult(cluster, len(items) * count)
+
+    def event_log(self, path: str = None) -> "SimSubmitQueue":
+        return self
+
+    def events(self, stop_after: int = None) -> List[SimJobEvent]:
+        events = list()
+        while len(self.pending) > 0 and self.pending[0][0] <= self.clock.now:
+            events.append(heapq.heappop(self.pending)[2])
+        self.job_events.extend(events)
+
+        return events
+
+def dagman_events(
+        widths: List[int], 
+        job_runtime: Callable, 
+        scan_interval: float = 5, 
+        max_submits_per_interval: int = 100,
+        submit_latency: float = 0.1,
+        seed: int = 0
+    ) -> List[SimJobEvent]:
+    """
+    Job events of a layered DAG run by DAGMan, with every layer depending
+    on the whole previous one: DAGMan reads the nodes' log every
+    scan_interval seconds (DAGMAN_USER_LOG_SCAN_INTERVAL) and then submits
+    at most max_submits_per_interval ready nodes (DAGMAN_MAX_SUBMITS_PER_INTERVAL), 
+    one at a time, each submit taking submit_latency seconds. Jobs start as
+    soon as they are submitted.
+    """
+    rng = random.Random(seed)
+    events = list()
+
+    ready = 0.0
+    for i, width in enumerate(widths):
+        # first log scan after the layer became ready
+        cycle = math.ceil(ready / scan_interval) * scan_interval
+        now = cycle
+        done = ready
+        submitted = 0
+        while submitted < width:
+            for _ in range(min(max_submits_per_interval, width - submitted)):
+                now += submit_latency
+                events.append(SimJobEvent(htcondor.JobEventType.SUBMIT, (i + 1, submitted), now, {}))
+                end = now + job_runtime(rng)
+                events.append(SimJobEvent(htcondor.JobEventType.JOB_TERMINATED, (i + 1, submitted), end, {}))
+                done = max(done, end)
+                submitted += 1
+
+            cycle = max(cycle + scan_interval, now)
+            now = cycle
+
+        # DAGMan sees the last job of the layer finish at its next scan
+        ready = done
+
+    return sorted(events, key=lambda e: e.timestamp)
+
+def compare_submit_modes(
+        num_layers: int, 
+        layer_width: int, 
+        job_runtime: Callable,
+        transaction_latency: float,
+        job_latency: float,
+        poll_interval: float,
+        scan_interval: float,
+        max_submits_per_interval: int,
+        submit_latency: float,
+        seed: int = 0
+    ) -> List[dict]:
+    """
+    Run a fork-join DAG through the DAGMan model of dagman_events() and
+    through a DirectSubmitter, with the same job runtimes and as many slots
+    as jobs, so that only the submission path differs.
+
+    :return: makespan and submit_rate() of the job events, per run
+    :rtype: List[dict]
+    """
+    shape = ForkJoin(num_layers, layer_width)
+    widths = [width for width, _ in shape.layers()]
+
+    results = list()
+    events = dagman_events(widths, job_runtime, scan_interval, max_submits_per_interval, submit_latency, seed)
+    results.append({
+        "run": "dagman",
+        "makespan": max(e.timestamp for e in events),
+        "rate": submit_rate(events)
+    })
+
+    queue = SimSubmitQueue(job_runtime, transaction_latency, job_latency, seed)
+    submitter = DirectSubmitter(
+            queue, 
+            SimSubmit(queue), 
+            "sim.log", 
+            poll_interval=poll_interval,
+            event_log_factory=queue.event_log,
+            clock=queue.clock,
+            sleep=queue.sleep
+        )
+    with contextlib.redirect_stdout(io.StringIO()):
+        submitter.run(shape)
+    results.append({
+        "run": "direct",
+        "makespan": max(e.timestamp for e in queue.job_events),
+        "rate": submit_rate(queue.job_events)
+    })
+
+    return results
+
+def print_submit_mode_results(results: List[dict]):
+    row = "{0:>10} {1:>10} {2:>10} {3:>15} {4:>10}"
+    print(row.format("run", "makespan", "jobs", "submit_seconds", "jobs/s"))
+    for r in results:
+        rate = r["rate"]
+        print(row.format(
+            r["run"],
+            "{:.1f}".format(r["makespan"]),
+            rate.jobs,
+            "{:.1f}".format(rate.seconds),
+            "{:.1f}".format(rate.jobs / rate.seconds) if rate.seconds > 0 else "-"
+        ))
+
+def parse_args(args=sys.argv[1:]):
+    parser = argparse.ArgumentParser(description="simulate provisioning policies")
+
+    subparsers = parser.add_subparsers(help="simulation to run")
+
+    ### Lookahead ############################################################
+    parser_lookahead = subparsers.add_parser("lookahead", help="reactive vs dag lookahead on a fork-join dag")
+    parser_lookahead.set_defaults(cmd="lookahead")
+    parser_lookahead.add_argument("--num-layers", type=int, default=9, help="number of levels in the workflow")
+    parser_lookahead.add_argument("--layer-width", type=int, default=100, help="number of independent jobs per odd numbered layer")
+    parser_lookahead.add_argument("--job-runtime", type=float, default=60, help="runtime, in seconds, of every job")
+    parser_lookahead.add_argument("--start-latency", type=float, default=20, help="seconds from starting a worker until it can be matched")
+    parser_lookahead.add_argument("--rate", type=float, default=1, help="seconds between provisioner ticks")
+    parser_lookahead.add_argument("--max-idle-dur", type=float, default=30, help="seconds a worker may sit idle before it is stopped")
+    parser_lookahead.add_argument(
+        "--lead-time",
+        dest="lead_times",
+        type=float,
+        action="append",
+        default=None,
+        help="lookahead lead time, in seconds, may be given multiple times (defaults to the start latency)"
+    )
+
+    ### Scale Down #########################################################
+    parser_scale_down = subparsers.add_parser("scale-down", help="fixed vs adaptive idle timeout on a fork-join dag")
+    parser_scale_down.set_defaults(cmd="scale-down")
+    parser_scale_down.add_argument("--num-layers", type=int, default=9, help="number of levels in the workflow")
+    parser_scale_down.add_argument("--layer-width", type=int, default=100, help="number of independent jobs per odd numbered layer")
+    parser_scale_down.add_argument("--job-runtime", type=float, default=60, help="runtime, in seconds, of every job")
+    parser_scale_down.add_argument("--start-latency", type=float, default=20, help="seconds from starting a worker until it can be matched")
+    parser_scale_down.add_argument("--rate", type=float, default=1, help="seconds between provisioner ticks")
+    parser_scale_down.add_argument("--max-idle-dur", type=float, default=30, help="idle timeout of the fixed policy")
+
+    ### Provisioner ##########################################################
+    parser_provisioner = subparsers.add_parser(
+        "provisioner", 
+        help="the provisioner itself against a simulated pool, schedd and docker on a fork-join dag"
+    )
+    parser_provisioner.set_defaults(cmd="provisioner")
+    parser_provisioner.add_argument("--num-layers", type=int, default=21, help="number of levels in the workflow")
+    parser_provisioner.add_argument("--layer-width", type=int, default=1000, help="number of independent jobs per odd numbered layer")
+    parser_provisioner.add_argument(
+        "--job-runtime", 
+        type=parse_distribution, 
+        default="const:60", 
+        help="distribution of job runtimes, in seconds: const:X, uniform:A,B, exp:MEAN, normal:MU,SIGMA or lognormal:MU,SIGMA"
+    )
+    parser_provisioner.add_argument(
+        "--start-latency", 
+        type=parse_distribution, 
+        default="const:20", 
+        help="distribution of seconds from starting a worker until it can be matched, same format as --job-runtime"
+    )
+    parser_provisioner.add_argument("--arch", choices=[a.value for a in Arch], default=Arch.X86_64.value, help="arch of the jobs and workers")
+    parser_provisioner.add_argument("--rate", type=float, default=1, help="seconds between scale up ticks")
+    parser_provisioner.add_argument(
+        "--load-threshold",
+        dest="load_thresholds",
+        type=float,
+        action="append",
+        default=None,
+        help="load threshold to run each policy with, may be given multiple times (1.0 by default)"
+    )
+    parser_provisioner.add_argument(
+        "--policy",
+        dest="policies",
+        choices=sorted(SCALE_DOWN_POLICIES),
+        action="append",
+        default=None,
+        help="scale down policy to run, may be given multiple times (all by default)"
+    )
+    parser_provisioner.add_argument("--max-idle-dur", type=float, default=30, help="idle timeout of the fixed policy")
+    parser_provisioner.add_argument("--max-workers", type=int, default=1000, help="max number of workers")
+    parser_provisioner.add_argument("--max-per-tick", type=int, default=100, help="max number of workers started per tick")
+    parser_provisioner.add_argument("--edge-hosts", type=int, default=4, help="number of simulated edge hosts for AARCH64 workers")
+    parser_provisioner.add_argument("--lookahead-lead-time", type=float, default=None, help="provision ahead of dag layers with this lead time")
+    parser_provisioner.add_argument(
+        "--negotiation-interval", 
+        type=float, 
+        default=0, 
+        help="seconds between negotiation cycles, 0 to match idle jobs and slots immediately"
+    )
+    parser_provisioner.add_argument("--pool-refresh-interval", type=float, default=1.0, help="max age, in seconds, of cached startd ads")
+    parser_provisioner.add_argument(
+        "--full-scan", 
+        action="store_true", 
+        help="scan the whole queue on every tick instead of tracking it from the job event log"
+    )
+    parser_provisioner.add_argument("--seed", type=int, default=0, help="seed of the job runtime and start latency samples")
+    parser_provisioner.add_argument("--verbose", action="store_true", help="show the provisioner's output")
+
+    ### CHI@Edge ###############################################################
+    parser_chi_edge = subparsers.add_parser(
+        "chi-edge", 
+        help="notebook vs concurrent bring up of CHI@Edge devices against a fake of chi.lease/chi.container"
+    )
+    parser_chi_edge.set_defaults(cmd="chi-edge")
+    parser_chi_edge.add_argument("--count", type=int, default=20, help="number of devices to bring up")
+    parser_chi_edge.add_argument(
+        "--lease-delay", 
+        type=parse_distribution, 
+        default="uniform:30,90", 
+        help="distribution of seconds until a new lease is active, same format as provisioner --job-runtime"
+    )
+    parser_chi_edge.add_argument(
+        "--active-delay", 
+        type=parse_distribution, 
+        default="uniform:60,180", 
+        help="distribution of seconds until a new container is running"
+    )
+    parser_chi_edge.add_argument("--concurrency", type=int, default=20, help="max number of devices brought up at the same time")
+    parser_chi_edge.add_argument("--poll-interval", type=float, default=5, help="seconds between status checks")
+    parser_chi_edge.add_argument("--time-scale", type=float, default=0.002, help="real seconds per simulated second")
+    parser_chi_edge.add_argument("--seed", type=int, default=0, help="seed of the delay samples")
+
+    parser_config_push = subparsers.add_parser(
+        "config-push", 
+        help="serial vs concurrent, content-hashed condor config push to CHI@Edge containers"
+    )
+    parser_config_push.set_defaults(cmd="config-push")
+    parser_config_push.add_argument("--count", type=int, default=100, help="number of containers to configure")
+    parser_config_push.add_argument("--concurrency", type=int, default=20, help="max number of containers configured at the same time")
+    parser_config_push.add_argument("--time-scale", type=float, default=0.002, help="real seconds per simulated second")
+
+    ### Submit modes #########################################################
+    parser_submit_modes = subparsers.add_parser(
+        "submit-modes", 
+        help="DAGMan vs direct, one cluster per layer, submission of a fork-join dag"
+    )
+    parser_submit_modes.set_defaults(cmd="submit-modes")
+    parser_submit_modes.add_argument("--num-layers", type=int, default=9, help="number of levels in the workflow")
+    parser_submit_modes.add_argument("--layer-width", type=int, default=1000, help="number of independent jobs per odd numbered layer")
+    parser_submit_modes.add_argument(
+        "--job-runtime", 
+        type=parse_distribution, 
+        default=parse_distribution("const:60"), 
+        help="distribution of job runtimes, e.g. const:60, uniform:30,90, exp:60"
+    )
+    parser_submit_modes.add_argument("--transaction-latency", type=float, default=0.5, help="seconds taken by a direct submit transaction")
+    parser_submit_modes.add_argument("--job-latency", type=float, default=0.002, help="seconds added to a direct submit transaction per job")
+    parser_submit_modes.add_argument("--poll-interval", type=float, default=1, help="seconds between reads of the event log by the direct submitter")
+    parser_submit_modes.add_argument("--scan-interval", type=float, default=5, help="DAGMAN_USER_LOG_SCAN_INTERVAL")
+    parser_submit_modes.add_argument("--max-submits-per-interval", type=int, default=100, help="DAGMAN_MAX_SUBMITS_PER_INTERVAL")
+    parser_submit_modes.add_argument("--submit-latency", type=float, default=0.1, help="seconds DAGMan takes to submit a single node")
+
+    return parser.parse_args(args)
+
+if __name__=="__main__":
+    args = parse_args()
+
+    if args.cmd == "lookahead":
+        print_results(compare_lookahead(
+            num_layers=args.num_layers,
+            layer_width=args.layer_width,
+            job_runtime=lambda rng: args.job_runtime,
+            start_latency=lambda rng: args.start_latency,
+            lead_times=args.lead_times or [args.start_latency],
+            rate=args.rate,
+            max_idle_dur=args.max_idle_dur,
+            max_per_tick=args.layer_width
+        ))
+    elif args.cmd == "scale-down":
+        policies = {
+            "fixed({:g}s)".format(args.max_idle_dur): FixedIdleTimeout(max_idle_dur=args.max_idle_dur, baseline_idle_dur=args.max_idle_dur),
+            "adaptive": SCALE_DOWN_POLICIES["adaptive"](baseline_idle_dur=args.max_idle_dur)
+        }
+        print_results(compare_scale_down(
+            num_layers=args.num_layers,
+            layer_width=args.layer_width,
+            job_runtime=lambda rng: args.job_runtime,
+            start_latency=lambda rng: args.start_latency,
+            policies=policies,
+            rate=args.rate,
+            max_per_tick=args.layer_width
+        ))
+        for policy in policies.values():
+            print(policy)
+    elif args.cmd == "provisioner":
+        def make_policy(name):
+            kwargs = {"max_workers": {args.arch: args.max_workers}, "baseline_idle_dur": args.max_idle_dur}
+            if name == "fixed":
+                kwargs["max_idle_dur"] = args.max_idle_dur
+
+            return lambda: SCALE_DOWN_POLICIES[name](**kwargs)
+
+        start = time.perf_counter()
+        print_results(compare_provisioner(
+            num_layers=args.num_layers,
+            layer_width=args.layer_width,
+            job_runtime=args.job_runtime,
+            start_latency=args.start_latency,
+            policies={name: make_policy(name) for name in (args.policies or sorted(SCALE_DOWN_POLICIES))},
+            load_thresholds=args.load_thresholds or [1.0],
+            arch=args.arch,
+            rate=args.rate,
+            max_per_tick=args.max_per_tick,
+            pool_refresh_interval=args.pool_refresh_interval,
+            negotiation_interval=args.negotiation_interval,
+            lookahead_lead_time=args.lookahead_lead_time,
+            num_edge_hosts=args.edge_hosts,
+            track_events=not args.full_scan,
+            seed=args.seed,
+            verbose=args.verbose
+        ))
+        print("simulated in {:.1f}s".format(time.perf_counter() - start))
+    elif args.cmd == "chi-edge":
+        print_chi_edge_results(compare_chi_edge(
+            count=args.count,
+            lease_delay=args.lease_delay,
+            active_delay=args.active_delay,
+            concurrency=args.concurrency,
+            poll_interval=args.poll_interval,
+            time_scale=args.time_scale,
+            seed=args.seed
+        ))
+    elif args.cmd == "config-push":
+        print_config_push_results(compare_config_push(
+            count=args.count,
+            concurrency=args.concurrency,
+            time_scale=args.time_scale
+        ))
+    elif args.cmd == "submit-modes":
+        print_submit_mode_results(compare_submit_modes(
+            num_layers=args.num_layers,
+            layer_width=args.layer_width,
+            job_runtime=args.job_runtime,
+            transaction_latency=args.transaction_latency,
+            job_latency=args.job_latency,
+            poll_interval=args.poll_interval,
+            scan_interval=args.scan_interval,
+            max_submits_per_interval=args.max_submits_per_interval,
+            submit_latency=args.submit_latency
+        ))
+    else:
+        raise RuntimeError("unexpected cmd: {}".format(args.cmd))
@@ -1,30 +1,27 @@
 #!/usr/bin/env python3
 import argparse
-import os
-import shutil
 import sys
 
 from pathlib import Path
 
 import htcondor
 import classad
-from htcondor import dags
+
+from dag_gen import DAG_SHAPES, make_dag_dir, parse_positive_int, print_dag_stats, write_dag
 
 def parse_args(args=sys.argv[1:]):
     parser = argparse.ArgumentParser(description="Create a fork join workflow")
     parser.add_argument(
                 "num_levels",
-                type=int,
-                choices=range(1, 101),
-                metavar="[1,100]",
+                type=parse_positive_int,
+                metavar="N",
                 help="number of levels in the workflow"
             )
 
     parser.add_argument(
                 "layer_width",
-                type=int,
-                choices=range(1,101),
-                metavar="[1,100]",
+                type=parse_positive_int,
+                metavar="N",
                 help="number of independent jobs per odd numbered layer"
             )
 
@@ -36,56 +33,44 @@ def parse_args(args=sys.argv[1:]):
                 help="duration in seconds that a job will sleep for in"
             )
 
-    return parser.parse_args(args)
+    parser.add_argument(
+                "--shape",
+                choices=sorted(DAG_SHAPES),
+                default="forkjoin",
+                help="shape of the workflow, see provisioner.py submit --help"
+            )
 
-def build_dag(num_layers, layer_width, job_duration):
-    dag = dags.DAG()
+    parser.add_argument(
+                "--seed",
+                type=int,
+                default=None,
+                help="seed of the random shape"
+            )
 
+    return parser.parse_args(args)
+
+def build_dag(num_layers, layer_width, job_duration, shape="forkjoin", seed=None) -> Path:
+    """Stream the workflow to a new directory under ~/htcondor_dags and return the dag file."""
     sub = htcondor.Submit(
         executable="/bin/sleep",
         arguments=job_duration,
         **{"+mycustomattr": classad.quote("helloworld_$(num)")}
     )
 
-    prev_layer = dag.layer(
-                name="top",
-                submit_description=sub
-            )
-    for i in range(1, num_layers):
-        # odd layer is of width layer_width
-        if i % 2 != 0:
-            l = prev_layer.child_layer(
-                        name="layer_{}".format(i),
-                        submit_description=sub,
-                        vars=[{"num":"{}_{}".format(i,x)} for x in range(layer_width)]
-                    )
-            prev_layer = l
-
-        # even layer is of width 1
-        else:
-            l = prev_layer.child_layer(
-                        name="layer_{}".format(i),
-                        submit_description=sub,
-                        vars=[{"num":"{}_{}".format(i,x)} for x in range(1)]
-                    )
-            prev_layer = l
-
-    print(dag.describe())
-    return dag
+    dag_path = make_dag_dir(Path.home() / "htcondor_dags", shape)
+    stats = write_dag(DAG_SHAPES[shape](num_layers, layer_width, seed=seed), dag_path, sub)
+    print_dag_stats(stats)
+
+    return stats.dag_file
 
 if __name__=="__main__":
     args = parse_args()
 
-    dag = build_dag(args.num_levels, args.layer_width, args.job_duration)
-
-    dag_path = Path.home() / "htcondor_dag"
-
-    # blow away old files
-    shutil.rmtree(dag_path, ignore_errors=True)
-
-    dag_file = dags.write_dag(dag, dag_path)
+    dag_file = build_dag(args.num_levels, args.layer_width, args.job_duration, args.shape, args.seed)
 
     dag_submit = htcondor.Submit.from_dag(str(dag_file), {"force":True})
+    # DAGMan runs in the dag directory, without changing ours
+    dag_submit["initialdir"] = str(dag_file.parent)
     print(dag_submit)
 
     coll = htcondor.Collector()
@@ -94,9 +79,6 @@ if __name__=="__main__":
 
     schedd = htcondor.Schedd(schedd_ad)
 
-    os.chdir(dag_path)
     with schedd.transaction() as txn:
         cluster_id = dag_submit.queue(txn)
     print("DAGMan job cluster is {}".format(cluster_id))
-    os.chdir("..")
-
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+import json
+import os
+import struct
+import time
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# name of the column every store is indexed by, seconds since the epoch
+TS_COLUMN = "ts"
+
+# describes the columns of a segment, written when the segment is created
+SEGMENT_META_FILE = "meta.json"
+
+class TimeSeriesWriter:
+    def __init__(
+            self,
+            root: str,
+            columns: List[Tuple[str, str]],
+            max_bytes: int = 64 * 1024 * 1024,
+            max_age: float = 24 * 3600
+        ):
+        """
+        Append-only, columnar time-series store. Records are written to
+        segments, directories under root named after the timestamp of their
+        first record, holding one file per column. Every value of a column
+        has the same width, so record i of a column is at offset i * width
+        and a reader can mmap a single column without parsing the others.
+        Appending a record costs one small write per column, regardless of
+        how much history there is.
+
+        A new segment is started when the current one exceeds max_bytes or
+        max_age, and every time a writer is created, so a segment is never
+        appended to by two writers.
+
+        :param root: directory holding the segments
+        :type root: str
+        :param columns: (name, numpy/struct dtype e.g. "<f8", "<u4") per column, must include "ts" as "<f8"
+        :type columns: List[Tuple[str, str]]
+        :param max_bytes: size, in bytes, after which a new segment is started, defaults to 64MB
+        :type max_bytes: int, optional
+        :param max_age: seconds after which a new segment is started, defaults to 24 hours
+        :type max_age: float, optional
+        :raises ValueError: columns do not include "ts" as "<f8", or a dtype has no fixed width struct equivalent
+        """
+        if (TS_COLUMN, "<f8") not in columns:
+            raise ValueError("columns must include ({}, <f8)".format(TS_COLUMN))
+
+        self.root = Path(root)
+        self.columns = columns
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+        # little endian struct format per column, same layout as the numpy dtype
+        self._formats = [struct.Struct("<" + np.dtype(dtype).char) for _, dtype in columns]
+        for (name, dtype), fmt in zip(columns, self._formats):
+            if fmt.size != np.dtype(dtype).itemsize:
+                raise ValueError("unsupported dtype {} of column {}".format(dtype, name))
+        self.record_size = sum(f.size for f in self._formats)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._files = None
+        self._segment_start = None
+        self._segment_bytes = 0
+
+    def _open_segment(self, ts: float):
+        self.close()
+
+        # segment names sort in time order; a suffix keeps them unique when
+        # two segments start within the same microsecond
+        name = "{:017.6f}".format(ts)
+        path = self.root / name
+        suffix = 0
+        while path.exists():
+            suffix += 1
+            path = self.root / "{}-{}".format(name, suffix)
+
+        path.mkdir()
+        with (path / SEGMENT_META_FILE).open("w") as f:
+            json.dump({"columns": self.columns}, f)
+
+        self._files = [(path / "{}.bin".format(c)).open("ab") for c, _ in self.columns]
+        self._segment_start = ts
+        self._segment_bytes = 0
+
+    def append(self, record: Dict[str, float]):
+        """
+        Append a single record, flushing it so that readers see it.
+        Columns missing from record are written as 0.
+
+        :param record: value per column name, "ts" defaults to now
+        :type record: Dict[str, float]
+        """
+        ts = record.get(TS_COLUMN)
+        if ts is None:
+            ts = time.time()
+
+        if (self._files is None
+                or self._segment_bytes + self.record_size > self.max_bytes
+                or ts - self._segment_start >= self.max_age):
+            self._open_segment(ts)
+
+        for (name, _), fmt, f in zip(self.columns, self._formats, self._files):
+            f.write(fmt.pack(ts if name == TS_COLUMN else record.get(name, 0)))
+            f.flush()
+
+        self._segment_bytes += self.record_size
+
+    def close(self):
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+
+            self._files = None
+
+class TimeSeriesReader:
+    def __init__(self, root: str):
+        """
+        Reads time windows out of a store written by TimeSeriesWriter. Only
+        the segments overlapping a window are opened, each column is mmapped
+        and the window is found with a binary search on the ts column.
+
+        :param root: directory holding the segments
+        :type root: str
+        """
+        self.root = Path(root)
+
+    def segments(self) -> List[Path]:
+        """Segment directories, oldest first."""
+        if not self.root.exists():
+            return list()
+
+        return sorted(p for p in self.root.iterdir() if (p / SEGMENT_META_FILE).exists())
+
+    @staticmethod
+    def _segment_start(path: Path) -> float:
+        return float(path.name.split("-")[0])
+
+    def _load_segment(self, path: Path, start: float, end: float, columns: List[str]) -> Dict[str, np.ndarray]:
+        with (path / SEGMENT_META_FILE).open("r") as f:
+            dtypes = dict((c, d) for c, d in json.load(f)["columns"])
+
+        # a record is complete once all of its columns have been written
+        length = min(os.path.getsize(path / "{}.bin".format(c)) // np.dtype(d).itemsize for c, d in dtypes.items())
+        if length == 0:
+            return None
+
+        ts = np.memmap(path / "{}.bin".format(TS_COLUMN), dtype=dtypes[TS_COLUMN], mode="r", shape=(length,))
+        lo = np.searchsorted(ts, start, side="left")
+        hi = np.searchsorted(ts, end, side="right")
+        if lo >= hi:
+            return None
+
+        result = dict()
+        for c in columns:
+            if c in dtypes:
+                column = np.memmap(path / "{}.bin".format(c), dtype=dtypes[c], mode="r", shape=(length,))
+                result[c] = np.array(column[lo:hi])
+            else:
+                # column added after this segment was written
+                result[c] = np.zeros(hi - lo)
+
+        return result
+
+    def read(self, start: float = None, end: float = None, columns: List[str] = None) -> Dict[str, np.ndarray]:
+        """
+        Load the records with start <= ts <= end.
+
+        :param start: seconds since the epoch, defaults to None (from the first record)
+        :type start: float, optional
+        :param end: seconds since the epoch, defaults to None (up to the last record)
+        :type end: float, optional
+        :param columns: columns to load, defaults to None (every column of the newest segment)
+        :type columns: List[str], optional
+        :return: one array per column, all of the same length
+        :rtype: Dict[str, np.ndarray]
+        """
+        start = -np.inf if start is None else start
+        end = np.inf if end is None else end
+
+        segments = self.segments()
+        if columns is None:
+            if len(segments) == 0:
+                return dict()
+
+            with (segments[-1] / SEGMENT_META_FILE).open("r") as f:
+                columns = [c for c, _ in json.load(f)["columns"]]
+
+        columns = list(columns)
+        if TS_COLUMN not in columns:
+            columns.insert(0, TS_COLUMN)
+
+        parts = list()
+        for i, path in enumerate(segments):
+            # a segment ends where the next one starts
+            if self._segment_start(path) > end:
+                break
+            if i + 1 < len(segments) and self._segment_start(segments[i + 1]) < start:
+                continue
+
+            part = self._load_segment(path, start, end, columns)
+            if part is not None:
+                parts.append(part)
+
+        if len(parts) == 0:
+            return {c: np.zeros(0) for c in columns}
+
+        return {c: np.concatenate([p[c] for p in parts]) for c in columns}